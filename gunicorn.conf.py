@@ -0,0 +1,32 @@
+"""
+Gunicorn configuration.
+
+Gunicorn loads this file from the working directory on startup.
+"""
+import os
+import shutil
+
+# Worker processes write Prometheus samples here, see project/core/metrics.py
+prometheus_multiproc_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus"
+)
+
+
+def on_starting(server):
+    """Discard samples left over from previous runs."""
+    shutil.rmtree(prometheus_multiproc_dir, ignore_errors=True)
+    os.makedirs(prometheus_multiproc_dir)
+
+
+def child_exit(server, worker):
+    """Stop aggregating live gauges from workers that have exited."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    """Warm up each worker after it loads the application, before it serves."""
+    from core.warmup import warm_up
+
+    warm_up()
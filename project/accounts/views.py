@@ -1,3 +1,4 @@
+from activities.calendars import get_user_feed_url
 from django.contrib.auth import login
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
@@ -44,3 +45,12 @@ class UserProfileUpdateView(UpdateView):
 
     def get_object(self):
         return self.request.user
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        context["calendar_url"] = self.request.build_absolute_uri(
+            get_user_feed_url(self.request.user)
+        )
+
+        return context
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Activity
+from .models import Activity, ActivitySeries
 
 
 @admin.register(Activity)
@@ -10,3 +10,19 @@ class ActivityModelAdmin(admin.ModelAdmin):
         "activity_date",
         "circle",
     ]
+
+
+@admin.register(ActivitySeries)
+class ActivitySeriesModelAdmin(admin.ModelAdmin):
+    list_display = ["__str__", "circle", "start_date", "frequency"]
+    fields = [
+        "activity_type",
+        "circle",
+        "start_date",
+        "frequency",
+        "interval",
+        "weekdays",
+        "until",
+        "count",
+        "note",
+    ]
@@ -0,0 +1,187 @@
+import datetime
+import io
+
+from accounts.models import User
+from circles.models import Circle, Companion
+from core.benchmarking import benchmark, time_per_call
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.test import Client, RequestFactory
+from django.utils import timezone, translation
+
+from .calendars import get_circle_feed_url
+from .exports import iter_csv
+from .forms import ActivityModelForm
+from .imports import import_activities
+from .models import Activity, Participation, get_activity_type_choices
+
+
+@benchmark
+def card_rendering(number=20):
+    """
+    Time rendering the cards of 50 activities, as on a circle page, and the
+    activity type labels and choices they use. Rendered in Finnish.
+    """
+    user = User.objects.create_user("benchmark@user.com", "benchmark")
+    circle = Circle.objects.create(name="Benchmark")
+    Companion.objects.create(circle=circle, user=user, is_organizer=True)
+    activity_types = Activity.ActivityTypeChoices.values
+    activities = Activity.objects.bulk_create(
+        [
+            Activity(circle=circle, activity_type=activity_types[index % 8])
+            for index in range(50)
+        ]
+    )
+
+    request = RequestFactory().get(circle.get_absolute_url())
+    request.user = user
+
+    def get_lazy_labels():
+        return [activity.get_activity_type_display() for activity in activities]
+
+    def get_labels():
+        return [str(activity) for activity in activities]
+
+    def get_lazy_choices():
+        return [
+            [
+                (value, str(label))
+                for value, label in Activity.ActivityTypeChoices.choices
+            ]
+            for _ in activities
+        ]
+
+    def get_choices():
+        return [
+            [(value, str(label)) for value, label in get_activity_type_choices()]
+            for _ in activities
+        ]
+
+    def render_cards():
+        form = ActivityModelForm(user=user)
+        context = {"circle": circle, "form": form, "add_activity_form": form}
+
+        return [
+            render_to_string(
+                "circles/circle_activity.html",
+                {**context, "activity": activity},
+                request,
+            )
+            for activity in activities
+        ]
+
+    with translation.override("fi"):
+        return [
+            ("50 labels, lazy", time_per_call(get_lazy_labels, number)),
+            ("50 labels, precomputed", time_per_call(get_labels, number)),
+            ("50 type selects, lazy", time_per_call(get_lazy_choices, number)),
+            ("50 type selects, precomputed", time_per_call(get_choices, number)),
+            ("50 cards", time_per_call(render_cards, number)),
+        ]
+
+
+@benchmark
+def csv_import(number=1):
+    """
+    Time importing 50,000 activities from CSV, a third of them with two
+    participants.
+    """
+    circle = Circle.objects.create(name="Benchmark")
+    emails = [f"benchmark{index}@user.com" for index in range(2)]
+
+    for email in emails:
+        user = User.objects.create_user(email, "benchmark")
+        Companion.objects.create(circle=circle, user=user)
+
+    header = "activity_type,activity_date,note,participants\r\n"
+    rows = [
+        f"SHOPPING,2022-11-{index % 28 + 1:02},Row {index},"
+        + (";".join(emails) if index % 3 == 0 else "")
+        + "\r\n"
+        for index in range(50_000)
+    ]
+
+    def run_import():
+        import_activities(circle, io.StringIO(header + "".join(rows)))
+
+    return [("50,000 rows", time_per_call(run_import, number, repeat=1))]
+
+
+@benchmark
+def history_export(number=5):
+    """
+    Time the first chunk and the whole of CSV exports of 1,000 and 10,000
+    activities, each with a participant.
+    """
+    user = User.objects.create_user("benchmark@user.com", "benchmark")
+    rows = []
+
+    for size in [1_000, 10_000]:
+        circle = Circle.objects.create(name=f"Benchmark {size}")
+        activities = Activity.objects.bulk_create(
+            [Activity(circle=circle) for _ in range(size)]
+        )
+        Participation.objects.bulk_create(
+            [
+                Participation(
+                    activity=activity, user=user, activity_date=activity.activity_date
+                )
+                for activity in activities
+            ]
+        )
+
+        def get_first_chunk(circle=circle):
+            # The header, then the first chunk of activities
+            chunks = iter_csv(circle)
+            next(chunks)
+            next(chunks)
+            chunks.close()
+
+        def get_all_chunks(circle=circle):
+            for _chunk in iter_csv(circle):
+                pass
+
+        rows.append((f"{size:,} activities, first chunk", get_first_chunk))
+        rows.append((f"{size:,} activities, all", get_all_chunks))
+
+    return [(label, time_per_call(func, number)) for label, func in rows]
+
+
+@benchmark
+def calendar_feed(number=20):
+    """
+    Time requests for the iCalendar feed of a circle with 1,000 activities:
+    generated, from the cache and not modified.
+    """
+    user = User.objects.create_user("benchmark@user.com", "benchmark")
+    circle = Circle.objects.create(name="Benchmark")
+    Companion.objects.create(circle=circle, user=user)
+    today = timezone.localdate()
+    Activity.objects.bulk_create(
+        [
+            Activity(
+                circle=circle, activity_date=today + datetime.timedelta(days=index)
+            )
+            for index in range(1000)
+        ]
+    )
+
+    client = Client()
+    url = get_circle_feed_url(circle, user)
+    etag = client.get(url)["ETag"]
+
+    def get_generated():
+        cache.clear()
+        b"".join(client.get(url).streaming_content)
+
+    def get_cached():
+        b"".join(client.get(url).streaming_content)
+
+    def get_not_modified():
+        client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    return [
+        ("generated", time_per_call(get_generated, number)),
+        ("cached", time_per_call(get_cached, number)),
+        ("not modified", time_per_call(get_not_modified, number)),
+    ]
@@ -0,0 +1,356 @@
+"""
+iCalendar feeds of activities, for subscribing to from calendar apps.
+
+There is a feed per circle and one per user, with the activities they
+participate in. Calendar apps fetch feeds without logging in, so feed URLs
+carry a signature of the user they were made for, and a circle's feed stops
+working when the user leaves the circle.
+
+Activities are all-day events. In a circle's feed, a recurring series is a
+single event with an RRULE, deleted occurrences are EXDATEs and saved
+occurrences override the series with a RECURRENCE-ID. Deleted activities
+are left out, which removes them from subscribed calendars. Done activities
+are marked in their summary, and DTSTAMP is the time of the feed's version,
+so apps replace events that changed.
+
+Calendar apps poll often, so feeds are cached for their version, and
+requests with the version's ETag get an empty 304 response.
+"""
+import datetime
+import hashlib
+
+from circles.models import get_circles_version
+from core.metrics import record_cache_lookup
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import HttpResponseNotModified, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import cached_property
+from django.utils.translation import get_language
+from django.utils.translation import gettext as _
+
+from .models import Activity, get_activity_type_labels
+
+# Past activities older than this are left out
+FEED_PAST_DAYS = 90
+
+# Feed cache keys include the day, so feeds only need to outlive it
+FEED_TIMEOUT = 60 * 60 * 24
+
+PRODID = "-//Companionship Care//Activities//EN"
+
+signer = signing.Signer(salt="activities.calendars")
+
+
+def get_signature(*values):
+    return signer.signature(":".join(str(value) for value in values))
+
+
+def check_signature(signature, *values):
+    return constant_time_compare(signature, get_signature(*values))
+
+
+def get_circle_feed_url(circle, user):
+    """Return the path of the circle's feed, for the user."""
+    return reverse(
+        "circle-calendar",
+        kwargs={
+            "circle_id": circle.pk,
+            "user_id": user.pk,
+            "signature": get_signature("circle", circle.pk, user.pk),
+        },
+    )
+
+
+def get_user_feed_url(user):
+    """Return the path of the feed of activities the user participates in."""
+    return reverse(
+        "user-calendar",
+        kwargs={"user_id": user.pk, "signature": get_signature("user", user.pk)},
+    )
+
+
+def escape_text(value):
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\n", "\\n")
+    )
+
+
+def fold(line):
+    """Fold a content line into lines of at most 75 octets, ending with CRLF."""
+    if len(line.encode()) <= 75:
+        return line + "\r\n"
+
+    lines = []
+    current = ""
+    current_length = 0
+
+    for character in line:
+        length = len(character.encode())
+
+        # Continuation lines start with a space, which counts towards the limit
+        if current_length + length > (75 if not lines else 74):
+            lines.append(current)
+            current = ""
+            current_length = 0
+
+        current += character
+        current_length += length
+
+    lines.append(current)
+
+    return "\r\n ".join(lines) + "\r\n"
+
+
+def format_date(date):
+    return f"{date:%Y%m%d}"
+
+
+def format_datetime(value):
+    return f"{value.astimezone(datetime.timezone.utc):%Y%m%dT%H%M%SZ}"
+
+
+def get_event_lines(activity, uid, dtstamp, labels):
+    """Return the content lines of an activity's VEVENT."""
+    label = labels.get(activity.activity_type, activity.activity_type)
+    summary = f"✓ {label}" if activity.done else label
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{dtstamp}",
+        f"DTSTART;VALUE=DATE:{format_date(activity.activity_date)}",
+        f"SUMMARY:{escape_text(summary)}",
+    ]
+
+    if activity.note:
+        lines.append(f"DESCRIPTION:{escape_text(activity.note)}")
+
+    return lines
+
+
+class Feed:
+    """
+    A calendar feed, with a version that changes whenever its content does.
+
+    Subclasses set name and title, and implement version, dtstamp and
+    get_events().
+    """
+
+    name = ""
+    title = ""
+
+    def __init__(self, host):
+        self.host = host
+        self.today = timezone.localdate()
+        self.start = self.today - datetime.timedelta(days=FEED_PAST_DAYS)
+
+    @cached_property
+    def version(self):
+        raise NotImplementedError
+
+    @cached_property
+    def dtstamp(self):
+        """Return the time of the version, as an iCalendar UTC date-time."""
+        raise NotImplementedError
+
+    def get_events(self):
+        """Yield the content lines of each event."""
+        raise NotImplementedError
+
+    def get_uid(self, kind, pk):
+        return f"{kind}-{pk}@{self.host}"
+
+    def get_cache_key(self):
+        # Labels are translated and past activities depend on the day
+        return (
+            f"activities.calendar:{self.name}:{self.version}:"
+            f"{get_language()}:{self.today}"
+        )
+
+    def iter_lines(self):
+        yield "BEGIN:VCALENDAR"
+        yield "VERSION:2.0"
+        yield f"PRODID:{PRODID}"
+        yield f"X-WR-CALNAME:{escape_text(self.title)}"
+
+        for event in self.get_events():
+            yield from event
+            yield "END:VEVENT"
+
+        yield "END:VCALENDAR"
+
+    def iter_chunks(self):
+        """Yield the feed in chunks of an event each."""
+        chunk = []
+
+        for line in self.iter_lines():
+            chunk.append(fold(line))
+
+            if line.startswith("END:"):
+                yield "".join(chunk)
+                chunk = []
+
+    def iter_and_cache(self, key):
+        chunks = []
+
+        for chunk in self.iter_chunks():
+            chunks.append(chunk)
+
+            yield chunk
+
+        cache.set(key, "".join(chunks), FEED_TIMEOUT)
+
+
+class CircleFeed(Feed):
+    def __init__(self, circle, host):
+        super().__init__(host)
+
+        self.circle = circle
+        self.name = f"circle:{circle.pk}"
+        self.title = circle.name
+
+    @cached_property
+    def version(self):
+        return self.circle.version
+
+    @cached_property
+    def dtstamp(self):
+        return format_datetime(self.circle.modified_at)
+
+    def get_events(self):
+        labels = get_activity_type_labels()
+        series_ids = set()
+
+        for series in self.circle.activity_series.exclude(last_date__lt=self.start):
+            # The first occurrence, as RFC 5545 counts DTSTART as one
+            first_date = next(
+                series.iter_rule_dates(series.start_date, datetime.date.max),
+                series.start_date,
+            )
+            lines = get_event_lines(
+                series.get_occurrence(first_date),
+                self.get_uid("series", series.pk),
+                self.dtstamp,
+                labels,
+            )
+            lines.append(f"RRULE:{series.rrule}")
+
+            if series.excluded_dates:
+                excluded_dates = ",".join(
+                    date.replace("-", "") for date in sorted(series.excluded_dates)
+                )
+                lines.append(f"EXDATE;VALUE=DATE:{excluded_dates}")
+
+            series_ids.add(series.pk)
+
+            yield lines
+
+        # A range over the (circle, activity_date) index, and all the saved
+        # occurrences of the series, as their rules start at the first date
+        activities = self.circle.activities.filter(
+            Q(activity_date__gte=self.start) | Q(series__in=series_ids)
+        ).order_by("activity_date", "pk")
+
+        for activity in activities:
+            if activity.series_id not in series_ids:
+                yield get_event_lines(
+                    activity,
+                    self.get_uid("activity", activity.pk),
+                    self.dtstamp,
+                    labels,
+                )
+                continue
+
+            # Saved occurrences replace the series' occurrence on their date
+            lines = get_event_lines(
+                activity,
+                self.get_uid("series", activity.series_id),
+                self.dtstamp,
+                labels,
+            )
+            lines.append(
+                f"RECURRENCE-ID;VALUE=DATE:{format_date(activity.occurrence_date)}"
+            )
+
+            yield lines
+
+
+class UserFeed(Feed):
+    def __init__(self, user, host):
+        super().__init__(host)
+
+        self.user = user
+        self.name = f"user:{user.pk}"
+        self.title = _("My activities")
+
+    @cached_property
+    def circle_versions(self):
+        return list(
+            self.user.companions_through.order_by("circle").values_list(
+                "circle", "circle__modified_at"
+            )
+        )
+
+    @cached_property
+    def version(self):
+        # Participant changes touch the circle, so they change the version
+        return get_circles_version(self.circle_versions)
+
+    @cached_property
+    def dtstamp(self):
+        return format_datetime(
+            max(
+                (modified_at for _circle, modified_at in self.circle_versions),
+                default=timezone.now(),
+            )
+        )
+
+    def get_events(self):
+        labels = get_activity_type_labels()
+        # A range over the user's participations, in one query. Activities
+        # of circles the user has left would not change the version.
+        activities = Activity.objects.filter(
+            participants=self.user,
+            circle__in=[circle for circle, _modified_at in self.circle_versions],
+            activity_date__gte=self.start,
+        ).order_by("activity_date", "pk")
+
+        for activity in activities:
+            yield get_event_lines(
+                activity, self.get_uid("activity", activity.pk), self.dtstamp, labels
+            )
+
+
+def get_feed_response(request, feed):
+    """
+    Return a response with the feed, streamed as it is generated, from the
+    cache, or a 304 response if the client has the current version.
+    """
+    key = feed.get_cache_key()
+    etag = quote_etag(hashlib.sha256(key.encode()).hexdigest()[:32])
+    response = get_conditional_response(request, etag=etag)
+
+    if response is not None:
+        if isinstance(response, HttpResponseNotModified):
+            response["ETag"] = etag
+
+        return response
+
+    content = cache.get(key)
+
+    record_cache_lookup("activity_calendars", content is not None)
+
+    chunks = [content] if content is not None else feed.iter_and_cache(key)
+    response = StreamingHttpResponse(
+        chunks, content_type="text/calendar; charset=utf-8"
+    )
+    response["ETag"] = etag
+
+    return response
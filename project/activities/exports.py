@@ -0,0 +1,129 @@
+"""
+Export of a circle's activity history as CSV or JSON.
+
+Exports are generated while they are sent. Activities are read in chunks
+with QuerySet.iterator(), participants are prefetched one chunk at a time,
+and each chunk is serialized and sent before the next one is read. Memory
+use and the time to the first byte don't depend on the size of the history.
+The CSV columns match those of the importer, see activities/imports.py,
+with participants as display names rather than emails.
+"""
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Activity, Comment
+
+User = get_user_model()
+
+CHUNK_SIZE = 500
+
+CSV_COLUMNS = [
+    "activity_type",
+    "activity_date",
+    "note",
+    "done",
+    "comment_count",
+    "participants",
+]
+
+
+def get_export_queryset(circle):
+    # A subquery rather than a join and GROUP BY, so the database can return
+    # the first rows before it has read the whole history
+    comment_counts = (
+        Comment.objects.filter(activity=OuterRef("pk"))
+        .values("activity")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+
+    return (
+        Activity.objects.filter(circle=circle)
+        .annotate(comment_count=Coalesce(Subquery(comment_counts), 0))
+        .prefetch_related(
+            Prefetch(
+                "participants",
+                queryset=User.objects.only("display_name").order_by("display_name"),
+            )
+        )
+        .order_by("activity_date", "pk")
+    )
+
+
+def iter_chunks(circle, chunk_size=CHUNK_SIZE):
+    """Yield lists of the circle's activities, with participants prefetched."""
+    chunk = []
+
+    # With a chunk size, iterator() prefetches participants for each chunk
+    for activity in get_export_queryset(circle).iterator(chunk_size=chunk_size):
+        chunk.append(activity)
+
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def get_row(activity):
+    return {
+        "activity_type": activity.activity_type,
+        "activity_date": activity.activity_date.isoformat(),
+        "note": activity.note or "",
+        "done": activity.done,
+        "comment_count": activity.comment_count,
+        "participants": [
+            participant.display_name for participant in activity.participants.all()
+        ],
+    }
+
+
+def iter_csv(circle, chunk_size=CHUNK_SIZE):
+    """Yield the circle's activities as CSV, one string per chunk."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, CSV_COLUMNS)
+
+    writer.writeheader()
+
+    yield buffer.getvalue()
+
+    for chunk in iter_chunks(circle, chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+
+        for activity in chunk:
+            row = get_row(activity)
+            row["participants"] = ";".join(row["participants"])
+
+            writer.writerow(row)
+
+        yield buffer.getvalue()
+
+
+def iter_json(circle, chunk_size=CHUNK_SIZE):
+    """Yield the circle's activities as a JSON array, one string per chunk."""
+    separator = "\n"
+
+    yield "["
+
+    for chunk in iter_chunks(circle, chunk_size):
+        yield separator + ",\n".join(
+            json.dumps(get_row(activity)) for activity in chunk
+        )
+
+        separator = ",\n"
+
+    yield "\n]\n"
+
+
+# Content type and serializer by format
+EXPORT_FORMATS = {
+    "csv": ("text/csv", iter_csv),
+    "json": ("application/json", iter_json),
+}
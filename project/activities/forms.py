@@ -1,6 +1,9 @@
+from circles.models import Circle
 from django import forms
+from django.utils.translation import gettext_lazy as _
 
-from .models import Activity
+from . import recurrence
+from .models import Activity, ActivitySeries, get_activity_type_choices
 
 
 class ActivityModelForm(forms.ModelForm):
@@ -12,3 +15,59 @@ class ActivityModelForm(forms.ModelForm):
             "activity_date",
             "note",
         ]
+
+    def __init__(self, *args, user, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # Only the user's circles, so the form never lists every circle and
+        # validating the choice is a single primary key lookup
+        self.fields["circle"].queryset = Circle.objects.filter(
+            companions_through__user=user
+        )
+
+        # Labels translated once per language, see get_activity_type_choices
+        self.fields["activity_type"].choices = get_activity_type_choices()
+
+
+class ActivitySeriesModelForm(forms.ModelForm):
+    weekdays = forms.MultipleChoiceField(
+        choices=[(weekday, weekday) for weekday in recurrence.WEEKDAYS],
+        widget=forms.CheckboxSelectMultiple,
+        required=False,
+        help_text=ActivitySeries._meta.get_field("weekdays").help_text,
+    )
+
+    class Meta:
+        model = ActivitySeries
+        fields = [
+            "circle",
+            "activity_type",
+            "start_date",
+            "frequency",
+            "interval",
+            "weekdays",
+            "until",
+            "count",
+            "note",
+        ]
+
+    def __init__(self, *args, user, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.fields["circle"].queryset = Circle.objects.filter(
+            companions_through__user=user
+        )
+        self.fields["activity_type"].choices = get_activity_type_choices()
+
+    def clean_weekdays(self):
+        return ",".join(self.cleaned_data["weekdays"])
+
+
+class ActivityImportForm(forms.Form):
+    csv_file = forms.FileField(
+        label=_("CSV file"),
+        help_text=_(
+            "Columns activity_type, activity_date (YYYY-MM-DD), note and "
+            "participants, as emails separated by semicolons."
+        ),
+    )
@@ -0,0 +1,236 @@
+"""
+Import of activities from CSV files, such as spreadsheets being migrated.
+
+The file has a header row naming its columns. ``activity_type`` and
+``activity_date`` are required, ``note`` and ``participants`` optional::
+
+    activity_type,activity_date,note,participants
+    SHOPPING,2022-11-01,Groceries,ann@example.com;bob@example.com
+
+Dates are in ISO format and participants are emails of the circle's
+companions, separated by semicolons or spaces. Rows are read and saved a
+batch at a time, so memory use doesn't grow with the size of the file.
+Each batch takes one query to resolve participant emails and one bulk
+insert each for activities, participants and their weeks for analytics.
+Invalid and unreadable rows are skipped and reported, the rest are
+imported.
+"""
+import csv
+import datetime
+import itertools
+import re
+from typing import NamedTuple
+
+from circles.analytics import mark_stale
+from circles.models import Circle, Companion
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils.translation import gettext as _
+
+from .models import Activity, Participation
+
+BATCH_SIZE = 1000
+
+# Errors beyond this are counted but not kept, a file of only bad rows
+# shouldn't use memory in proportion to its size
+MAX_REPORTED_ERRORS = 1000
+
+REQUIRED_COLUMNS = ["activity_type", "activity_date"]
+
+EMAIL_SEPARATOR_RE = re.compile(r"[;\s]+")
+
+NOTE_MAX_LENGTH = Activity._meta.get_field("note").max_length
+
+
+class RowError(NamedTuple):
+    line_number: int
+    message: str
+
+    def __str__(self):
+        return _("Line %(line_number)s: %(message)s") % self._asdict()
+
+
+class ParsedRow(NamedTuple):
+    line_number: int
+    activity: Activity
+    emails: list
+
+
+class ImportResult:
+    def __init__(self):
+        self.created_count = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, line_number, message):
+        self.error_count += 1
+
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(RowError(line_number, message))
+
+
+def parse_row(circle, row):
+    """
+    Return an unsaved activity and the participant emails of a CSV row.
+
+    Raises ValueError with a message for the import report.
+    """
+    activity_type = (row["activity_type"] or "").strip().upper()
+
+    if activity_type not in Activity.ActivityTypeChoices.values:
+        raise ValueError(
+            _("Unknown activity type %(activity_type)r.")
+            % {"activity_type": row["activity_type"]}
+        )
+
+    try:
+        activity_date = datetime.date.fromisoformat(
+            (row["activity_date"] or "").strip()
+        )
+    except ValueError:
+        raise ValueError(
+            _("Enter the date as YYYY-MM-DD, not %(activity_date)r.")
+            % {"activity_date": row["activity_date"]}
+        )
+
+    note = (row.get("note") or "").strip()
+
+    if len(note) > NOTE_MAX_LENGTH:
+        raise ValueError(
+            _("The note is longer than %(max_length)s characters.")
+            % {"max_length": NOTE_MAX_LENGTH}
+        )
+
+    emails = [
+        email.lower()
+        for email in EMAIL_SEPARATOR_RE.split(row.get("participants") or "")
+        if email
+    ]
+    activity = Activity(
+        circle=circle,
+        activity_type=activity_type,
+        activity_date=activity_date,
+        note=note or None,
+    )
+
+    return activity, emails
+
+
+def resolve_emails(circle, emails):
+    """Return the ids of the circle's companions by lowercase email."""
+    companions = (
+        Companion.objects.filter(circle=circle)
+        .annotate(email=Lower("user__email"))
+        .filter(email__in=emails)
+    )
+
+    return dict(companions.values_list("email", "user_id"))
+
+
+def import_batch(circle, parsed_rows, result):
+    user_ids = resolve_emails(
+        circle, {email for row in parsed_rows for email in row.emails}
+    )
+    valid_rows = []
+
+    for row in parsed_rows:
+        unknown_emails = [email for email in row.emails if email not in user_ids]
+
+        if unknown_emails:
+            result.add_error(
+                row.line_number,
+                _("Not companions of the circle: %(emails)s.")
+                % {"emails": ", ".join(unknown_emails)},
+            )
+        else:
+            valid_rows.append(row)
+
+    # Sets primary keys on the activities, used by the participants below
+    Activity.objects.bulk_create([row.activity for row in valid_rows])
+
+    Participation.objects.bulk_create(
+        [
+            Participation(
+                activity_id=row.activity.pk,
+                user_id=user_ids[email],
+                activity_date=row.activity.activity_date,
+            )
+            for row in valid_rows
+            # Listing someone twice shouldn't make them participate twice
+            for email in dict.fromkeys(row.emails)
+        ]
+    )
+
+    # bulk_create() doesn't send the signals that mark the weeks for analytics
+    mark_stale((circle.pk, row.activity.activity_date) for row in valid_rows)
+
+    result.created_count += len(valid_rows)
+
+
+def import_activities(circle, lines, batch_size=BATCH_SIZE):
+    """
+    Import activities to the circle from an iterable of CSV lines, such as
+    a text file. Return an ImportResult with the count of imported
+    activities and the errors of skipped rows.
+    """
+    result = ImportResult()
+    reader = csv.DictReader(lines)
+
+    try:
+        fieldnames = reader.fieldnames or []
+    except csv.Error as error:
+        result.add_error(
+            1, _("The header row can't be read: %(error)s.") % {"error": error}
+        )
+
+        return result
+
+    missing_columns = [
+        column for column in REQUIRED_COLUMNS if column not in fieldnames
+    ]
+
+    if missing_columns:
+        result.add_error(
+            1,
+            _("Missing columns: %(columns)s.")
+            % {"columns": ", ".join(missing_columns)},
+        )
+
+        return result
+
+    def parse_rows():
+        while True:
+            # Where the next row starts
+            line_number = reader.line_num + 1
+
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as error:
+                # Such as a field over the size limit, reading goes on with
+                # the next line
+                result.add_error(
+                    line_number,
+                    _("The row can't be read: %(error)s.") % {"error": error},
+                )
+                continue
+
+            try:
+                activity, emails = parse_row(circle, row)
+            except ValueError as error:
+                result.add_error(reader.line_num, str(error))
+            else:
+                yield ParsedRow(reader.line_num, activity, emails)
+
+    parsed_rows = parse_rows()
+
+    with transaction.atomic():
+        while batch := list(itertools.islice(parsed_rows, batch_size)):
+            import_batch(circle, batch, result)
+
+        # bulk_create() doesn't send the signals that change the version
+        if result.created_count:
+            Circle.objects.filter(pk=circle.pk).touch()
+
+    return result
@@ -0,0 +1,46 @@
+from activities.imports import BATCH_SIZE, import_activities
+from circles.models import Circle
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Import activities to a circle from a CSV file with the columns "
+        "activity_type, activity_date, note and participants."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("circle", help="ID of the circle.")
+        parser.add_argument("csv_file", help="Path to the CSV file.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help=f"Rows saved per batch, {BATCH_SIZE} by default.",
+        )
+
+    def handle(self, *args, circle, csv_file, batch_size, **options):
+        try:
+            circle = Circle.objects.get(pk=circle)
+        except (Circle.DoesNotExist, ValidationError):
+            raise CommandError(f"Circle {circle} does not exist")
+
+        try:
+            with open(csv_file, encoding="utf-8-sig", newline="") as file:
+                result = import_activities(circle, file, batch_size=batch_size)
+        except OSError as error:
+            raise CommandError(error)
+
+        for error in result.errors:
+            self.stderr.write(str(error))
+
+        if result.error_count > len(result.errors):
+            self.stderr.write(
+                f"... and {result.error_count - len(result.errors)} more errors"
+            )
+
+        self.stdout.write(
+            f"Imported {result.created_count} activities to {circle}, "
+            f"skipped {result.error_count} rows"
+        )
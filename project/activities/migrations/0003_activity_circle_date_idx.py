@@ -0,0 +1,19 @@
+# Generated by Django 4.1.3 on 2026-10-19 02:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("activities", "0002_comment"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="activity",
+            index=models.Index(
+                fields=["circle", "activity_date"], name="activity_circle_date_idx"
+            ),
+        ),
+    ]
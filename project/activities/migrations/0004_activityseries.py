@@ -0,0 +1,135 @@
+# Generated by Django 4.1.3 on 2026-10-19 02:08
+
+import datetime
+
+import activities.models
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("circles", "0002_circle_modified_at"),
+        ("activities", "0003_activity_circle_date_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ActivitySeries",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "activity_type",
+                    models.CharField(
+                        choices=[
+                            ("APPOINTMENT", "Appointment"),
+                            ("CALL", "Call"),
+                            ("ENTERTAINMENT", "Entertainment"),
+                            ("ERRAND", "Errand"),
+                            ("HOUSEWORK", "Housework"),
+                            ("NATURE", "Nature"),
+                            ("OUTING", "Outing"),
+                            ("SHOPPING", "Shopping"),
+                        ],
+                        default="APPOINTMENT",
+                        max_length=15,
+                    ),
+                ),
+                ("note", models.CharField(blank=True, max_length=50, null=True)),
+                ("start_date", models.DateField(default=datetime.date.today)),
+                (
+                    "frequency",
+                    models.CharField(
+                        choices=[
+                            ("DAILY", "Daily"),
+                            ("WEEKLY", "Weekly"),
+                            ("MONTHLY", "Monthly"),
+                        ],
+                        default="WEEKLY",
+                        max_length=7,
+                    ),
+                ),
+                (
+                    "interval",
+                    models.PositiveSmallIntegerField(
+                        default=1,
+                        validators=[django.core.validators.MinValueValidator(1)],
+                    ),
+                ),
+                (
+                    "weekdays",
+                    models.CharField(
+                        blank=True,
+                        help_text="For weekly activities, the days of the week, like MO,TH.",
+                        max_length=20,
+                        validators=[activities.models.validate_weekdays],
+                    ),
+                ),
+                ("until", models.DateField(blank=True, null=True)),
+                (
+                    "count",
+                    models.PositiveSmallIntegerField(
+                        blank=True,
+                        help_text="Optionally, the number of occurrences.",
+                        null=True,
+                        validators=[
+                            django.core.validators.MinValueValidator(1),
+                            django.core.validators.MaxValueValidator(1000),
+                        ],
+                    ),
+                ),
+                ("last_date", models.DateField(blank=True, editable=False, null=True)),
+                (
+                    "excluded_dates",
+                    models.JSONField(blank=True, default=list, editable=False),
+                ),
+            ],
+            options={
+                "verbose_name": "activity series",
+                "verbose_name_plural": "activity series",
+            },
+        ),
+        migrations.AddField(
+            model_name="activity",
+            name="occurrence_date",
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="activityseries",
+            name="circle",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="activity_series",
+                to="circles.circle",
+            ),
+        ),
+        migrations.AddField(
+            model_name="activity",
+            name="series",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="activities",
+                to="activities.activityseries",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="activity",
+            constraint=models.UniqueConstraint(
+                fields=("series", "occurrence_date"),
+                name="activity_series_occurrence_unique",
+            ),
+        ),
+    ]
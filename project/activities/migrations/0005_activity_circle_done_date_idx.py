@@ -0,0 +1,20 @@
+# Generated by Django 4.1.3 on 2026-10-19 02:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("activities", "0004_activityseries"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="activity",
+            index=models.Index(
+                fields=["circle", "done", "activity_date"],
+                name="activity_circle_done_date_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 4.1.3 on 2026-10-19 03:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def set_activity_dates(apps, schema_editor):
+    Activity = apps.get_model("activities", "Activity")
+    Participation = apps.get_model("activities", "Participation")
+
+    Participation.objects.update(
+        activity_date=models.Subquery(
+            Activity.objects.filter(pk=models.OuterRef("activity")).values(
+                "activity_date"
+            )
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("activities", "0005_activity_circle_done_date_idx"),
+    ]
+
+    operations = [
+        # The table of the relation becomes the through model's, as it is
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name="Participation",
+                    fields=[
+                        (
+                            "id",
+                            models.BigAutoField(
+                                auto_created=True,
+                                primary_key=True,
+                                serialize=False,
+                                verbose_name="ID",
+                            ),
+                        ),
+                        (
+                            "activity",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                related_name="participations",
+                                to="activities.activity",
+                            ),
+                        ),
+                        (
+                            "user",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                related_name="participations",
+                                to=settings.AUTH_USER_MODEL,
+                            ),
+                        ),
+                    ],
+                    options={
+                        "db_table": "activities_activity_participants",
+                        "unique_together": {("activity", "user")},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name="activity",
+                    name="participants",
+                    field=models.ManyToManyField(
+                        related_name="activities",
+                        through="activities.Participation",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="participation",
+            name="activity_date",
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(set_activity_dates, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="participation",
+            index=models.Index(
+                fields=["user", "activity_date"], name="participation_user_date_idx"
+            ),
+        ),
+    ]
@@ -1,12 +1,21 @@
 import datetime
+import functools
+import itertools
 from enum import Enum
 
-from circles.models import Circle
+from circles.models import Circle, Companion
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import Exists, OuterRef
 from django.urls import reverse
+from django.utils import translation
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
+from . import recurrence
+
 User = get_user_model()
 
 
@@ -55,33 +64,105 @@ class Activity(models.Model):
         null=True,
     )
 
-    participants = models.ManyToManyField(User, related_name="activities")
+    participants = models.ManyToManyField(
+        User, related_name="activities", through="Participation"
+    )
 
     done = models.BooleanField(default=False)
 
+    # Set on activities that are occurrences of a recurring series
+    series = models.ForeignKey(
+        to="ActivitySeries",
+        related_name="activities",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    occurrence_date = models.DateField(null=True, blank=True, editable=False)
+
     class Meta:
         verbose_name = _("activity")
         verbose_name_plural = _("activities")
         ordering = [
             "activity_date",
         ]
+        indexes = [
+            # Upcoming and past activities of a circle are date ranges
+            models.Index(
+                fields=["circle", "activity_date"], name="activity_circle_date_idx"
+            ),
+            # Inactivity alerts look for recently done activities of a circle
+            models.Index(
+                fields=["circle", "done", "activity_date"],
+                name="activity_circle_done_date_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["series", "occurrence_date"],
+                name="activity_series_occurrence_unique",
+            ),
+        ]
 
     def __str__(self):
-        return self.get_activity_type_display()
+        labels = get_activity_type_labels()
+
+        return labels.get(self.activity_type, self.activity_type)
 
     def get_absolute_url(self):
         return reverse("activity-detail", kwargs={"pk": self.pk})
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+
+        loaded_activity_date = getattr(self, "loaded_activity_date", None)
+
+        # Participations keep a copy of the date, see Participation
+        if loaded_activity_date and self.activity_date != loaded_activity_date:
+            self.participations.update(activity_date=self.activity_date)
+
+        self.loaded_activity_date = self.activity_date
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The week an activity is moved from changes too, see circles/signals.py
+        instance.loaded_activity_date = instance.__dict__.get("activity_date")
+
+        return instance
+
     @property
     def icon(self):
         return self.ActivityTypeIcons[self.activity_type].value
 
+    @property
+    def dom_id(self):
+        """Return an id for HTML elements, also for unsaved occurrences."""
+        if self.pk is None:
+            return f"{self.series_id}-{self.occurrence_date:%Y%m%d}"
+
+        return str(self.pk)
+
+    @property
+    def double_booking_tag(self):
+        """Return the extra tags of messages warning of its double bookings."""
+        return f"double-booking-{self.dom_id}"
+
+    @cached_property
+    def action_urls(self):
+        return ActivityActionURLs(self)
+
     @property
     def remaining_eligible_companions(self):
         """Return a QuerySet of the circle's companions who are not already activity participants."""  # noqa: E501
         # Only care group members are eligible to participate
         companions = self.circle.companions
 
+        # Unsaved occurrences of a series have no participants yet
+        if self.pk is None:
+            return companions
+
         # Get current activity participants
         current_participants = self.participants.all()
 
@@ -91,6 +172,292 @@ class Activity(models.Model):
         return remaining_eligible_companions
 
 
+class Participation(models.Model):
+    """
+    A user's participation in an activity, the through model of
+    Activity.participants.
+
+    It keeps a copy of the activity's date, so the participations of users
+    on a date are a range over the (user, activity_date) index. Activity.save()
+    updates it, and so does activities/signals.py for rows added through the
+    participants of activities or the activities of users. Code that bypasses
+    those, such as bulk_create() or QuerySet.update() of activity dates, must
+    set it explicitly.
+    """
+
+    activity = models.ForeignKey(
+        Activity, related_name="participations", on_delete=models.CASCADE
+    )
+    user = models.ForeignKey(
+        User, related_name="participations", on_delete=models.CASCADE
+    )
+    # Null only until the rows added to a relation are updated
+    activity_date = models.DateField(null=True, editable=False)
+
+    class Meta:
+        # The table of the relation before it had a through model
+        db_table = "activities_activity_participants"
+        unique_together = [["activity", "user"]]
+        indexes = [
+            # Double bookings are participations of users on a date
+            models.Index(
+                fields=["user", "activity_date"], name="participation_user_date_idx"
+            ),
+        ]
+
+
+def get_double_bookings(activity, viewer, user_ids=None):
+    """
+    Return the participations of users in other activities on the date of
+    the activity, with their users, activities and circles.
+
+    Participations are annotated with is_visible, whether the viewer is a
+    companion in the other activity's circle, so other circles' activities
+    are only named to their companions.
+
+    user_ids defaults to the activity's participants. It is one query, a
+    range over the (user, activity_date) index of participations for each
+    user, so it reads only the users' participations on that date, however
+    many activities they have.
+    """
+    if user_ids is None:
+        user_ids = Participation.objects.filter(activity=activity).values("user")
+
+    return list(
+        Participation.objects.filter(
+            user__in=user_ids, activity_date=activity.activity_date
+        )
+        .exclude(activity=activity)
+        .annotate(
+            is_visible=Exists(
+                Companion.objects.filter(
+                    circle=OuterRef("activity__circle"), user=viewer
+                )
+            )
+        )
+        .select_related("user", "activity__circle")
+        .order_by("user__display_name", "activity__circle__name", "activity")
+    )
+
+
+class ActivityActionURLs:
+    """
+    The URLs of an activity's views, by action, for use in templates.
+
+    Unsaved occurrences of a series get URLs that save the occurrence
+    before passing the request on, see ActivityOccurrenceView.
+    """
+
+    url_kwargs = {"update": "pk"}
+
+    def __init__(self, activity):
+        self.activity = activity
+
+    def __getitem__(self, action):
+        if self.activity.pk is None:
+            return reverse(
+                "activity-occurrence",
+                kwargs={
+                    "series_id": self.activity.series_id,
+                    "occurrence_date": self.activity.occurrence_date.isoformat(),
+                    "action": action,
+                },
+            )
+
+        url_kwarg = self.url_kwargs.get(action, "activity_id")
+
+        return reverse(
+            "activity-" + action.replace("_", "-"),
+            kwargs={url_kwarg: self.activity.pk},
+        )
+
+
+def validate_weekdays(value):
+    weekdays = value.split(",")
+
+    if not set(weekdays) <= set(recurrence.WEEKDAYS):
+        raise ValidationError(
+            _("Enter weekdays as two-letter codes separated by commas, like MO,TH.")
+        )
+
+
+class ActivitySeries(models.Model):
+    """
+    A recurring activity.
+
+    Occurrences are not stored, but computed for the dates being viewed.
+    An occurrence is saved as an Activity only once something is added to
+    it, such as participants, a note, comments or the done flag.
+    """
+
+    class FrequencyChoices(models.TextChoices):
+        DAILY = recurrence.DAILY, _("Daily")
+        WEEKLY = recurrence.WEEKLY, _("Weekly")
+        MONTHLY = recurrence.MONTHLY, _("Monthly")
+
+    circle = models.ForeignKey(
+        to=Circle,
+        related_name="activity_series",
+        on_delete=models.CASCADE,
+    )
+    activity_type = models.CharField(
+        max_length=15,
+        choices=Activity.ActivityTypeChoices.choices,
+        default=Activity.ActivityTypeChoices.APPOINTMENT,
+    )
+    note = models.CharField(max_length=50, null=True, blank=True)
+    start_date = models.DateField(default=datetime.date.today)
+    frequency = models.CharField(
+        max_length=7,
+        choices=FrequencyChoices.choices,
+        default=FrequencyChoices.WEEKLY,
+    )
+    interval = models.PositiveSmallIntegerField(
+        default=1, validators=[MinValueValidator(1)]
+    )
+    weekdays = models.CharField(
+        max_length=20,
+        blank=True,
+        validators=[validate_weekdays],
+        help_text=_("For weekly activities, the days of the week, like MO,TH."),
+    )
+    until = models.DateField(null=True, blank=True)
+    count = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(1), MaxValueValidator(1000)],
+        help_text=_("Optionally, the number of occurrences."),
+    )
+    # The date of the last occurrence, from until and count
+    last_date = models.DateField(null=True, blank=True, editable=False)
+    # Occurrences that were deleted, as ISO dates
+    excluded_dates = models.JSONField(default=list, blank=True, editable=False)
+
+    class Meta:
+        verbose_name = _("activity series")
+        verbose_name_plural = _("activity series")
+
+    def __str__(self):
+        labels = get_activity_type_labels()
+
+        return labels.get(self.activity_type, self.activity_type)
+
+    def clean(self):
+        if self.weekdays and self.frequency != self.FrequencyChoices.WEEKLY:
+            raise ValidationError(
+                {"weekdays": _("Weekdays can only be set for weekly activities.")}
+            )
+
+        if self.until and self.count:
+            raise ValidationError(_("Set either an end date or a count, not both."))
+
+        if self.until and self.until < self.start_date:
+            raise ValidationError({"until": _("The end date is before the start.")})
+
+    def save(self, *args, **kwargs):
+        self.last_date = self.until
+
+        if self.count:
+            dates = self.iter_rule_dates(self.start_date, datetime.date.max)
+            self.last_date = next(itertools.islice(dates, self.count - 1, None))
+
+        super().save(*args, **kwargs)
+
+    @property
+    def rrule(self):
+        """Return the recurrence rule, as an RFC 5545 RRULE value."""
+        parts = [f"FREQ={self.frequency}", f"INTERVAL={self.interval}"]
+
+        if self.weekdays:
+            parts.append(f"BYDAY={self.weekdays}")
+
+        if self.count:
+            parts.append(f"COUNT={self.count}")
+        elif self.until:
+            parts.append(f"UNTIL={self.until:%Y%m%d}")
+
+        return ";".join(parts)
+
+    def iter_rule_dates(self, start, end):
+        return recurrence.iter_dates(
+            self.frequency, self.start_date, self.interval, self.weekdays, start, end
+        )
+
+    def get_dates(self, start, end):
+        """Return the dates of occurrences between start and end, inclusive."""
+        if self.last_date:
+            end = min(end, self.last_date)
+
+        excluded_dates = set(self.excluded_dates)
+
+        return [
+            date
+            for date in self.iter_rule_dates(start, end)
+            if date.isoformat() not in excluded_dates
+        ]
+
+    def get_occurrence(self, date):
+        """Return an unsaved Activity for the occurrence on the date."""
+        return Activity(
+            circle_id=self.circle_id,
+            activity_type=self.activity_type,
+            activity_date=date,
+            note=self.note,
+            series=self,
+            occurrence_date=date,
+        )
+
+    def materialize(self, date):
+        """Return the saved Activity for the occurrence on the date."""
+        occurrence = self.get_occurrence(date)
+        activity, _created = Activity.objects.get_or_create(
+            series=self,
+            occurrence_date=date,
+            defaults={
+                "circle_id": occurrence.circle_id,
+                "activity_type": occurrence.activity_type,
+                "activity_date": occurrence.activity_date,
+                "note": occurrence.note,
+            },
+        )
+
+        return activity
+
+    def exclude_date(self, date):
+        """Stop showing the occurrence on the date, when it is deleted."""
+        if date.isoformat() not in self.excluded_dates:
+            self.excluded_dates.append(date.isoformat())
+            self.save(update_fields=["excluded_dates"])
+
+
+@functools.lru_cache(maxsize=None)
+def _get_activity_type_choices(language_code):
+    with translation.override(language_code):
+        return [
+            (value, str(label)) for value, label in Activity.ActivityTypeChoices.choices
+        ]
+
+
+@functools.lru_cache(maxsize=None)
+def _get_activity_type_labels(language_code):
+    return dict(_get_activity_type_choices(language_code))
+
+
+def get_activity_type_choices():
+    """
+    Return the activity type choices with labels in the active language.
+
+    The labels are translated once per language and process, rather than
+    each time a lazy label is rendered. Don't modify the returned list.
+    """
+    return _get_activity_type_choices(translation.get_language())
+
+
+def get_activity_type_labels():
+    """Return a {value: label} dict of activity types in the active language."""
+    return _get_activity_type_labels(translation.get_language())
+
+
 class Comment(models.Model):
     user_id = models.BigIntegerField()
     text = models.CharField(max_length=250)
@@ -0,0 +1,102 @@
+"""
+Expansion of recurrence rules, a subset of RFC 5545 RRULEs.
+
+Supported are FREQ=DAILY, WEEKLY (with BYDAY) and MONTHLY (on the day of
+the month of the first occurrence), with INTERVAL, UNTIL and COUNT. Dates
+in a window are computed directly from the window's start, so expanding a
+window costs the same however long the series has been running.
+"""
+import calendar
+import datetime
+
+DAILY = "DAILY"
+WEEKLY = "WEEKLY"
+MONTHLY = "MONTHLY"
+
+WEEKDAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+
+
+def parse_weekdays(weekdays):
+    """Return the sorted weekday numbers of a comma-separated BYDAY value."""
+    return sorted({WEEKDAYS.index(weekday) for weekday in weekdays.split(",")})
+
+
+def iter_daily(first_date, interval, start, end):
+    day = datetime.timedelta(days=1)
+    # Round up to the first occurrence on or after start
+    skipped = -(-(start - first_date).days // interval)
+    date = first_date + skipped * interval * day
+
+    while date <= end:
+        yield date
+
+        date += interval * day
+
+
+def iter_weekly(first_date, interval, weekdays, start, end):
+    first_week = first_date - datetime.timedelta(days=first_date.weekday())
+    # Round down to the week of an occurrence, on or before start
+    week = (start - first_week).days // 7 // interval * interval
+
+    while True:
+        week_start = first_week + datetime.timedelta(weeks=week)
+
+        if week_start > end:
+            return
+
+        for weekday in weekdays:
+            date = week_start + datetime.timedelta(days=weekday)
+
+            if first_date <= date and start <= date <= end:
+                yield date
+
+        week += interval
+
+
+def iter_monthly(first_date, interval, start, end):
+    first_month = first_date.year * 12 + first_date.month - 1
+    # Round down to the month of an occurrence, on or before start
+    month = (start.year * 12 + start.month - 1 - first_month) // interval * interval
+
+    while True:
+        year, month_index = divmod(first_month + month, 12)
+
+        if year > end.year or (year == end.year and month_index + 1 > end.month):
+            return
+
+        # Months without the day have no occurrence, as in RFC 5545
+        if first_date.day <= calendar.monthrange(year, month_index + 1)[1]:
+            date = datetime.date(year, month_index + 1, first_date.day)
+
+            if start <= date <= end:
+                yield date
+
+        month += interval
+
+
+def iter_dates(frequency, first_date, interval, weekdays, start, end):
+    """
+    Yield the dates of a recurrence between start and end, inclusive.
+
+    The recurrence starts on first_date. For weekly recurrences, weekdays is
+    a BYDAY value such as "MO,TH", or empty for the weekday of first_date.
+    """
+    start = max(start, first_date)
+
+    if start > end:
+        return iter(())
+
+    if frequency == DAILY:
+        return iter_daily(first_date, interval, start, end)
+
+    if frequency == WEEKLY:
+        weekday_numbers = (
+            parse_weekdays(weekdays) if weekdays else [first_date.weekday()]
+        )
+
+        return iter_weekly(first_date, interval, weekday_numbers, start, end)
+
+    if frequency == MONTHLY:
+        return iter_monthly(first_date, interval, start, end)
+
+    raise ValueError(f"Unsupported frequency {frequency}")
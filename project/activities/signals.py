@@ -0,0 +1,25 @@
+"""
+Keep the activity dates of participations current, see Participation.
+"""
+from django.db.models import OuterRef, Subquery
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from .models import Activity, Participation
+
+
+@receiver(m2m_changed, sender=Participation)
+def set_participation_dates(sender, instance, action, reverse, pk_set, **kwargs):
+    if action != "post_add" or not pk_set:
+        return
+
+    if not reverse:
+        Participation.objects.filter(activity=instance, user__in=pk_set).update(
+            activity_date=instance.activity_date
+        )
+    else:
+        Participation.objects.filter(user=instance, activity__in=pk_set).update(
+            activity_date=Subquery(
+                Activity.objects.filter(pk=OuterRef("activity")).values("activity_date")
+            )
+        )
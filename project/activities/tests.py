@@ -1,11 +1,29 @@
+import csv
+import datetime
+import io
+import tempfile
 from http import HTTPStatus
 
 from circles.models import Circle, Companion
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
 from django.urls import reverse
-
-from .models import Activity
+from django.utils import timezone, translation
+
+from .calendars import fold, get_circle_feed_url, get_user_feed_url
+from .forms import ActivityModelForm
+from .imports import import_activities
+from .models import (
+    Activity,
+    ActivitySeries,
+    Participation,
+    get_activity_type_choices,
+    get_activity_type_labels,
+    get_double_bookings,
+)
+from .recurrence import iter_dates
 
 User = get_user_model()
 
@@ -464,6 +482,103 @@ class ActivityRemoveParticipantViewTest(TestCase):
         self.assertEqual(response.status_code, HTTPStatus.FOUND)
 
 
+class ActivityUpdateParticipantsViewTest(TestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user("organizer@user.com", "test12345")
+        self.companion_one = User.objects.create_user("one@user.com", "test12345")
+        self.companion_two = User.objects.create_user("two@user.com", "test12345")
+        self.non_companion = User.objects.create_user("three@user.com", "test12345")
+
+        self.circle = Circle.objects.create(name="Test circle")
+
+        Companion.objects.create(
+            circle=self.circle, user=self.organizer, is_organizer=True
+        )
+        Companion.objects.create(circle=self.circle, user=self.companion_one)
+        Companion.objects.create(circle=self.circle, user=self.companion_two)
+
+        self.activity = Activity.objects.create(circle=self.circle)
+        self.url = reverse(
+            "activity-update-participants", kwargs={"activity_id": self.activity.id}
+        )
+
+    def test_organizer_adds_and_removes_companions(self):
+        """Organizers should add and remove several companions at once"""
+        self.activity.participants.add(self.organizer)
+        self.client.force_login(self.organizer)
+
+        response = self.client.post(
+            self.url,
+            {
+                "add": [self.companion_one.id, self.companion_two.id],
+                "remove": [self.organizer.id],
+            },
+            HTTP_X_REQUESTED_WITH="fetch",
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, f'id="activity-{self.activity.id}"')
+        self.assertQuerysetEqual(
+            self.activity.participants.order_by("email"),
+            [self.companion_one, self.companion_two],
+        )
+
+    def test_redirect(self):
+        """Form submissions without fetch should return to the circle"""
+        self.client.force_login(self.organizer)
+
+        response = self.client.post(self.url, {"add": [self.companion_one.id]})
+
+        self.assertRedirects(response, self.circle.get_absolute_url())
+
+    def test_companion_adds_self(self):
+        """Companions should be able to add themselves"""
+        self.client.force_login(self.companion_one)
+
+        response = self.client.post(self.url, {"add": [self.companion_one.id]})
+
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertIn(self.companion_one, self.activity.participants.all())
+
+    def test_companion_adds_other(self):
+        """Companions should not be able to add others"""
+        self.client.force_login(self.companion_one)
+
+        response = self.client.post(
+            self.url, {"add": [self.companion_one.id, self.companion_two.id]}
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        self.assertFalse(self.activity.participants.exists())
+
+    def test_non_companion_participant(self):
+        """Only companions of the circle should be added"""
+        self.client.force_login(self.organizer)
+
+        response = self.client.post(
+            self.url, {"add": [self.companion_one.id, self.non_companion.id]}
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertFalse(self.activity.participants.exists())
+
+    def test_non_companion_access(self):
+        """Users who are not companions should not be authorized"""
+        self.client.force_login(self.non_companion)
+
+        response = self.client.post(self.url, {"add": [self.non_companion.id]})
+
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    def test_invalid_user_id(self):
+        """User ids should be integers"""
+        self.client.force_login(self.organizer)
+
+        response = self.client.post(self.url, {"add": ["one"]})
+
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+
 class ActivityModelTest(TestCase):
     def setUp(self):
 
@@ -503,6 +618,78 @@ class ActivityModelTest(TestCase):
         assert self.user_three not in remaining_eligible_companions
 
 
+class ActivityTypeChoicesTest(SimpleTestCase):
+    def test_choices_are_built_once_per_language(self):
+        """Choices should be cached per language, with labels as strings"""
+        with translation.override("en"):
+            choices = get_activity_type_choices()
+
+            self.assertIs(get_activity_type_choices(), choices)
+            self.assertIn(("CALL", "Call"), choices)
+            self.assertIs(type(choices[0][1]), str)
+
+        with translation.override("fi"):
+            self.assertIsNot(get_activity_type_choices(), choices)
+
+    def test_labels(self):
+        """Labels should match the model field choices"""
+        self.assertEqual(
+            get_activity_type_labels(), dict(Activity.ActivityTypeChoices.choices)
+        )
+
+    def test_str(self):
+        """Activities should be shown by their type label"""
+        self.assertEqual(str(Activity(activity_type="OUTING")), "Outing")
+        self.assertEqual(str(Activity(activity_type="UNKNOWN")), "UNKNOWN")
+
+    def test_form_choices(self):
+        """The form should offer the precomputed choices"""
+        form = ActivityModelForm(user=User())
+
+        self.assertEqual(
+            form.fields["activity_type"].choices, get_activity_type_choices()
+        )
+
+
+class ActivityModelFormTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("test@user.com", "test12345")
+        self.circle = Circle.objects.create(name="Companion circle")
+        self.other_circle = Circle.objects.create(name="Other circle")
+
+        Companion.objects.create(circle=self.circle, user=self.user)
+
+    def get_form(self, circle):
+        data = {
+            "activity_type": Activity.ActivityTypeChoices.CALL,
+            "activity_date": "2022-10-23",
+            "circle": circle.id,
+        }
+
+        return ActivityModelForm(data, user=self.user)
+
+    def test_circle_choices(self):
+        """Only the user's circles should be offered"""
+        form = ActivityModelForm(user=self.user)
+
+        self.assertQuerysetEqual(form.fields["circle"].queryset, [self.circle])
+
+    def test_circle_validation(self):
+        """
+        Validating the circle should only look it up by primary key, in the
+        form field and in the model's foreign key check
+        """
+        form = self.get_form(self.circle)
+
+        with self.assertNumQueries(2):
+            self.assertTrue(form.is_valid())
+
+    def test_other_circle(self):
+        """Circles the user is not a companion of should not be valid"""
+        form = self.get_form(self.other_circle)
+
+        self.assertFalse(form.is_valid())
+        self.assertIn("circle", form.errors)
 
 
 class ActivityAddCommentViewTest(TestCase):
@@ -697,3 +884,698 @@ class ActivityCommentViewTest(TestCase):
         self.assertEqual(response.status_code, HTTPStatus.OK)
         self.assertContains(response, self.companion_two.display_name)
         self.assertContains(response, comment)
+
+
+class RecurrenceTest(SimpleTestCase):
+    def assertDates(self, dates, expected):
+        self.assertEqual(
+            list(dates), [datetime.date.fromisoformat(date) for date in expected]
+        )
+
+    def test_daily(self):
+        """Daily occurrences should follow the interval from the first date"""
+        dates = iter_dates(
+            "DAILY",
+            datetime.date(2024, 1, 1),
+            3,
+            "",
+            datetime.date(2024, 1, 5),
+            datetime.date(2024, 1, 15),
+        )
+
+        self.assertDates(dates, ["2024-01-07", "2024-01-10", "2024-01-13"])
+
+    def test_weekly(self):
+        """Weekly occurrences should fall on the weekdays of every interval"""
+        dates = iter_dates(
+            "WEEKLY",
+            datetime.date(2024, 1, 3),
+            2,
+            "MO,TH",
+            datetime.date(2024, 1, 1),
+            datetime.date(2024, 2, 1),
+        )
+
+        self.assertDates(
+            dates,
+            ["2024-01-04", "2024-01-15", "2024-01-18", "2024-01-29", "2024-02-01"],
+        )
+
+    def test_monthly(self):
+        """Months without the day of the month should be skipped"""
+        dates = iter_dates(
+            "MONTHLY",
+            datetime.date(2024, 1, 31),
+            1,
+            "",
+            datetime.date(2024, 1, 1),
+            datetime.date(2024, 6, 30),
+        )
+
+        self.assertDates(dates, ["2024-01-31", "2024-03-31", "2024-05-31"])
+
+    def test_window_long_after_start(self):
+        """Windows far from the first date should be expanded directly"""
+        dates = iter_dates(
+            "WEEKLY",
+            datetime.date(1900, 1, 3),
+            1,
+            "",
+            datetime.date(2024, 1, 1),
+            datetime.date(2024, 1, 20),
+        )
+
+        self.assertDates(dates, ["2024-01-03", "2024-01-10", "2024-01-17"])
+
+
+class ActivitySeriesTest(TestCase):
+    def setUp(self):
+        self.circle = Circle.objects.create(name="Test circle")
+
+    def create_series(self, **kwargs):
+        return ActivitySeries.objects.create(
+            circle=self.circle,
+            start_date=datetime.date(2024, 1, 1),
+            **kwargs,
+        )
+
+    def test_count(self):
+        """The count should end the series"""
+        series = self.create_series(frequency="DAILY", interval=2, count=3)
+
+        self.assertEqual(series.last_date, datetime.date(2024, 1, 5))
+        self.assertEqual(
+            series.get_dates(datetime.date(2024, 1, 1), datetime.date(2024, 2, 1)),
+            [datetime.date(2024, 1, 1), datetime.date(2024, 1, 3), series.last_date],
+        )
+
+    def test_rrule(self):
+        """The rule should be available as an RRULE"""
+        series = self.create_series(weekdays="MO,TH", until=datetime.date(2024, 3, 1))
+
+        self.assertEqual(
+            series.rrule, "FREQ=WEEKLY;INTERVAL=1;BYDAY=MO,TH;UNTIL=20240301"
+        )
+
+    def test_excluded_date(self):
+        """Excluded dates should have no occurrence"""
+        series = self.create_series(frequency="DAILY")
+        series.exclude_date(datetime.date(2024, 1, 2))
+
+        self.assertEqual(
+            series.get_dates(datetime.date(2024, 1, 1), datetime.date(2024, 1, 3)),
+            [datetime.date(2024, 1, 1), datetime.date(2024, 1, 3)],
+        )
+
+    def test_clean(self):
+        """Weekdays are for weekly series, and until and count are exclusive"""
+        for kwargs in [
+            {"frequency": "DAILY", "weekdays": "MO"},
+            {"until": datetime.date(2024, 2, 1), "count": 2},
+            {"until": datetime.date(2023, 1, 1)},
+            {"weekdays": "MO,XX"},
+        ]:
+            with self.subTest(**kwargs):
+                series = ActivitySeries(
+                    circle=self.circle, start_date=datetime.date(2024, 1, 1), **kwargs
+                )
+
+                with self.assertRaises(ValidationError):
+                    series.full_clean()
+
+    def test_materialize(self):
+        """Saving an occurrence should happen once"""
+        series = self.create_series(note="Weekly call")
+        date = datetime.date(2024, 1, 8)
+
+        activity = series.materialize(date)
+
+        self.assertEqual(activity.note, "Weekly call")
+        self.assertEqual(activity.circle, self.circle)
+        self.assertEqual(series.materialize(date), activity)
+
+
+class ActivityOccurrenceViewTest(TestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user("organizer@user.com", "test12345")
+        self.circle = Circle.objects.create(name="Test circle")
+        Companion.objects.create(
+            circle=self.circle, user=self.organizer, is_organizer=True
+        )
+
+        self.date = timezone.localdate()
+        self.series = ActivitySeries.objects.create(
+            circle=self.circle, start_date=self.date
+        )
+
+        self.client.force_login(self.organizer)
+
+    def get_url(self, action, date=None):
+        return reverse(
+            "activity-occurrence",
+            kwargs={
+                "series_id": self.series.id,
+                "occurrence_date": (date or self.date).isoformat(),
+                "action": action,
+            },
+        )
+
+    def test_add_participant(self):
+        """Adding a participant should save the occurrence first"""
+        response = self.client.post(
+            self.get_url("add_participant"), {"user_id": self.organizer.id}
+        )
+        activity = Activity.objects.get(series=self.series)
+
+        self.assertRedirects(
+            response,
+            reverse("activity-add-participant", args=[activity.id]),
+            status_code=HTTPStatus.TEMPORARY_REDIRECT,
+            fetch_redirect_response=False,
+        )
+
+        response = self.client.post(
+            response["Location"], {"user_id": self.organizer.id}
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertEqual(activity.occurrence_date, self.date)
+        self.assertQuerysetEqual(activity.participants.all(), [self.organizer])
+
+    def test_delete(self):
+        """Deleting an occurrence should exclude it from the series"""
+        response = self.client.post(self.get_url("delete"), follow=True)
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertFalse(Activity.objects.exists())
+
+        self.series.refresh_from_db()
+        self.assertEqual(self.series.get_dates(self.date, self.date), [])
+
+    def test_no_occurrence(self):
+        """Dates without an occurrence and unknown actions should not be found"""
+        for url in [
+            self.get_url("add_participant", self.date - datetime.timedelta(days=1)),
+            self.get_url("unknown"),
+            self.get_url("add_participant").replace(self.date.isoformat(), "today"),
+        ]:
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.client.post(url).status_code, HTTPStatus.NOT_FOUND
+                )
+
+        self.assertFalse(Activity.objects.exists())
+
+    def test_non_companion(self):
+        """Non-companions should not be able to save occurrences"""
+        self.client.force_login(User.objects.create_user("other@user.com", "pw"))
+
+        response = self.client.post(self.get_url("add_comment"))
+
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        self.assertFalse(Activity.objects.exists())
+
+    def test_forbidden_action(self):
+        """Companions should not save occurrences by taking organizers' actions"""
+        companion = User.objects.create_user("companion@user.com", "test12345")
+        Companion.objects.create(circle=self.circle, user=companion)
+        self.client.force_login(companion)
+
+        for action, data in [
+            ("delete", {}),
+            ("add_participant", {"user_id": self.organizer.id}),
+            ("update_participants", {"remove": [self.organizer.id]}),
+            ("set_done", {}),
+        ]:
+            with self.subTest(action=action):
+                response = self.client.post(self.get_url(action), data)
+
+                self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+        self.assertFalse(Activity.objects.exists())
+
+        response = self.client.post(
+            self.get_url("add_participant"), {"user_id": companion.id}
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.TEMPORARY_REDIRECT)
+        self.assertTrue(Activity.objects.exists())
+
+
+class ActivitySeriesCreateViewTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("test@user.com", "test12345")
+        self.circle = Circle.objects.create(name="Test circle")
+        Companion.objects.create(circle=self.circle, user=self.user)
+
+    def post(self):
+        return self.client.post(
+            reverse("activity-series-create"),
+            {
+                "circle": self.circle.id,
+                "activity_type": Activity.ActivityTypeChoices.CALL,
+                "start_date": "2024-01-01",
+                "frequency": "WEEKLY",
+                "interval": 1,
+                "weekdays": ["MO", "TH"],
+            },
+        )
+
+    def test_companion(self):
+        """Companions should be able to add recurring activities"""
+        self.client.force_login(self.user)
+
+        response = self.post()
+
+        self.assertRedirects(response, self.circle.get_absolute_url())
+        self.assertEqual(ActivitySeries.objects.get().weekdays, "MO,TH")
+
+    def test_non_companion(self):
+        """Non-companions should not be able to add recurring activities"""
+        self.client.force_login(User.objects.create_user("other@user.com", "pw"))
+
+        self.assertEqual(self.post().status_code, HTTPStatus.FORBIDDEN)
+
+
+class ActivityImportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("test@user.com", "test12345")
+        self.other_user = User.objects.create_user("other@user.com", "test12345")
+        self.circle = Circle.objects.create(name="Test circle")
+        Companion.objects.create(circle=self.circle, user=self.user)
+        Companion.objects.create(circle=self.circle, user=self.other_user)
+
+    def import_csv(self, text, **kwargs):
+        return import_activities(self.circle, io.StringIO(text), **kwargs)
+
+    def test_import(self):
+        """Rows should become activities with their participants"""
+        result = self.import_csv(
+            "activity_type,activity_date,note,participants\n"
+            "shopping,2022-11-01,Groceries,Test@User.com;other@user.com\n"
+            "CALL,2022-11-02,,\n"
+        )
+
+        self.assertEqual(result.created_count, 2)
+        self.assertEqual(result.errors, [])
+
+        shopping, call = self.circle.activities.order_by("activity_date")
+
+        self.assertEqual(shopping.activity_type, Activity.ActivityTypeChoices.SHOPPING)
+        self.assertEqual(shopping.note, "Groceries")
+        self.assertEqual(set(shopping.participants.all()), {self.user, self.other_user})
+        self.assertIsNone(call.note)
+        self.assertFalse(call.participants.exists())
+
+    def test_invalid_rows_are_reported(self):
+        """Invalid rows should be skipped and reported by line"""
+        result = self.import_csv(
+            "activity_type,activity_date,note,participants\n"
+            "SKIING,2022-11-01,,\n"
+            "CALL,1.11.2022,,\n"
+            f"CALL,2022-11-01,{'x' * 51},\n"
+            "CALL,2022-11-01,,stranger@user.com\n"
+            "CALL,2022-11-03,,\n"
+        )
+
+        self.assertEqual(result.created_count, 1)
+        self.assertEqual([error.line_number for error in result.errors], [2, 3, 4, 5])
+        self.assertIn("stranger@user.com", result.errors[3].message)
+        self.assertEqual(self.circle.activities.count(), 1)
+
+    def test_unreadable_rows_are_reported(self):
+        """Rows the CSV reader fails on should be skipped and reported by line"""
+        result = self.import_csv(
+            "activity_type,activity_date,note\n"
+            f"CALL,2022-11-01,{'x' * (csv.field_size_limit() + 1)}\n"
+            "CALL,2022-11-02,\n"
+        )
+
+        self.assertEqual(result.created_count, 1)
+        self.assertEqual([error.line_number for error in result.errors], [2])
+        self.assertIn("field limit", result.errors[0].message)
+
+        result = self.import_csv(f"{'x' * (csv.field_size_limit() + 1)}\n")
+
+        self.assertEqual(result.created_count, 0)
+        self.assertEqual([error.line_number for error in result.errors], [1])
+
+    def test_missing_columns(self):
+        """Files without the required columns should import nothing"""
+        result = self.import_csv("type,date\nCALL,2022-11-01\n")
+
+        self.assertEqual(result.created_count, 0)
+        self.assertEqual(result.errors[0].line_number, 1)
+
+    def test_queries_per_batch(self):
+        """A batch should resolve emails and insert in a constant number of queries"""
+        rows = "".join(
+            f"CALL,2022-11-{day:02},,test@user.com;other@user.com\n"
+            for day in range(1, 21)
+        )
+
+        # Savepoint, its release and touch, then per batch emails,
+        # activities, participants and weeks for analytics
+        with self.assertNumQueries(3 + 2 * 4):
+            result = self.import_csv(
+                "activity_type,activity_date,note,participants\n" + rows,
+                batch_size=10,
+            )
+
+        self.assertEqual(result.created_count, 20)
+        self.assertEqual(Participation.objects.count(), 40)
+
+        for date, activity_date in Participation.objects.values_list(
+            "activity_date", "activity__activity_date"
+        ):
+            self.assertEqual(date, activity_date)
+
+    def test_circle_version_changes(self):
+        """Importing should change the circle version despite bypassing signals"""
+        version = self.circle.version
+
+        self.import_csv("activity_type,activity_date\nCALL,2022-11-01\n")
+        self.circle.refresh_from_db()
+
+        self.assertNotEqual(self.circle.version, version)
+
+    def test_command(self):
+        """The command should import a file and report skipped rows"""
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as file:
+            file.write("activity_type,activity_date\nCALL,2022-11-01\nCALL,\n")
+            file.flush()
+
+            call_command(
+                "import_activities",
+                str(self.circle.pk),
+                file.name,
+                stdout=stdout,
+                stderr=stderr,
+            )
+
+        self.assertIn("Imported 1 activities", stdout.getvalue())
+        self.assertIn("Line 3", stderr.getvalue())
+
+    def test_command_unknown_circle(self):
+        """The command should fail for circles that don't exist"""
+        with self.assertRaises(CommandError):
+            call_command("import_activities", "not-a-circle", "activities.csv")
+
+
+class CalendarFeedTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("test@user.com", "test12345")
+        self.circle = Circle.objects.create(name="Test, circle")
+        Companion.objects.create(circle=self.circle, user=self.user)
+        self.today = timezone.localdate()
+
+        self.activity = Activity.objects.create(
+            circle=self.circle,
+            activity_type=Activity.ActivityTypeChoices.SHOPPING,
+            activity_date=self.today,
+            note="Milk; bread",
+        )
+        self.activity.participants.add(self.user)
+        self.old_activity = Activity.objects.create(
+            circle=self.circle, activity_date=self.today - datetime.timedelta(days=365)
+        )
+        self.series = ActivitySeries.objects.create(
+            circle=self.circle,
+            activity_type=Activity.ActivityTypeChoices.CALL,
+            start_date=self.today,
+            frequency=ActivitySeries.FrequencyChoices.WEEKLY,
+        )
+
+        self.url = get_circle_feed_url(self.circle, self.user)
+
+    def get_content(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_fold(self):
+        """Long lines should be folded at 75 octets without splitting characters"""
+        line = "DESCRIPTION:" + "ä" * 100
+        folded = fold(line)
+
+        self.assertTrue(folded.endswith("\r\n"))
+        self.assertTrue(
+            all(len(part.encode()) <= 75 for part in folded[:-2].split("\r\n"))
+        )
+        self.assertEqual(folded[:-2].replace("\r\n ", ""), line)
+
+    def test_signature_is_checked(self):
+        """Feeds should not be found without a valid signature"""
+        url = reverse(
+            "circle-calendar",
+            kwargs={
+                "circle_id": self.circle.pk,
+                "user_id": self.user.pk,
+                "signature": "forged",
+            },
+        )
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_former_companion(self):
+        """Feeds should stop working when the user leaves the circle"""
+        Companion.objects.filter(user=self.user).delete()
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_circle_feed(self):
+        """The feed should list recent activities and recurring series"""
+        response = self.client.get(self.url)
+        content = self.get_content(response)
+
+        self.assertEqual(response["Content-Type"], "text/calendar; charset=utf-8")
+        self.assertTrue(content.startswith("BEGIN:VCALENDAR\r\n"))
+        self.assertIn("X-WR-CALNAME:Test\\, circle\r\n", content)
+        self.assertIn(f"UID:activity-{self.activity.pk}@testserver\r\n", content)
+        self.assertIn("DESCRIPTION:Milk\\; bread\r\n", content)
+        self.assertNotIn(f"UID:activity-{self.old_activity.pk}@", content)
+        self.assertIn(f"UID:series-{self.series.pk}@testserver\r\n", content)
+        self.assertIn("RRULE:FREQ=WEEKLY;INTERVAL=1\r\n", content)
+
+    def test_done_and_deleted_occurrences(self):
+        """Saved occurrences should override the series, deleted ones be excluded"""
+        next_week = self.today + datetime.timedelta(weeks=1)
+        occurrence = self.series.materialize(self.today)
+        occurrence.done = True
+        occurrence.save()
+        self.series.materialize(next_week).delete()
+        self.series.exclude_date(next_week)
+
+        content = self.get_content(self.client.get(self.url))
+
+        self.assertIn("SUMMARY:✓ Call\r\n", content)
+        self.assertIn(f"RECURRENCE-ID;VALUE=DATE:{self.today:%Y%m%d}\r\n", content)
+        self.assertIn(f"EXDATE;VALUE=DATE:{next_week:%Y%m%d}\r\n", content)
+
+    def test_old_occurrences(self):
+        """Saved occurrences before the feed's range should still override"""
+        start_date = self.today - datetime.timedelta(weeks=52)
+        ActivitySeries.objects.filter(pk=self.series.pk).update(start_date=start_date)
+        self.series.refresh_from_db()
+        occurrence = self.series.materialize(start_date)
+        occurrence.done = True
+        occurrence.activity_date = start_date + datetime.timedelta(days=1)
+        occurrence.save()
+
+        content = self.get_content(self.client.get(self.url))
+
+        self.assertIn("SUMMARY:✓ Call\r\n", content)
+        self.assertIn(f"RECURRENCE-ID;VALUE=DATE:{start_date:%Y%m%d}\r\n", content)
+
+    def test_not_modified(self):
+        """Requests with the current ETag should get a 304 in a single query"""
+        response = self.client.get(self.url)
+        self.get_content(response)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertIn("ETag", response)
+
+    def test_cache(self):
+        """Feeds should be cached until the circle changes"""
+        first_response = self.client.get(self.url)
+        content = self.get_content(first_response)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+            self.assertEqual(self.get_content(response), content)
+
+        self.activity.done = True
+        self.activity.save()
+
+        response = self.client.get(self.url)
+
+        self.assertNotEqual(response["ETag"], first_response["ETag"])
+        self.assertIn("SUMMARY:✓ Shopping\r\n", self.get_content(response))
+
+    def test_user_feed(self):
+        """The user's feed should list the activities they participate in"""
+        response = self.client.get(get_user_feed_url(self.user))
+        content = self.get_content(response)
+
+        self.assertIn(f"UID:activity-{self.activity.pk}@testserver\r\n", content)
+        self.assertEqual(content.count("BEGIN:VEVENT"), 1)
+
+    def test_user_feed_changes_with_participation(self):
+        """The user's feed should change when their participations change"""
+        url = get_user_feed_url(self.user)
+        etag = self.client.get(url)["ETag"]
+
+        self.activity.participants.remove(self.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotIn("BEGIN:VEVENT", self.get_content(response))
+
+
+class ActivityDoubleBookingTest(TestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user("organizer@user.com", "test12345")
+        self.companion = User.objects.create_user("test@user.com", "test12345")
+        User.objects.filter(pk=self.companion.pk).update(display_name="Companion")
+        self.circle = Circle.objects.create(name="Test circle")
+        self.other_circle = Circle.objects.create(name="Other circle")
+
+        Companion.objects.create(
+            circle=self.circle, user=self.organizer, is_organizer=True
+        )
+
+        for circle in [self.circle, self.other_circle]:
+            Companion.objects.create(circle=circle, user=self.companion)
+
+        # Activities in other circles are only named to their companions
+        self.other_companion = Companion.objects.create(
+            circle=self.other_circle, user=self.organizer
+        )
+
+        self.date = timezone.localdate() + datetime.timedelta(days=1)
+        self.activity = Activity.objects.create(
+            circle=self.circle, activity_date=self.date
+        )
+        Activity.objects.create(
+            activity_type=Activity.ActivityTypeChoices.CALL,
+            circle=self.other_circle,
+            activity_date=self.date,
+        ).participants.add(self.companion)
+        Activity.objects.create(
+            circle=self.other_circle,
+            activity_date=self.date + datetime.timedelta(days=1),
+        ).participants.add(self.organizer)
+
+        self.warning = "Companion also takes part in Call in Other circle that day."
+        self.client.force_login(self.organizer)
+
+    def test_add_participant(self):
+        """Adding a participant booked elsewhere that day should warn on the card"""
+        response = self.client.post(
+            reverse(
+                "activity-add-participant", kwargs={"activity_id": self.activity.pk}
+            ),
+            {"user_id": self.companion.pk},
+            follow=True,
+        )
+
+        # On the card and in the toast
+        self.assertContains(response, self.warning, count=2)
+
+    def test_add_participant_booked_in_other_circle(self):
+        """Activities in circles the user isn't in should not be named"""
+        self.other_companion.delete()
+
+        response = self.client.post(
+            reverse(
+                "activity-add-participant", kwargs={"activity_id": self.activity.pk}
+            ),
+            {"user_id": self.companion.pk},
+            follow=True,
+        )
+
+        self.assertContains(
+            response, "Companion has another activity that day.", count=2
+        )
+        self.assertNotContains(response, "Other circle")
+
+    def test_add_participant_without_double_booking(self):
+        """Participants booked on other dates only should not be warned of"""
+        response = self.client.post(
+            reverse(
+                "activity-add-participant", kwargs={"activity_id": self.activity.pk}
+            ),
+            {"user_id": self.organizer.pk},
+            follow=True,
+        )
+
+        self.assertNotContains(response, "also takes part in")
+
+    def test_update_participants(self):
+        """The card returned after adding participants should show the warning"""
+        response = self.client.post(
+            reverse(
+                "activity-update-participants",
+                kwargs={"activity_id": self.activity.pk},
+            ),
+            {"add": [self.companion.pk]},
+            HTTP_X_REQUESTED_WITH="fetch",
+        )
+
+        self.assertContains(response, self.warning, count=1)
+
+    def test_update_date(self):
+        """Moving an activity to a date its participants are booked should warn"""
+        self.activity.activity_date = self.date - datetime.timedelta(days=1)
+        self.activity.save()
+        self.activity.participants.add(self.companion)
+
+        response = self.client.post(
+            reverse("activity-update", kwargs={"pk": self.activity.pk}),
+            {
+                "activity_type": self.activity.activity_type,
+                "activity_date": self.date.isoformat(),
+                "circle": self.circle.pk,
+            },
+            follow=True,
+        )
+
+        self.assertContains(response, self.warning, count=2)
+
+    def test_participation_dates(self):
+        """Participations should keep the dates of their activities"""
+        self.activity.participants.add(self.organizer)
+        self.companion.activities.add(self.activity)
+
+        self.activity = Activity.objects.get(pk=self.activity.pk)
+        self.activity.activity_date = self.date + datetime.timedelta(days=7)
+        self.activity.save()
+
+        self.assertEqual(
+            set(
+                Participation.objects.filter(activity=self.activity).values_list(
+                    "activity_date", flat=True
+                )
+            ),
+            {self.activity.activity_date},
+        )
+        self.assertFalse(Participation.objects.filter(activity_date=None).exists())
+
+    def test_queries(self):
+        """Double bookings of all participants should take one query"""
+        self.activity.participants.add(self.companion, self.organizer)
+
+        with self.assertNumQueries(1):
+            participations = get_double_bookings(self.activity, self.organizer)
+
+        self.assertEqual(
+            [participation.user for participation in participations], [self.companion]
+        )
@@ -1,14 +1,19 @@
 from django.urls import path
 
 from .views import (
+    ActivityAddCommentView,
     ActivityAddParticipantView,
     ActivityCreateView,
     ActivityDeleteView,
+    ActivityOccurrenceView,
     ActivityRemoveParticipantView,
+    ActivitySeriesCreateView,
     ActivitySetDoneView,
+    ActivityUpdateParticipantsView,
     ActivityUpdateView,
-    ActivityAddCommentView,
     ActivityViewCommentView,
+    CircleCalendarView,
+    UserCalendarView,
 )
 
 urlpatterns = [
@@ -17,6 +22,16 @@ urlpatterns = [
         ActivityCreateView.as_view(),
         name="activity-create",
     ),
+    path(
+        "series/create",
+        ActivitySeriesCreateView.as_view(),
+        name="activity-series-create",
+    ),
+    path(
+        "series/<int:series_id>/<str:occurrence_date>/<slug:action>",
+        ActivityOccurrenceView.as_view(),
+        name="activity-occurrence",
+    ),
     path(
         "delete/<slug:activity_id>/",
         ActivityDeleteView.as_view(),
@@ -37,6 +52,11 @@ urlpatterns = [
         ActivityRemoveParticipantView.as_view(),
         name="activity-remove-participant",
     ),
+    path(
+        "update/<slug:activity_id>/participants",
+        ActivityUpdateParticipantsView.as_view(),
+        name="activity-update-participants",
+    ),
     path(
         "update/<slug:activity_id>/set_done",
         ActivitySetDoneView.as_view(),
@@ -52,4 +72,14 @@ urlpatterns = [
         ActivityViewCommentView.as_view(),
         name="activity-view-comments",
     ),
+    path(
+        "calendar/circle/<uuid:circle_id>/<int:user_id>/<slug:signature>.ics",
+        CircleCalendarView.as_view(),
+        name="circle-calendar",
+    ),
+    path(
+        "calendar/user/<int:user_id>/<slug:signature>.ics",
+        UserCalendarView.as_view(),
+        name="user-calendar",
+    ),
 ]
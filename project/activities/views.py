@@ -1,12 +1,43 @@
-from circles.models import Circle
+import datetime
+
+from circles.models import Circle, Companion
+from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.http import HttpResponseRedirect
-from django.shortcuts import redirect, render
+from django.core.exceptions import BadRequest, PermissionDenied
+from django.http import Http404, HttpResponseRedirect
+from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
+from django.utils.translation import gettext as _
 from django.views.generic import View
 
-from .forms import ActivityModelForm
-from .models import Activity, Comment, User
+from .calendars import CircleFeed, UserFeed, check_signature, get_feed_response
+from .forms import ActivityModelForm, ActivitySeriesModelForm
+from .models import Activity, ActivitySeries, Comment, User, get_double_bookings
+
+
+def warn_of_double_bookings(request, activity, user_ids=None):
+    """
+    Add a warning for each participation of the users, by default the
+    activity's participants, in another activity on the same date. The
+    warnings are shown on the activity's card, see circle_activity.html.
+
+    The other activity and its circle are only named to its companions.
+    """
+    for participation in get_double_bookings(activity, request.user, user_ids):
+        if participation.is_visible:
+            message = _(
+                "%(name)s also takes part in %(activity)s in %(circle)s that day."
+            ) % {
+                "name": participation.user.display_name,
+                "activity": participation.activity,
+                "circle": participation.activity.circle,
+            }
+        else:
+            message = _("%(name)s has another activity that day.") % {
+                "name": participation.user.display_name
+            }
+
+        messages.warning(request, message, extra_tags=activity.double_booking_tag)
 
 
 class ActivityCreateView(UserPassesTestMixin, LoginRequiredMixin, View):
@@ -31,7 +62,7 @@ class ActivityCreateView(UserPassesTestMixin, LoginRequiredMixin, View):
             return False
 
     def post(self, *args, **kwargs):
-        form = ActivityModelForm(self.request.POST)
+        form = ActivityModelForm(self.request.POST, user=self.request.user)
 
         if form.is_valid():
             activity = form.save()
@@ -71,11 +102,15 @@ class ActivityUpdateView(UserPassesTestMixin, LoginRequiredMixin, View):
         form = ActivityModelForm(
             self.request.POST,
             instance=activity,
+            user=self.request.user,
         )
 
         if form.is_valid():
             activity = form.save()
 
+            if "activity_date" in form.changed_data:
+                warn_of_double_bookings(self.request, activity)
+
             redirect_to = reverse(
                 "circle-detail",
                 kwargs={
@@ -86,6 +121,117 @@ class ActivityUpdateView(UserPassesTestMixin, LoginRequiredMixin, View):
             return HttpResponseRedirect(redirect_to)
 
 
+class ActivitySeriesCreateView(UserPassesTestMixin, LoginRequiredMixin, View):
+    raise_exception = True
+
+    def test_func(self, *args, **kwargs):
+        """
+        Only circle's care organizers and companions can add a recurring activity.
+        """
+        circle_id = self.request.POST.get("circle", None)
+
+        if not circle_id:
+            return False
+
+        return Companion.objects.filter(
+            circle=circle_id, user=self.request.user.pk
+        ).exists()
+
+    def post(self, *args, **kwargs):
+        form = ActivitySeriesModelForm(self.request.POST, user=self.request.user)
+
+        if not form.is_valid():
+            raise BadRequest(form.errors.as_text())
+
+        series = form.save()
+
+        return redirect(series.circle.get_absolute_url())
+
+
+class ActivityOccurrenceView(UserPassesTestMixin, LoginRequiredMixin, View):
+    """
+    Save an occurrence of a recurring activity, then pass the request on to
+    the view of the action taken on it.
+
+    Actions on saved activities are POST requests, apart from setting an
+    activity as done. Redirects with 307 repeat the request with the same
+    method and body. The action's view checks its own permissions, and its
+    rules are checked here too, so forbidden actions save nothing.
+    """
+
+    raise_exception = True
+
+    # Actions and the status codes of their redirects
+    actions = {
+        "update": 307,
+        "delete": 307,
+        "add_participant": 307,
+        "remove_participant": 307,
+        "update_participants": 307,
+        "add_comment": 307,
+        "set_done": 303,
+    }
+
+    def test_func(self, *args, **kwargs):
+        """Only the circle's companions can act on occurrences."""
+        self.series = get_object_or_404(ActivitySeries, id=self.kwargs["series_id"])
+
+        self.user_is_organizer = (
+            Companion.objects.filter(
+                circle=self.series.circle_id, user=self.request.user.pk
+            )
+            .values_list("is_organizer", flat=True)
+            .first()
+        )
+
+        return self.user_is_organizer is not None
+
+    def can_take_action(self, action, date):
+        """Return whether the user may take the action, by its view's rules."""
+        if self.user_is_organizer:
+            return True
+
+        user_id = self.request.user.id
+
+        if action in ["add_participant", "remove_participant"]:
+            return self.request.POST.get("user_id", None) == str(user_id)
+
+        if action == "update_participants":
+            user_ids = get_user_ids(self.request, "add") | get_user_ids(
+                self.request, "remove"
+            )
+
+            return user_ids <= {user_id}
+
+        if action in ["add_comment", "set_done"]:
+            # Only participants, and only saved occurrences have them
+            return Activity.objects.filter(
+                series=self.series, occurrence_date=date, participants=user_id
+            ).exists()
+
+        # Deleting is for organizers only
+        return action == "update"
+
+    def post(self, request, series_id, occurrence_date, action, *args, **kwargs):
+        try:
+            date = datetime.date.fromisoformat(occurrence_date)
+        except ValueError:
+            raise Http404("Invalid date")
+
+        if action not in self.actions or not self.series.get_dates(date, date):
+            raise Http404("No such occurrence or action")
+
+        if not self.can_take_action(action, date):
+            raise PermissionDenied
+
+        activity = self.series.materialize(date)
+
+        response = HttpResponseRedirect(activity.action_urls[action])
+        response.status_code = self.actions[action]
+
+        return response
+
+
 class ActivityDeleteView(UserPassesTestMixin, LoginRequiredMixin, View):
     raise_exception = True
 
@@ -103,6 +249,10 @@ class ActivityDeleteView(UserPassesTestMixin, LoginRequiredMixin, View):
         circle_id = self.activity.circle.id
         self.activity.delete()
 
+        # Otherwise the occurrence would be shown again, unsaved
+        if self.activity.series:
+            self.activity.series.exclude_date(self.activity.occurrence_date)
+
         return redirect(
             reverse(
                 "circle-detail",
@@ -142,6 +292,7 @@ class ActivityAddParticipantView(UserPassesTestMixin, LoginRequiredMixin, View):
         activity = Activity.objects.get(id=activity_id)
 
         activity.participants.add(user_id)
+        warn_of_double_bookings(request, activity, [user_id])
 
         return redirect(
             reverse(
@@ -194,6 +345,82 @@ class ActivityRemoveParticipantView(UserPassesTestMixin, LoginRequiredMixin, Vie
         )
 
 
+def get_user_ids(request, key):
+    """Return the set of user ids posted under the key."""
+    try:
+        return {int(user_id) for user_id in request.POST.getlist(key)}
+    except ValueError:
+        raise BadRequest(f"Invalid user id in {key}")
+
+
+class ActivityUpdateParticipantsView(UserPassesTestMixin, LoginRequiredMixin, View):
+    """
+    Add and remove several participants at once.
+
+    Takes user ids in "add" and "remove". Fetch requests, sent with an
+    "X-Requested-With: fetch" header, get the updated activity card back,
+    others are redirected to the circle.
+    """
+
+    raise_exception = True
+
+    def test_func(self, *args, **kwargs):
+        """
+        Only the circle's care organizers can add or remove other companions.
+        The circle's companions can only add or remove themselves.
+        """
+        self.activity = get_object_or_404(
+            Activity.objects.select_related("circle"), id=self.kwargs["activity_id"]
+        )
+        self.add_ids = get_user_ids(self.request, "add")
+        self.remove_ids = get_user_ids(self.request, "remove")
+
+        user_id = self.request.user.id
+
+        # Whether the requesting and added users are companions, and
+        # organizers, in one query
+        self.companions = dict(
+            Companion.objects.filter(
+                circle=self.activity.circle_id,
+                user__in=self.add_ids | {user_id},
+            ).values_list("user_id", "is_organizer")
+        )
+
+        if user_id not in self.companions:
+            return False
+
+        user_is_organizer = self.companions[user_id]
+        user_is_updating_self = self.add_ids | self.remove_ids <= {user_id}
+
+        return user_is_organizer or user_is_updating_self
+
+    def post(self, request, activity_id, *args, **kwargs):
+        if not self.add_ids <= self.companions.keys():
+            raise BadRequest("Only companions of the circle can participate")
+
+        # Removing users who are not participants does nothing, so
+        # companions who have since left the circle can be removed too
+        if self.add_ids:
+            self.activity.participants.add(*self.add_ids)
+            warn_of_double_bookings(request, self.activity, self.add_ids)
+
+        if self.remove_ids:
+            self.activity.participants.remove(*self.remove_ids)
+
+        if request.headers.get("X-Requested-With") != "fetch":
+            return redirect(self.activity.circle.get_absolute_url())
+
+        form = ActivityModelForm(user=request.user)
+        context = {
+            "activity": self.activity,
+            "circle": self.activity.circle,
+            "form": form,
+            "add_activity_form": form,
+        }
+
+        return render(request, "circles/circle_activity.html", context)
+
+
 class ActivitySetDoneView(UserPassesTestMixin, LoginRequiredMixin, View):
     raise_exception = True
 
@@ -278,4 +505,42 @@ class ActivityViewCommentView(UserPassesTestMixin, LoginRequiredMixin, View):
             "activity_comments_list": newList,
         }
         template_name="activities/comments_detail.html"
-        return render(request, template_name, context)
\ No newline at end of file
+        return render(request, template_name, context)
+
+
+class CircleCalendarView(View):
+    """
+    A circle's iCalendar feed, see activities/calendars.py.
+
+    Calendar apps don't log in, so the signed URL identifies the companion.
+    """
+
+    def get(self, request, circle_id, user_id, signature):
+        if not check_signature(signature, "circle", circle_id, user_id):
+            raise Http404
+
+        companion = (
+            Companion.objects.filter(circle=circle_id, user=user_id)
+            .select_related("circle")
+            .first()
+        )
+
+        # Feeds stop working for users who leave the circle
+        if companion is None:
+            raise Http404
+
+        return get_feed_response(
+            request, CircleFeed(companion.circle, request.get_host())
+        )
+
+
+class UserCalendarView(View):
+    """An iCalendar feed of the activities a user participates in."""
+
+    def get(self, request, user_id, signature):
+        if not check_signature(signature, "user", user_id):
+            raise Http404
+
+        user = get_object_or_404(User, pk=user_id, is_active=True)
+
+        return get_feed_response(request, UserFeed(user, request.get_host()))
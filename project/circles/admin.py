@@ -1,4 +1,13 @@
-from django.contrib import admin
+import io
+
+from activities.forms import ActivityImportForm
+from activities.imports import import_activities
+from django.contrib import admin, messages
+from django.shortcuts import get_object_or_404, redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils.translation import gettext_lazy as _
+from django.utils.translation import ngettext
 
 from .models import Circle, Companion, JoinRequest
 
@@ -14,6 +23,74 @@ class CircleModelAdmin(admin.ModelAdmin):
     inlines = [
         CompanionInline,
     ]
+    actions = [
+        "import_activities_action",
+    ]
+
+    def get_urls(self):
+        return [
+            path(
+                "<uuid:object_id>/import-activities/",
+                self.admin_site.admin_view(self.import_activities_view),
+                name="circles_circle_import_activities",
+            ),
+        ] + super().get_urls()
+
+    @admin.action(description=_("Import activities from CSV"))
+    def import_activities_action(self, request, queryset):
+        if len(queryset) != 1:
+            self.message_user(
+                request,
+                _("Select one circle to import activities to."),
+                messages.WARNING,
+            )
+            return None
+
+        return redirect("admin:circles_circle_import_activities", queryset[0].pk)
+
+    def import_activities_view(self, request, object_id):
+        circle = get_object_or_404(Circle, pk=object_id)
+
+        if not self.has_change_permission(request, circle):
+            return redirect("admin:index")
+
+        form = ActivityImportForm(request.POST or None, request.FILES or None)
+        result = None
+
+        if form.is_valid():
+            # Decoded as it is read, the upload is never loaded whole
+            lines = io.TextIOWrapper(
+                form.cleaned_data["csv_file"], encoding="utf-8-sig", newline=""
+            )
+
+            try:
+                result = import_activities(circle, lines)
+            except UnicodeDecodeError:
+                form.add_error("csv_file", _("Save the file with UTF-8 encoding."))
+            else:
+                self.message_user(
+                    request,
+                    ngettext(
+                        "Imported %(count)s activity.",
+                        "Imported %(count)s activities.",
+                        result.created_count,
+                    )
+                    % {"count": result.created_count},
+                    messages.WARNING if result.error_count else messages.SUCCESS,
+                )
+
+        context = {
+            **self.admin_site.each_context(request),
+            "title": _("Import activities to %(circle)s") % {"circle": circle},
+            "opts": self.model._meta,
+            "original": circle,
+            "form": form,
+            "result": result,
+        }
+
+        return TemplateResponse(
+            request, "admin/circles/circle/import_activities.html", context
+        )
 
 
 @admin.register(JoinRequest)
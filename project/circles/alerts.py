@@ -0,0 +1,173 @@
+"""
+Alerts to organizers about circles that have gone quiet.
+
+A circle is quiet when none of its activities were done in the last days,
+and a companion is when they took part in none of the circle's done
+activities in that time. The organizers of circles with either get an
+email, at most once in that many days, so a circle that stays quiet is
+reminded rather than nagged.
+
+Circles to alert are found in one query, with anti-joins over the
+(circle, done, activity_date) index of activities, so a run is a single
+pass however many circles there are. The quiet companions and organizers
+of each batch of circles take a query each, and the batch's emails are
+sent over one connection.
+"""
+import datetime
+import itertools
+
+from activities.models import Activity
+from django.core import mail
+from django.db.models import Exists, OuterRef, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from .models import Circle, Companion
+
+INACTIVITY_DAYS = 14
+
+BATCH_SIZE = 500
+
+
+def get_done_activities(since):
+    """Return the activities done since the date, for use in subqueries."""
+    return Activity.objects.filter(done=True, activity_date__gte=since)
+
+
+def get_quiet_companions_queryset(since):
+    """Return the companions who took part in no activity done since the date."""
+    return Companion.objects.exclude(
+        Exists(
+            get_done_activities(since).filter(
+                circle=OuterRef("circle"), participants=OuterRef("user")
+            )
+        )
+    )
+
+
+def get_circles_to_alert(since, alerted_before):
+    """
+    Return the circles that are quiet or have quiet companions, and weren't
+    alerted since alerted_before, annotated with is_quiet.
+    """
+    quiet_companions = get_quiet_companions_queryset(since).filter(
+        circle=OuterRef("pk")
+    )
+
+    return (
+        Circle.objects.filter(
+            Q(inactivity_alerted_at__isnull=True)
+            | Q(inactivity_alerted_at__lt=alerted_before)
+        )
+        # Circles without earlier activities haven't had the time to be active
+        .filter(
+            Exists(
+                Activity.objects.filter(circle=OuterRef("pk"), activity_date__lt=since)
+            )
+        )
+        .annotate(
+            is_quiet=~Exists(get_done_activities(since).filter(circle=OuterRef("pk")))
+        )
+        .filter(Q(is_quiet=True) | Exists(quiet_companions))
+    )
+
+
+def get_quiet_companions(circle_ids, since):
+    """Return the display names of quiet companions, by circle ID."""
+    companions = (
+        get_quiet_companions_queryset(since)
+        .filter(circle__in=circle_ids)
+        .values_list("circle", "user__display_name")
+        .order_by("user__display_name")
+    )
+    display_names = {}
+
+    for circle_id, display_name in companions:
+        display_names.setdefault(circle_id, []).append(display_name)
+
+    return display_names
+
+
+def get_organizer_emails(circle_ids):
+    """Return the emails of organizers, by circle ID."""
+    organizers = Companion.objects.filter(
+        circle__in=circle_ids, is_organizer=True
+    ).values_list("circle", "user__email")
+    emails = {}
+
+    for circle_id, email in organizers:
+        emails.setdefault(circle_id, []).append(email)
+
+    return emails
+
+
+def get_messages(circles, days, since):
+    """
+    Return the alert emails to the organizers of the circles, by circle ID.
+    Circles without organizers get none.
+    """
+    circle_ids = [circle_id for circle_id, _name, _is_quiet in circles]
+    quiet_companions = get_quiet_companions(circle_ids, since)
+    organizer_emails = get_organizer_emails(circle_ids)
+    messages = {}
+
+    for circle_id, name, is_quiet in circles:
+        if circle_id not in organizer_emails:
+            continue
+
+        body = render_to_string(
+            "circles/inactivity_alert_email.txt",
+            {
+                "circle_name": name,
+                "days": days,
+                "is_quiet": is_quiet,
+                "quiet_companions": quiet_companions.get(circle_id, []),
+            },
+        )
+        if is_quiet:
+            subject = _("%(circle)s has been quiet") % {"circle": name}
+        else:
+            subject = _("Some companions of %(circle)s have been quiet") % {
+                "circle": name
+            }
+
+        messages[circle_id] = mail.EmailMessage(
+            subject, body, to=organizer_emails[circle_id]
+        )
+
+    return messages
+
+
+def send_inactivity_alerts(days=INACTIVITY_DAYS, batch_size=BATCH_SIZE):
+    """
+    Email the organizers of circles that have been quiet for the days.
+
+    Return the number of circles alerted, which excludes circles without
+    organizers to email.
+    """
+    now = timezone.now()
+    since = timezone.localdate(now) - datetime.timedelta(days=days)
+    # Read at once, as a circle is a few short values
+    circles = iter(
+        get_circles_to_alert(since, now - datetime.timedelta(days=days))
+        .order_by("pk")
+        .values_list("pk", "name", "is_quiet")
+    )
+    count = 0
+
+    while batch := list(itertools.islice(circles, batch_size)):
+        messages = get_messages(batch, days, since)
+
+        if not messages:
+            continue
+
+        with mail.get_connection() as connection:
+            connection.send_messages(list(messages.values()))
+
+        # After sending, so a failed batch is alerted again on the next run
+        Circle.objects.filter(pk__in=messages).update(inactivity_alerted_at=now)
+
+        count += len(messages)
+
+    return count
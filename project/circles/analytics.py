@@ -0,0 +1,323 @@
+"""
+Engagement analytics of circles: activities per week by type, how often
+each companion participates, and streaks of weeks with activities.
+
+The figures come from WeeklyEngagement, a rollup of each circle's
+activities per week, so the analytics page reads a single query however
+many years of history a circle has. Changes to activities mark their weeks
+stale, see circles/signals.py, and update_engagement() recomputes just the
+stale weeks, with a GROUP BY query for each kind of rollup row. Updates run
+in the background when the analytics page of a circle with stale weeks is
+viewed, and daily with the update_engagement command.
+
+Only saved activities are counted, not occurrences of recurring series
+that nothing was added to.
+"""
+import datetime
+
+from activities.models import Activity, get_activity_type_labels
+from core.jobs import submit
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Exists, F, Max, Min, OuterRef, Q, Window
+from django.db.models.functions import Lag, TruncWeek
+from django.utils import timezone
+
+from .models import StaleEngagementWeek, WeeklyEngagement
+
+# Weeks shown in the charts, streaks count the whole history
+CHART_WEEKS = 26
+
+# Chart coordinates, the SVG scales them to the page
+CHART_HEIGHT = 100
+BAR_WIDTH = 8
+BAR_SPACING = 2
+
+ACTIVITY_TYPE_COLORS = {
+    "APPOINTMENT": "#0d6efd",
+    "CALL": "#6f42c1",
+    "ENTERTAINMENT": "#d63384",
+    "ERRAND": "#fd7e14",
+    "HOUSEWORK": "#ffc107",
+    "NATURE": "#198754",
+    "OUTING": "#20c997",
+    "SHOPPING": "#0dcaf0",
+}
+
+BATCH_SIZE = 1000
+
+UPDATE_LOCK_KEY = "circles.engagement_update"
+
+# An update that hasn't finished by then is assumed lost, and may be retried
+UPDATE_TIMEOUT = 60 * 5
+
+
+def get_week(date):
+    """Return the Monday of the date's week."""
+    return date - datetime.timedelta(days=date.weekday())
+
+
+def mark_stale(circle_dates):
+    """
+    Mark the weeks of (circle ID, date) pairs stale, for the next update to
+    recompute. Pairs without a circle or date are skipped.
+    """
+    # Activities created with an ISO string keep it until they are reloaded
+    to_date = Activity._meta.get_field("activity_date").to_python
+
+    StaleEngagementWeek.objects.bulk_create(
+        StaleEngagementWeek(circle_id=circle_id, week=week)
+        for circle_id, week in {
+            (circle_id, get_week(to_date(date)))
+            for circle_id, date in circle_dates
+            if circle_id is not None and date is not None
+        }
+    )
+
+
+def get_stale_activities(stale):
+    """Return the activities in the stale weeks, annotated with their week."""
+    bounds = stale.aggregate(start=Min("week"), end=Max("week"))
+
+    return (
+        Activity.objects.filter(
+            # A range over the (circle, activity_date) index, then the weeks
+            circle__in=stale.values("circle"),
+            activity_date__range=(
+                bounds["start"],
+                bounds["end"] + datetime.timedelta(days=6),
+            ),
+        )
+        .annotate(week=TruncWeek("activity_date"))
+        .filter(Exists(stale.filter(circle=OuterRef("circle"), week=OuterRef("week"))))
+    )
+
+
+def iter_rollup_rows(activities):
+    """Yield the WeeklyEngagement rows of the activities' weeks."""
+    counts = {
+        "activity_count": Count("pk"),
+        "done_count": Count("pk", filter=Q(done=True)),
+    }
+    groupings = [
+        activities.values("circle", "week", "activity_type"),
+        # All activity types
+        activities.values("circle", "week"),
+        activities.filter(participants__isnull=False).values(
+            "circle", "week", "participants"
+        ),
+    ]
+
+    for grouping in groupings:
+        # Without the default ordering, which would be grouped by too
+        for row in grouping.annotate(**counts).order_by():
+            yield WeeklyEngagement(
+                circle_id=row["circle"],
+                week=row["week"],
+                activity_type=row.get("activity_type", ""),
+                user_id=row.get("participants"),
+                activity_count=row["activity_count"],
+                done_count=row["done_count"],
+            )
+
+
+def update_engagement(batch_size=BATCH_SIZE):
+    """
+    Recompute the WeeklyEngagement rows of stale weeks, in all circles, in
+    batches of stale week marks.
+
+    Return the number of stale week marks handled.
+    """
+    count = 0
+
+    while True:
+        with transaction.atomic():
+            # Locked, and deleted by pk, so marks committed meanwhile are left
+            # for the next batch rather than deleted without a rollup
+            pks = list(
+                StaleEngagementWeek.objects.select_for_update()
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+
+            if not pks:
+                return count
+
+            stale = StaleEngagementWeek.objects.filter(pk__in=pks)
+
+            WeeklyEngagement.objects.filter(
+                Exists(stale.filter(circle=OuterRef("circle"), week=OuterRef("week")))
+            ).delete()
+            WeeklyEngagement.objects.bulk_create(
+                iter_rollup_rows(get_stale_activities(stale)), batch_size=BATCH_SIZE
+            )
+            stale.delete()
+
+        count += len(pks)
+
+        if len(pks) < batch_size:
+            return count
+
+
+def run_update():
+    try:
+        update_engagement()
+    finally:
+        cache.delete(UPDATE_LOCK_KEY)
+
+
+def request_update():
+    """Update stale weeks in the background, unless an update is running."""
+    if cache.add(UPDATE_LOCK_KEY, True, UPDATE_TIMEOUT):
+        submit(run_update)
+
+
+def get_streaks(totals, current_week):
+    """
+    Return the current and longest streaks of weeks with activities, and
+    the longest gap between them, from weekly total rows with the previous
+    week that had activities.
+    """
+    current_streak = longest_streak = longest_gap = streak = 0
+
+    for row in totals:
+        gap = 0
+
+        if row["previous_week"] is not None:
+            gap = (row["week"] - row["previous_week"]).days // 7 - 1
+
+        streak = streak + 1 if row["previous_week"] is not None and not gap else 1
+        longest_streak = max(longest_streak, streak)
+        longest_gap = max(longest_gap, gap)
+
+    # This week's activities may still be ahead
+    if totals and totals[-1]["week"] >= current_week - datetime.timedelta(weeks=1):
+        current_streak = streak
+
+    return current_streak, longest_streak, longest_gap
+
+
+def get_chart_weeks(start, type_counts):
+    """Return the weeks of the chart, with a stacked bar segment per type."""
+    labels = get_activity_type_labels()
+    weeks = [start + datetime.timedelta(weeks=index) for index in range(CHART_WEEKS)]
+    max_total = max(
+        (sum(counts.values()) for counts in type_counts.values()), default=0
+    )
+    chart_weeks = []
+
+    for index, week in enumerate(weeks):
+        counts = type_counts.get(week, {})
+        y = CHART_HEIGHT
+        segments = []
+
+        for activity_type, count in sorted(counts.items()):
+            height = CHART_HEIGHT * count / max_total
+            y -= height
+            segments.append(
+                {
+                    "label": labels.get(activity_type, activity_type),
+                    "count": count,
+                    "color": ACTIVITY_TYPE_COLORS.get(activity_type, "#6c757d"),
+                    "y": round(y, 2),
+                    "height": round(height, 2),
+                }
+            )
+
+        chart_weeks.append(
+            {
+                "week": week,
+                "total": sum(counts.values()),
+                "x": index * (BAR_WIDTH + BAR_SPACING),
+                "segments": segments,
+            }
+        )
+
+    return chart_weeks
+
+
+def get_engagement(circle):
+    """Return the figures of the circle's analytics page, from one query."""
+    current_week = get_week(timezone.localdate())
+    start = current_week - datetime.timedelta(weeks=CHART_WEEKS - 1)
+    rows = (
+        WeeklyEngagement.objects.filter(circle=circle, week__lte=current_week)
+        # Weekly totals of the whole history for streaks, the rest for charts
+        .filter(Q(week__gte=start) | Q(activity_type="", user=None))
+        .annotate(
+            # The previous week with a row of the same kind
+            previous_week=Window(
+                Lag("week"),
+                partition_by=[F("activity_type"), F("user")],
+                order_by=F("week").asc(),
+            )
+        )
+        .values(
+            "week",
+            "activity_type",
+            "user",
+            "user__display_name",
+            "activity_count",
+            "done_count",
+            "previous_week",
+        )
+        .order_by("week")
+    )
+
+    type_counts = {}
+    type_totals = {}
+    totals = []
+    participations = {}
+    activity_count = 0
+
+    for row in rows:
+        if row["user"] is not None:
+            participation = participations.setdefault(
+                row["user"], {"display_name": row["user__display_name"], "count": 0}
+            )
+            participation["count"] += row["activity_count"]
+        elif row["activity_type"]:
+            type_counts.setdefault(row["week"], {})[row["activity_type"]] = row[
+                "activity_count"
+            ]
+            type_totals[row["activity_type"]] = (
+                type_totals.get(row["activity_type"], 0) + row["activity_count"]
+            )
+        else:
+            totals.append(row)
+
+            if row["week"] >= start:
+                activity_count += row["activity_count"]
+
+    current_streak, longest_streak, longest_gap = get_streaks(totals, current_week)
+    labels = get_activity_type_labels()
+
+    for participation in participations.values():
+        participation["rate"] = round(100 * participation["count"] / activity_count)
+
+    return {
+        "start": start,
+        "activity_count": activity_count,
+        "weeks": get_chart_weeks(start, type_counts),
+        "chart_width": CHART_WEEKS * (BAR_WIDTH + BAR_SPACING) - BAR_SPACING,
+        "chart_height": CHART_HEIGHT,
+        "bar_width": BAR_WIDTH,
+        "activity_types": [
+            {
+                "label": labels.get(activity_type, activity_type),
+                "count": count,
+                "color": ACTIVITY_TYPE_COLORS.get(activity_type, "#6c757d"),
+            }
+            for activity_type, count in sorted(type_totals.items())
+        ],
+        "participations": sorted(
+            participations.values(),
+            key=lambda participation: (
+                -participation["count"],
+                participation["display_name"],
+            ),
+        ),
+        "current_streak": current_streak,
+        "longest_streak": longest_streak,
+        "longest_gap": longest_gap,
+    }
@@ -0,0 +1,179 @@
+import datetime
+
+from accounts.models import User
+from activities.models import Activity, Participation
+from core.benchmarking import benchmark, time_per_call
+from django.utils import timezone
+
+from .alerts import get_circles_to_alert, get_messages
+from .analytics import get_engagement, mark_stale, update_engagement
+from .models import Circle, Companion
+from .reports import get_report_data, render_report
+
+
+@benchmark
+def monthly_report(number=5):
+    """
+    Time the queries and the rendering of a monthly report for a circle
+    with 5,000 activities, 500 of them in the month, each with two of the
+    circle's ten companions as participants.
+    """
+    circle = Circle.objects.create(name="Benchmark")
+    users = [
+        User.objects.create_user(f"benchmark{index}@user.com", "benchmark")
+        for index in range(10)
+    ]
+    Companion.objects.bulk_create(
+        [Companion(circle=circle, user=user) for user in users]
+    )
+    activity_types = Activity.ActivityTypeChoices.values
+    start = datetime.date(2022, 1, 1)
+    activities = Activity.objects.bulk_create(
+        [
+            Activity(
+                circle=circle,
+                activity_type=activity_types[index % 8],
+                # 5,000 activities over ten months
+                activity_date=start + datetime.timedelta(days=index * 300 // 5000),
+                done=index % 2 == 0,
+            )
+            for index in range(5000)
+        ]
+    )
+    Participation.objects.bulk_create(
+        [
+            Participation(
+                activity=activity,
+                user=users[(index + offset) % 10],
+                activity_date=activity.activity_date,
+            )
+            for index, activity in enumerate(activities)
+            for offset in range(2)
+        ]
+    )
+
+    data = get_report_data(circle, 2022, 3)
+
+    return [
+        ("queries", time_per_call(lambda: get_report_data(circle, 2022, 3), number)),
+        ("rendering", time_per_call(lambda: render_report(circle, data), number)),
+    ]
+
+
+@benchmark
+def engagement(number=5):
+    """
+    Time updating the engagement rollup of a circle with ten years of
+    activities, 10,000 of them with two participants each, for all weeks
+    and for one changed week, and reading the analytics page's figures.
+    """
+    circle = Circle.objects.create(name="Benchmark")
+    users = [
+        User.objects.create_user(f"benchmark{index}@user.com", "benchmark")
+        for index in range(10)
+    ]
+    Companion.objects.bulk_create(
+        [Companion(circle=circle, user=user) for user in users]
+    )
+    activity_types = Activity.ActivityTypeChoices.values
+    end = timezone.localdate()
+    activities = Activity.objects.bulk_create(
+        [
+            Activity(
+                circle=circle,
+                activity_type=activity_types[index % 8],
+                activity_date=end - datetime.timedelta(days=index * 3650 // 10000),
+                done=index % 2 == 0,
+            )
+            for index in range(10000)
+        ]
+    )
+    Participation.objects.bulk_create(
+        [
+            Participation(
+                activity=activity,
+                user=users[(index + offset) % 10],
+                activity_date=activity.activity_date,
+            )
+            for index, activity in enumerate(activities)
+            for offset in range(2)
+        ]
+    )
+    all_dates = [(circle.pk, activity.activity_date) for activity in activities]
+
+    def update_all():
+        mark_stale(all_dates)
+        update_engagement()
+
+    def update_week():
+        mark_stale([(circle.pk, end)])
+        update_engagement()
+
+    update_all()
+
+    return [
+        ("all weeks", time_per_call(update_all, number)),
+        ("one week", time_per_call(update_week, number)),
+        ("page", time_per_call(lambda: get_engagement(circle), number)),
+    ]
+
+
+@benchmark
+def inactivity_alerts(number=5):
+    """
+    Time finding the circles to alert among 5,000 circles with two
+    companions and ten activities each, a third of them quiet, and the
+    emails of a batch of 500 of them.
+    """
+    users = [
+        User.objects.create_user(f"benchmark{index}@user.com", "benchmark")
+        for index in range(2)
+    ]
+    circles = Circle.objects.bulk_create(
+        [Circle(name=f"Benchmark {index}") for index in range(5000)]
+    )
+    Companion.objects.bulk_create(
+        [
+            Companion(circle=circle, user=user, is_organizer=user == users[0])
+            for circle in circles
+            for user in users
+        ]
+    )
+    today = timezone.localdate()
+    activities = Activity.objects.bulk_create(
+        [
+            Activity(
+                circle=circle,
+                # Every third circle has nothing done in the last four weeks
+                activity_date=today
+                - datetime.timedelta(days=day * 7 + (30 if index % 3 == 0 else 0)),
+                done=True,
+            )
+            for index, circle in enumerate(circles)
+            for day in range(10)
+        ]
+    )
+    Participation.objects.bulk_create(
+        [
+            Participation(
+                activity=activity, user=users[0], activity_date=activity.activity_date
+            )
+            for activity in activities
+        ]
+    )
+    since = today - datetime.timedelta(days=14)
+    alerted_before = timezone.now() - datetime.timedelta(days=14)
+
+    def find_circles():
+        return list(
+            get_circles_to_alert(since, alerted_before).values_list(
+                "pk", "name", "is_quiet"
+            )
+        )
+
+    batch = find_circles()[:500]
+
+    return [
+        ("circles", time_per_call(find_circles, number)),
+        ("batch emails", time_per_call(lambda: get_messages(batch, 14, since), number)),
+    ]
@@ -0,0 +1,28 @@
+from circles.alerts import BATCH_SIZE, INACTIVITY_DAYS, send_inactivity_alerts
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Email the organizers of circles without done activities, or with "
+        "companions who took part in none, in the last days."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=INACTIVITY_DAYS,
+            help=f"Days without done activities, {INACTIVITY_DAYS} by default.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help=f"Circles alerted per batch, {BATCH_SIZE} by default.",
+        )
+
+    def handle(self, *args, days, batch_size, **options):
+        count = send_inactivity_alerts(days=days, batch_size=batch_size)
+
+        self.stdout.write(f"Alerted the organizers of {count} circles")
@@ -0,0 +1,14 @@
+from circles.analytics import update_engagement
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the weekly engagement rollups of circles for the weeks "
+        "with changed activities."
+    )
+
+    def handle(self, *args, **options):
+        count = update_engagement()
+
+        self.stdout.write(f"Updated {count} stale weeks")
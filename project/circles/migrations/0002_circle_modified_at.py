@@ -0,0 +1,21 @@
+# Generated by Django 4.1.3 on 2026-10-19 01:49
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("circles", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="circle",
+            name="modified_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False
+            ),
+        ),
+    ]
@@ -0,0 +1,118 @@
+# Generated by Django 4.1.3 on 2026-10-19 02:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import TruncWeek
+
+
+def mark_existing_weeks_stale(apps, schema_editor):
+    """Mark the weeks of existing activities, for the first update to roll up."""
+    Activity = apps.get_model("activities", "Activity")
+    StaleEngagementWeek = apps.get_model("circles", "StaleEngagementWeek")
+    weeks = (
+        Activity.objects.filter(circle__isnull=False)
+        .annotate(week=TruncWeek("activity_date"))
+        .values_list("circle", "week")
+        .order_by()
+        .distinct()
+    )
+
+    StaleEngagementWeek.objects.bulk_create(
+        [StaleEngagementWeek(circle_id=circle, week=week) for circle, week in weeks],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("activities", "0004_activityseries"),
+        ("circles", "0002_circle_modified_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WeeklyEngagement",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("week", models.DateField()),
+                ("activity_type", models.CharField(blank=True, max_length=15)),
+                ("activity_count", models.PositiveIntegerField()),
+                ("done_count", models.PositiveIntegerField()),
+                (
+                    "circle",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="weekly_engagement",
+                        to="circles.circle",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="weekly_engagement",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="StaleEngagementWeek",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("week", models.DateField()),
+                (
+                    "circle",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stale_engagement_weeks",
+                        to="circles.circle",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="weeklyengagement",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("user__isnull", True)),
+                fields=("circle", "week", "activity_type"),
+                name="weekly_engagement_unique",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="weeklyengagement",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("user__isnull", False)),
+                fields=("circle", "week", "user"),
+                name="weekly_engagement_user_unique",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="staleengagementweek",
+            index=models.Index(
+                fields=["circle", "week"], name="stale_engagement_week_idx"
+            ),
+        ),
+        migrations.RunPython(mark_existing_weeks_stale, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.3 on 2026-10-19 02:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("circles", "0003_weekly_engagement"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="circle",
+            name="inactivity_alerted_at",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+    ]
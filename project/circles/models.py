@@ -1,19 +1,117 @@
+import bisect
+import datetime
+import hashlib
 import uuid
-from datetime import datetime
 
+from core.metrics import record_cache_lookup
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db import models
+from django.db.models import Count, Q
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.functional import cached_property
 from django.utils.translation import gettext as _
 from easy_thumbnails.fields import ThumbnailerImageField
 
 User = get_user_model()
 
+# Cache keys include the day, so counts only need to outlive it
+ACTIVITY_COUNTS_TIMEOUT = 60 * 60 * 24
+
+# How far ahead occurrences of recurring activities are listed
+OCCURRENCES_WINDOW = datetime.timedelta(weeks=4)
+
+# Number of upcoming activities listed on a user's circles page
+UPCOMING_PARTICIPATIONS_LIMIT = 20
+
+
+class UpcomingActivities:
+    """
+    The upcoming activities of a circle, merged by date with the unsaved
+    occurrences of recurring activities in the next OCCURRENCES_WINDOW.
+
+    A sequence for paginators: saved activities are counted from the
+    circle's cached activity_counts and sliced by the database, and only
+    the occurrences, which the window bounds, are read at once. A slice
+    takes a query, however many activities there are.
+    """
+
+    def __init__(self, circle):
+        today = timezone.localdate()
+
+        self.circle = circle
+        self.activities = circle.upcoming_activities
+        self.occurrences = circle.get_occurrences(today, today + OCCURRENCES_WINDOW)
+
+    def __len__(self):
+        return self.circle.activity_counts["upcoming"] + len(self.occurrences)
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            index = range(len(self))[key]
+
+            return self[index : index + 1][0]
+
+        start, stop, _step = key.indices(len(self))
+
+        if start >= stop:
+            return []
+
+        # Occurrences come before saved activities of later dates only, so
+        # those of the slice are at most that many places earlier
+        offset = max(0, start - len(self.occurrences))
+        activities = list(self.activities[offset:stop])
+        activity_dates = [activity.activity_date for activity in activities]
+        occurrence_dates = [occurrence.activity_date for occurrence in self.occurrences]
+        positions = [
+            (offset + index + bisect.bisect_left(occurrence_dates, date), activity)
+            for index, (date, activity) in enumerate(zip(activity_dates, activities))
+        ] + [
+            (offset + index + bisect.bisect_right(activity_dates, date), occurrence)
+            for index, (date, occurrence) in enumerate(
+                zip(occurrence_dates, self.occurrences)
+            )
+        ]
+
+        return [
+            activity
+            for position, activity in sorted(positions, key=lambda item: item[0])
+            if start <= position < stop
+        ]
+
+
+class CircleQuerySet(models.QuerySet):
+    def touch(self):
+        """
+        Mark circles as modified, changing their version.
+
+        Signal handlers in circles/signals.py call this on changes to what
+        circle pages show. Code that bypasses signals, such as bulk_create()
+        or QuerySet.update(), must call it explicitly.
+        """
+        return self.update(modified_at=timezone.now())
+
+
+def get_circles_version(circle_versions):
+    """
+    Return a version for a set of circles, from (circle ID, modified_at) pairs.
+
+    It changes when any of the circles changes, and when circles are added to
+    or removed from the set, such as when a user joins or leaves a circle.
+    """
+    return hashlib.sha256(repr(sorted(circle_versions)).encode()).hexdigest()[:16]
+
 
 class Circle(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=50)
     photo = ThumbnailerImageField(upload_to="circle_photos", blank=True)
+    modified_at = models.DateTimeField(default=timezone.now, editable=False)
+    # When organizers were last told the circle has gone quiet, see circles/alerts.py
+    inactivity_alerted_at = models.DateTimeField(null=True, editable=False)
+
+    objects = CircleQuerySet.as_manager()
 
     class Meta:
         verbose_name_plural = _("circles")
@@ -21,6 +119,20 @@ class Circle(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.modified_at = timezone.now()
+
+        super().save(*args, **kwargs)
+
+    @property
+    def version(self):
+        """
+        Return an integer that changes whenever the circle's pages change.
+
+        Useful in cache keys for data derived from the circle.
+        """
+        return int(self.modified_at.timestamp() * 1_000_000)
+
     def get_absolute_url(self):
         return reverse("circle-detail", kwargs={"pk": self.pk})
 
@@ -43,10 +155,94 @@ class Circle(models.Model):
 
     @property
     def upcoming_activities(self):
-        """Return a list of activities that happen today or later."""
-        today = datetime.today()
+        """Return activities that happen today or later, soonest first."""
+        today = timezone.localdate()
 
-        return self.activities.filter(activity_date__gte=today)
+        return self.activities.filter(activity_date__gte=today).order_by(
+            "activity_date"
+        )
+
+    @property
+    def past_activities(self):
+        """Return activities that happened before today, latest first."""
+        today = timezone.localdate()
+
+        return self.activities.filter(activity_date__lt=today).order_by(
+            "-activity_date"
+        )
+
+    def get_occurrences(self, start, end):
+        """
+        Return the unsaved occurrences of recurring activities between start
+        and end, inclusive, by date. Takes two queries at most.
+        """
+        series_list = list(
+            self.activity_series.filter(start_date__lte=end).exclude(
+                last_date__lt=start
+            )
+        )
+
+        if not series_list:
+            return []
+
+        # Saved occurrences may have been moved to other dates
+        saved_occurrences = set(
+            self.activities.model.objects.filter(
+                series__in=series_list, occurrence_date__range=(start, end)
+            ).values_list("series", "occurrence_date")
+        )
+        occurrences = [
+            series.get_occurrence(date)
+            for series in series_list
+            for date in series.get_dates(start, end)
+            if (series.pk, date) not in saved_occurrences
+        ]
+
+        return sorted(occurrences, key=lambda activity: activity.activity_date)
+
+    def get_activities(self, start, end):
+        """
+        Return the activities between start and end, inclusive, by date.
+
+        Includes unsaved occurrences of recurring activities, see
+        activities.models.ActivitySeries. Takes three queries, however many
+        occurrences there are.
+        """
+        activities = list(self.activities.filter(activity_date__range=(start, end)))
+
+        return sorted(
+            activities + self.get_occurrences(start, end),
+            key=lambda activity: activity.activity_date,
+        )
+
+    def get_upcoming_activities(self):
+        """
+        Return upcoming activities, with occurrences of recurring activities
+        for the next OCCURRENCES_WINDOW, see UpcomingActivities.
+        """
+        return UpcomingActivities(self)
+
+    @cached_property
+    def activity_counts(self):
+        """
+        Return a dict with the numbers of upcoming and past activities.
+
+        Both are counted in one query, cached for the circle version and day.
+        """
+        today = timezone.localdate()
+        key = f"circles.activity_counts:{self.pk}:{self.version}:{today}"
+        counts = cache.get(key)
+
+        record_cache_lookup("circle_activity_counts", counts is not None)
+
+        if counts is None:
+            counts = self.activities.aggregate(
+                upcoming=Count("pk", filter=Q(activity_date__gte=today)),
+                past=Count("pk", filter=Q(activity_date__lt=today)),
+            )
+            cache.set(key, counts, ACTIVITY_COUNTS_TIMEOUT)
+
+        return counts
 
     @property
     def annotated_companions(self):
@@ -109,6 +305,40 @@ class Companion(models.Model):
         )
 
 
+def get_upcoming_participations(user, companions):
+    """
+    Return the next upcoming activities the user participates in, across
+    their circles, with the circles loaded.
+
+    companions are the user's Companion objects, with circles. The list is
+    cached for the versions of those circles, so it is fetched again after
+    the user's participations or their activities change, as those touch the
+    circle.
+    """
+    today = timezone.localdate()
+    version = get_circles_version(
+        (companion.circle_id, companion.circle.modified_at) for companion in companions
+    )
+    key = f"circles.upcoming_participations:{user.pk}:{version}:{today}"
+    activities = cache.get(key)
+
+    record_cache_lookup("upcoming_participations", activities is not None)
+
+    if activities is None:
+        # Activities of circles the user has left would not change the version
+        activities = list(
+            user.activities.filter(
+                circle__in=[companion.circle_id for companion in companions],
+                activity_date__gte=today,
+            )
+            .select_related("circle")
+            .order_by("activity_date", "pk")[:UPCOMING_PARTICIPATIONS_LIMIT]
+        )
+        cache.set(key, activities, ACTIVITY_COUNTS_TIMEOUT)
+
+    return activities
+
+
 class JoinRequest(models.Model):
     """Request to join circle as a companion."""
 
@@ -128,3 +358,59 @@ class JoinRequest(models.Model):
         choices=JoinRequestStatusChoices.choices,
         default=JoinRequestStatusChoices.PENDING,
     )
+
+
+class WeeklyEngagement(models.Model):
+    """
+    A rollup of a circle's activities in a week, see circles/analytics.py.
+
+    Rows are the week's activities of an activity type, of all types when
+    activity_type is blank, or those a companion participated in, when user
+    is set.
+    """
+
+    circle = models.ForeignKey(
+        to=Circle, related_name="weekly_engagement", on_delete=models.CASCADE
+    )
+    # The Monday of the week
+    week = models.DateField()
+    activity_type = models.CharField(max_length=15, blank=True)
+    user = models.ForeignKey(
+        to=User,
+        related_name="weekly_engagement",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+    )
+    activity_count = models.PositiveIntegerField()
+    done_count = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            # One of each, as NULL users don't conflict with each other
+            models.UniqueConstraint(
+                fields=["circle", "week", "activity_type"],
+                condition=Q(user__isnull=True),
+                name="weekly_engagement_unique",
+            ),
+            models.UniqueConstraint(
+                fields=["circle", "week", "user"],
+                condition=Q(user__isnull=False),
+                name="weekly_engagement_user_unique",
+            ),
+        ]
+
+
+class StaleEngagementWeek(models.Model):
+    """A week whose WeeklyEngagement rows are out of date, see circles/signals.py."""
+
+    circle = models.ForeignKey(
+        to=Circle, related_name="stale_engagement_weeks", on_delete=models.CASCADE
+    )
+    week = models.DateField()
+
+    class Meta:
+        indexes = [
+            # Updates look up the marks of each activity's week
+            models.Index(fields=["circle", "week"], name="stale_engagement_week_idx"),
+        ]
@@ -0,0 +1,227 @@
+"""
+Monthly care reports of circles, as PDF files.
+
+A report lists the month's activities by type, how often each companion
+participated and the circle's companionship score. Its data comes from
+three aggregate queries, however many activities the circle has.
+
+Reports are built by a background job and stored under the circle's
+version, so a report is only built again after the circle changes and
+repeat downloads are read from storage. reportlab and svglib are slow to
+import, so they are imported while building rather than on startup.
+"""
+import calendar
+import datetime
+import io
+
+from activities.models import Activity, get_activity_type_labels
+from core.icons import get_icon_svgs
+from core.jobs import submit
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Count, Q
+from django.utils import formats, translation
+from django.utils.html import escape
+from django.utils.translation import gettext as _
+
+from .models import Circle, Companion
+
+REPORTS_DIRECTORY = "circle_reports"
+
+# A build that hasn't finished by then is assumed lost, and may be retried
+BUILD_TIMEOUT = 60 * 5
+
+ICON_SIZE = 12
+
+
+def get_month_range(year, month):
+    """Return the first and last dates of the month."""
+    return (
+        datetime.date(year, month, 1),
+        datetime.date(year, month, calendar.monthrange(year, month)[1]),
+    )
+
+
+def get_report_name(circle, year, month, language_code):
+    """Return the storage name of the report for the circle's current version."""
+    return (
+        f"{REPORTS_DIRECTORY}/{circle.pk}/"
+        f"{year}-{month:02}-{language_code}-{circle.version}.pdf"
+    )
+
+
+def get_report_data(circle, year, month):
+    """Return the figures of a monthly report."""
+    start, end = get_month_range(year, month)
+
+    activity_types = (
+        Activity.objects.filter(circle=circle, activity_date__range=(start, end))
+        .values("activity_type")
+        .annotate(count=Count("pk"), done_count=Count("pk", filter=Q(done=True)))
+        .order_by("activity_type")
+    )
+    # Companions without participations are listed too, with zero
+    participations = (
+        Companion.objects.filter(circle=circle)
+        # By user, as companions may share a display name
+        .values("user", "user__display_name")
+        .annotate(
+            count=Count(
+                "user__activities",
+                filter=Q(
+                    user__activities__circle=circle,
+                    user__activities__activity_date__range=(start, end),
+                ),
+            )
+        )
+        .order_by("-count", "user__display_name", "user")
+    )
+
+    return {
+        "month": start,
+        "activity_types": list(activity_types),
+        "participations": [
+            (participation["user__display_name"], participation["count"])
+            for participation in participations
+        ],
+        "companionship_score": circle.companionship_score,
+    }
+
+
+def get_icon_drawing(icon):
+    from svglib.svglib import svg2rlg
+
+    svg = get_icon_svgs()[icon.removeprefix("bi-")]
+    drawing = svg2rlg(io.BytesIO(svg.encode()))
+    scale = ICON_SIZE / drawing.height
+
+    drawing.scale(scale, scale)
+    drawing.width *= scale
+    drawing.height *= scale
+
+    return drawing
+
+
+def render_report(circle, data):
+    """Return a report as PDF, in the active language."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import (
+        Paragraph,
+        SimpleDocTemplate,
+        Spacer,
+        Table,
+        TableStyle,
+    )
+
+    styles = getSampleStyleSheet()
+    table_style = TableStyle(
+        [
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("LINEBELOW", (0, 0), (-1, 0), 0.5, colors.grey),
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+            ("ALIGN", (-2, 0), (-1, -1), "RIGHT"),
+        ]
+    )
+    title = _("%(circle)s in %(month)s") % {
+        "circle": circle.name,
+        "month": formats.date_format(data["month"], "YEAR_MONTH_FORMAT"),
+    }
+    labels = get_activity_type_labels()
+
+    activity_rows = [["", _("Activity"), _("Activities"), _("Done")]]
+    activity_rows.extend(
+        [
+            get_icon_drawing(Activity.ActivityTypeIcons[row["activity_type"]].value),
+            labels.get(row["activity_type"], row["activity_type"]),
+            row["count"],
+            row["done_count"],
+        ]
+        for row in data["activity_types"]
+    )
+    participation_rows = [["", _("Companion"), _("Participations")]]
+    participation_rows.extend(
+        ["", display_name, count] for display_name, count in data["participations"]
+    )
+
+    story = [
+        Paragraph(escape(title), styles["Title"]),
+        Paragraph(
+            escape(
+                _("Companionship score: %(score)s")
+                % {"score": data["companionship_score"]}
+            ),
+            styles["Normal"],
+        ),
+        Spacer(0, ICON_SIZE),
+        Paragraph(escape(_("Activities")), styles["Heading2"]),
+    ]
+
+    if data["activity_types"]:
+        story.append(Table(activity_rows, colWidths=[24, 200, 80, 80], hAlign="LEFT"))
+        story[-1].setStyle(table_style)
+    else:
+        story.append(Paragraph(escape(_("No activities found.")), styles["Normal"]))
+
+    story.append(Paragraph(escape(_("Participation")), styles["Heading2"]))
+    story.append(Table(participation_rows, colWidths=[24, 200, 80], hAlign="LEFT"))
+    story[-1].setStyle(table_style)
+
+    pdf = io.BytesIO()
+    SimpleDocTemplate(pdf, pagesize=A4, title=title).build(story)
+
+    return pdf.getvalue()
+
+
+def delete_stale_reports(circle, year, month, language_code, keep):
+    """Delete reports of the month built for earlier versions of the circle."""
+    directory = f"{REPORTS_DIRECTORY}/{circle.pk}"
+
+    try:
+        _directories, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+
+    prefix = f"{year}-{month:02}-{language_code}-"
+
+    for name in files:
+        path = f"{directory}/{name}"
+
+        if name.startswith(prefix) and path != keep:
+            default_storage.delete(path)
+
+
+def build_report(circle_id, year, month, language_code):
+    """Build and store a report, unless one exists for the current version."""
+    circle = Circle.objects.get(pk=circle_id)
+    name = get_report_name(circle, year, month, language_code)
+
+    if default_storage.exists(name):
+        return
+
+    with translation.override(language_code):
+        pdf = render_report(circle, get_report_data(circle, year, month))
+
+    default_storage.save(name, ContentFile(pdf))
+    delete_stale_reports(circle, year, month, language_code, keep=name)
+
+
+def get_build_lock_key(name):
+    return f"circles.report_build:{name}"
+
+
+def run_build(name, circle_id, year, month, language_code):
+    try:
+        build_report(circle_id, year, month, language_code)
+    finally:
+        cache.delete(get_build_lock_key(name))
+
+
+def request_report(circle, year, month, language_code):
+    """Build a report in the background, unless it is already being built."""
+    name = get_report_name(circle, year, month, language_code)
+
+    if cache.add(get_build_lock_key(name), True, BUILD_TIMEOUT):
+        submit(run_build, name, circle.pk, year, month, language_code)
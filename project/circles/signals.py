@@ -0,0 +1,86 @@
+"""
+Keep circle versions current.
+
+Each change to something shown on a circle's pages touches the circle,
+which changes its version and invalidates conditional GETs and caches.
+"""
+from activities.models import Activity, ActivitySeries, Comment
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .analytics import mark_stale
+from .models import Circle, Companion, JoinRequest
+
+User = get_user_model()
+
+
+def is_circle_deletion(origin):
+    """Whether a deletion cascades from deleting a circle, so nothing to touch."""
+    return isinstance(origin, Circle)
+
+
+@receiver([post_save, post_delete], sender=Activity)
+@receiver([post_save, post_delete], sender=ActivitySeries)
+@receiver([post_save, post_delete], sender=Companion)
+@receiver([post_save, post_delete], sender=JoinRequest)
+def touch_circle(sender, instance, origin=None, **kwargs):
+    if not is_circle_deletion(origin):
+        Circle.objects.filter(pk=instance.circle_id).touch()
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def touch_comment_circle(sender, instance, origin=None, **kwargs):
+    if not is_circle_deletion(origin):
+        Circle.objects.filter(activities=instance.activity_id).touch()
+
+
+@receiver(m2m_changed, sender=Activity.participants.through)
+def touch_participant_circles(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in {"post_add", "post_remove", "pre_clear"}:
+        return
+
+    if not reverse:
+        Circle.objects.filter(pk=instance.circle_id).touch()
+    elif action == "pre_clear":
+        Circle.objects.filter(activities__participants=instance).touch()
+    else:
+        Circle.objects.filter(activities__in=pk_set).touch()
+
+
+@receiver(post_save, sender=Activity)
+def mark_saved_activity_stale(sender, instance, **kwargs):
+    # Both weeks of an activity moved to another date
+    dates = [instance.activity_date, getattr(instance, "loaded_activity_date", None)]
+
+    mark_stale((instance.circle_id, date) for date in dates)
+
+
+@receiver(post_delete, sender=Activity)
+def mark_deleted_activity_stale(sender, instance, origin=None, **kwargs):
+    if not is_circle_deletion(origin):
+        mark_stale([(instance.circle_id, instance.activity_date)])
+
+
+@receiver(m2m_changed, sender=Activity.participants.through)
+def mark_participations_stale(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in {"post_add", "post_remove", "pre_clear"}:
+        return
+
+    if not reverse:
+        mark_stale([(instance.circle_id, instance.activity_date)])
+    elif action == "pre_clear":
+        mark_stale(instance.activities.values_list("circle", "activity_date"))
+    else:
+        activities = Activity.objects.filter(pk__in=pk_set)
+
+        mark_stale(activities.values_list("circle", "activity_date"))
+
+
+@receiver(post_save, sender=User)
+def touch_user_circles(sender, instance, **kwargs):
+    """Circle pages show the names and last logins of companions and applicants."""
+    Circle.objects.filter(
+        Q(companions_through__user=instance) | Q(join_requests__user=instance)
+    ).touch()
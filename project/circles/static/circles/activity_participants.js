@@ -0,0 +1,38 @@
+// Submit participant changes in the background and replace the activity card
+// with the updated one. Falls back to a normal form submission on errors.
+document.addEventListener("submit", function (event) {
+    var form = event.target.closest(".activity-participants-form");
+
+    if (!form) {
+        return;
+    }
+
+    event.preventDefault();
+
+    fetch(form.action, {
+        method: "POST",
+        body: new FormData(form),
+        headers: {"X-Requested-With": "fetch"},
+    })
+        .then(function (response) {
+            if (!response.ok) {
+                throw new Error(response.statusText);
+            }
+
+            return response.text();
+        })
+        .then(function (html) {
+            var modalElement = form.closest(".modal");
+            var activityElement = document.getElementById(form.dataset.activity);
+
+            // Replace the card, with this modal, once the modal has closed
+            modalElement.addEventListener("hidden.bs.modal", function () {
+                activityElement.outerHTML = html;
+            }, {once: true});
+
+            bootstrap.Modal.getInstance(modalElement).hide();
+        })
+        .catch(function () {
+            form.submit();
+        });
+});
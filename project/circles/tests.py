@@ -1,10 +1,36 @@
+import datetime
+import json
+import tempfile
 from http import HTTPStatus
 
 from accounts.models import User
-from django.test import TestCase
+from activities.exports import iter_csv
+from activities.models import Activity, ActivitySeries, Comment
+from django.core import mail
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
-from .models import Circle, Companion
+from .alerts import send_inactivity_alerts
+from .analytics import get_streaks, get_week, update_engagement
+from .models import (
+    OCCURRENCES_WINDOW,
+    Circle,
+    Companion,
+    StaleEngagementWeek,
+    WeeklyEngagement,
+)
+from .reports import (
+    REPORTS_DIRECTORY,
+    build_report,
+    get_report_data,
+    get_report_name,
+    request_report,
+)
 
 
 class CircleCreateViewTest(TestCase):
@@ -144,3 +170,892 @@ class CircleListViewTest(TestCase):
         # Circles list should not contain any existing circles
         self.assertContains(response, self.circle_with_companion_name)
         self.assertNotContains(response, self.circle_without_companion_name)
+
+
+class CircleVersionTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("test@user.com", "test12345")
+        self.circle = Circle.objects.create(name="Test circle")
+        self.activity = Activity.objects.create(circle=self.circle)
+
+    def assertVersionChanges(self, change):
+        self.circle.refresh_from_db()
+        version = self.circle.version
+
+        change()
+
+        self.circle.refresh_from_db()
+        self.assertNotEqual(self.circle.version, version)
+
+    def test_version_changes(self):
+        """Changes to anything shown on circle pages should change the version"""
+        self.assertVersionChanges(
+            lambda: Companion.objects.create(circle=self.circle, user=self.user)
+        )
+        self.assertVersionChanges(lambda: Activity.objects.create(circle=self.circle))
+        self.assertVersionChanges(lambda: self.activity.participants.add(self.user))
+        self.assertVersionChanges(lambda: self.user.activities.clear())
+        self.assertVersionChanges(
+            lambda: Comment.objects.create(
+                user_id=self.user.id, text="Comment", activity=self.activity
+            )
+        )
+        self.assertVersionChanges(self.user.save)
+        self.assertVersionChanges(self.activity.delete)
+
+    def test_circle_deletion(self):
+        """Deleting a circle should cascade without touching it"""
+        with CaptureQueriesContext(connection) as queries:
+            self.circle.delete()
+
+        self.assertFalse(
+            [query for query in queries if query["sql"].startswith("UPDATE")]
+        )
+
+
+class CircleDetailConditionalGetTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("test@user.com", "test12345")
+        self.organizer = User.objects.create_user("organizer@user.com", "test12345")
+        self.circle = Circle.objects.create(name="Test circle")
+        Companion.objects.create(circle=self.circle, user=self.user)
+        Companion.objects.create(
+            circle=self.circle, user=self.organizer, is_organizer=True
+        )
+        self.url = reverse("circle-detail", kwargs={"pk": self.circle.id})
+
+        self.client.force_login(self.user)
+
+    def get_etag(self, **headers):
+        response = self.client.get(self.url, **headers)
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        return response["ETag"]
+
+    def test_unchanged_page(self):
+        """An unchanged page should not be rendered again"""
+        # The first response sets the CSRF cookie, which is part of the ETag
+        self.get_etag()
+        etag = self.get_etag()
+
+        # Session, user and circle version
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+    def test_changed_page(self):
+        """A change to the circle should render the page again"""
+        etag = self.get_etag()
+
+        Activity.objects.create(circle=self.circle)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_per_user_etag(self):
+        """Users and languages should each get their own ETag"""
+        etag = self.get_etag()
+
+        self.assertNotEqual(self.get_etag(HTTP_ACCEPT_LANGUAGE="fi"), etag)
+
+        self.client.force_login(self.organizer)
+
+        self.assertNotEqual(self.get_etag(), etag)
+
+    def test_non_companion(self):
+        """Non-companions should not get a 304 or an ETag"""
+        self.client.force_login(User.objects.create_user("other@user.com", "pw"))
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH="*")
+
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        self.assertFalse(response.has_header("ETag"))
+
+
+class CircleActivitiesTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("test@user.com", "test12345")
+        self.circle = Circle.objects.create(name="Test circle")
+        Companion.objects.create(circle=self.circle, user=self.user)
+
+        today = timezone.localdate()
+        day = datetime.timedelta(days=1)
+
+        self.last_week, self.yesterday, self.today, self.tomorrow = [
+            Activity.objects.create(circle=self.circle, activity_date=date)
+            for date in [today - 7 * day, today - day, today, today + day]
+        ]
+
+    def test_upcoming_and_past_activities(self):
+        """Activities should be split at today, nearest first"""
+        self.assertQuerysetEqual(
+            self.circle.upcoming_activities, [self.today, self.tomorrow]
+        )
+        self.assertQuerysetEqual(
+            self.circle.past_activities, [self.yesterday, self.last_week]
+        )
+
+    def test_local_date(self):
+        """Today should be the date in the current time zone"""
+        # 26 hours apart, so the local dates always differ
+        west = datetime.timezone(datetime.timedelta(hours=-12))
+        east = datetime.timezone(datetime.timedelta(hours=14))
+
+        with timezone.override(west):
+            activity = Activity.objects.create(
+                circle=self.circle, activity_date=timezone.localdate()
+            )
+
+            self.assertIn(activity, self.circle.upcoming_activities)
+
+        with timezone.override(east):
+            self.assertIn(activity, self.circle.past_activities)
+
+    def test_activity_counts_are_cached(self):
+        """Counts should be cached until the circle changes"""
+        # Creating the activities changed the circle version
+        self.circle.refresh_from_db()
+        self.assertEqual(self.circle.activity_counts, {"upcoming": 2, "past": 2})
+
+        circle = Circle.objects.get(pk=self.circle.pk)
+
+        with self.assertNumQueries(0):
+            circle.activity_counts
+
+        Activity.objects.create(circle=self.circle)
+        circle = Circle.objects.get(pk=self.circle.pk)
+
+        self.assertEqual(circle.activity_counts, {"upcoming": 3, "past": 2})
+
+
+class CircleArchiveViewTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("test@user.com", "test12345")
+        self.circle = Circle.objects.create(name="Test circle")
+        Companion.objects.create(circle=self.circle, user=self.user)
+
+        today = timezone.localdate()
+        self.past = Activity.objects.create(
+            circle=self.circle,
+            activity_date=today - datetime.timedelta(days=1),
+            note="Past note",
+        )
+        self.upcoming = Activity.objects.create(
+            circle=self.circle, activity_date=today, note="Upcoming note"
+        )
+
+        self.client.force_login(self.user)
+
+    def test_detail_lists_upcoming_activities(self):
+        """The circle page should list upcoming activities and link the archive"""
+        response = self.client.get(reverse("circle-detail", args=[self.circle.id]))
+
+        self.assertContains(response, "Upcoming note")
+        self.assertNotContains(response, "Past note")
+        self.assertContains(response, reverse("circle-archive", args=[self.circle.id]))
+
+    def test_archive_lists_past_activities(self):
+        """The archive should list past activities"""
+        response = self.client.get(reverse("circle-archive", args=[self.circle.id]))
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, "Past note")
+        self.assertNotContains(response, "Upcoming note")
+
+    def test_non_companion(self):
+        """Non-companions should not see the archive"""
+        self.client.force_login(User.objects.create_user("other@user.com", "pw"))
+
+        response = self.client.get(reverse("circle-archive", args=[self.circle.id]))
+
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+
+class CircleRecurringActivitiesTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("test@user.com", "test12345")
+        self.circle = Circle.objects.create(name="Test circle")
+        Companion.objects.create(circle=self.circle, user=self.user)
+
+        self.today = timezone.localdate()
+        self.series = ActivitySeries.objects.create(
+            circle=self.circle,
+            start_date=self.today,
+            frequency="DAILY",
+            note="Daily call",
+        )
+
+    def test_occurrences_are_listed(self):
+        """Occurrences should be listed with saved activities, by date"""
+        tomorrow = self.today + datetime.timedelta(days=1)
+        activity = Activity.objects.create(circle=self.circle, activity_date=tomorrow)
+
+        with self.assertNumQueries(3):
+            activities = self.circle.get_activities(self.today, tomorrow)
+
+        self.assertEqual(
+            [(item.pk, item.activity_date) for item in activities],
+            [(None, self.today), (activity.pk, tomorrow), (None, tomorrow)],
+        )
+
+    def test_saved_occurrences(self):
+        """Saved occurrences should replace unsaved ones, even when moved"""
+        activity = self.series.materialize(self.today)
+        activity.activity_date = self.today + datetime.timedelta(days=7)
+        activity.save()
+
+        activities = self.circle.get_activities(self.today, self.today)
+
+        self.assertEqual(activities, [])
+
+    def test_upcoming_activities(self):
+        """Slices of upcoming activities should merge occurrences by date"""
+        day = datetime.timedelta(days=1)
+
+        for days in [0, 2, 2, 5, 27, 28, 29, 40, 40, 60]:
+            Activity.objects.create(
+                circle=self.circle, activity_date=self.today + days * day
+            )
+
+        window_end = self.today + OCCURRENCES_WINDOW
+        expected = self.circle.get_activities(self.today, window_end) + list(
+            self.circle.upcoming_activities.filter(activity_date__gt=window_end)
+        )
+        activities = self.circle.get_upcoming_activities()
+
+        self.assertEqual(len(activities), len(expected))
+
+        for start in range(len(expected)):
+            with self.subTest(start=start):
+                self.assertEqual(
+                    [
+                        (activity.pk, activity.activity_date)
+                        for activity in activities[start : start + 4]
+                    ],
+                    [
+                        (activity.pk, activity.activity_date)
+                        for activity in expected[start : start + 4]
+                    ],
+                )
+
+    def test_upcoming_activities_queries(self):
+        """A page of upcoming activities should take one query, however many"""
+        Activity.objects.bulk_create(
+            Activity(
+                circle=self.circle,
+                activity_date=self.today + datetime.timedelta(days=days),
+            )
+            for days in range(100)
+        )
+        activities = self.circle.get_upcoming_activities()
+
+        # The daily occurrences in the window, today included
+        self.assertEqual(len(activities), 100 + OCCURRENCES_WINDOW.days + 1)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(len(activities[80:84]), 4)
+
+    def test_circle_page(self):
+        """The circle page should show occurrences in the coming weeks"""
+        self.client.force_login(self.user)
+
+        response = self.client.get(self.circle.get_absolute_url())
+
+        self.assertContains(response, "Daily call")
+        self.assertContains(
+            response,
+            reverse(
+                "activity-occurrence",
+                kwargs={
+                    "series_id": self.series.id,
+                    "occurrence_date": self.today.isoformat(),
+                    "action": "add_participant",
+                },
+            ),
+        )
+
+
+class CircleImportActivitiesAdminTest(TestCase):
+    def setUp(self):
+        self.staff_user = User.objects.create_superuser("staff@user.com", "test12345")
+        self.circle = Circle.objects.create(name="Test circle")
+        self.url = reverse(
+            "admin:circles_circle_import_activities", args=[self.circle.pk]
+        )
+
+    def test_action_redirects_to_import(self):
+        """The admin action should lead to the import form of the selected circle"""
+        self.client.force_login(self.staff_user)
+
+        response = self.client.post(
+            reverse("admin:circles_circle_changelist"),
+            {
+                "action": "import_activities_action",
+                "_selected_action": [self.circle.pk],
+            },
+        )
+
+        self.assertRedirects(response, self.url)
+
+    def test_import(self):
+        """Uploading a CSV file should import activities and report skipped rows"""
+        self.client.force_login(self.staff_user)
+        csv_file = SimpleUploadedFile(
+            "activities.csv",
+            "activity_type,activity_date,note\n"
+            "CALL,2022-11-01,Äiti\n"
+            "CALL,soon,\n".encode("utf-8-sig"),
+        )
+
+        response = self.client.post(self.url, {"csv_file": csv_file})
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.context["result"].created_count, 1)
+        self.assertContains(response, "Line 3")
+        self.assertEqual(self.circle.activities.get().note, "Äiti")
+
+
+class CircleExportViewTest(TestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user("organizer@user.com", "test12345")
+        self.organizer.display_name = "Olga"
+        self.organizer.save()
+        self.companion = User.objects.create_user("companion@user.com", "test12345")
+        self.companion.display_name = "Carl"
+        self.companion.save()
+        self.circle = Circle.objects.create(name="Test circle")
+        Companion.objects.create(
+            circle=self.circle, user=self.organizer, is_organizer=True
+        )
+        Companion.objects.create(circle=self.circle, user=self.companion)
+
+        self.activity = Activity.objects.create(
+            circle=self.circle,
+            activity_type=Activity.ActivityTypeChoices.SHOPPING,
+            activity_date=datetime.date(2022, 11, 1),
+            note="Groceries",
+            done=True,
+        )
+        self.activity.participants.add(self.organizer, self.companion)
+        Comment.objects.create(
+            activity=self.activity, user_id=self.companion.id, text="Done"
+        )
+        Activity.objects.create(
+            circle=self.circle,
+            activity_type=Activity.ActivityTypeChoices.CALL,
+            activity_date=datetime.date(2022, 11, 2),
+        )
+
+    def get_export(self, export_format):
+        return self.client.get(
+            reverse("circle-export", args=[self.circle.pk, export_format])
+        )
+
+    def test_anonymous_access(self):
+        """Anonymous users should be redirected to login"""
+        response = self.get_export("csv")
+
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_companion_access(self):
+        """Companions who are not organizers should not be able to export"""
+        self.client.force_login(self.companion)
+
+        response = self.get_export("csv")
+
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    def test_unknown_format(self):
+        """Unsupported formats should not be found"""
+        self.client.force_login(self.organizer)
+
+        response = self.get_export("xml")
+
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_csv(self):
+        """The CSV export should list activities with participants and comments"""
+        self.client.force_login(self.organizer)
+
+        response = self.get_export("csv")
+        content = b"".join(response.streaming_content).decode()
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn("test-circle-activities.csv", response["Content-Disposition"])
+        self.assertEqual(
+            content.splitlines(),
+            [
+                "activity_type,activity_date,note,done,comment_count,participants",
+                "SHOPPING,2022-11-01,Groceries,True,1,Carl;Olga",
+                "CALL,2022-11-02,,False,0,",
+            ],
+        )
+
+    def test_json(self):
+        """The JSON export should be an array of activities"""
+        self.client.force_login(self.organizer)
+
+        response = self.get_export("json")
+        activities = json.loads(b"".join(response.streaming_content))
+
+        self.assertEqual(len(activities), 2)
+        self.assertEqual(
+            activities[0],
+            {
+                "activity_type": "SHOPPING",
+                "activity_date": "2022-11-01",
+                "note": "Groceries",
+                "done": True,
+                "comment_count": 1,
+                "participants": ["Carl", "Olga"],
+            },
+        )
+
+    def test_empty_json(self):
+        """Circles without activities should export an empty array"""
+        self.client.force_login(self.organizer)
+        self.circle.activities.all().delete()
+
+        response = self.get_export("json")
+
+        self.assertEqual(json.loads(b"".join(response.streaming_content)), [])
+
+    def test_participants_are_loaded_per_chunk(self):
+        """Exports should read activities once and participants once per chunk"""
+        for day in range(3, 6):
+            Activity.objects.create(
+                circle=self.circle, activity_date=datetime.date(2022, 11, day)
+            )
+
+        # Five activities in chunks of two
+        with self.assertNumQueries(1 + 3):
+            chunks = list(iter_csv(self.circle, chunk_size=2))
+
+        self.assertEqual(len(chunks), 1 + 3)
+
+
+class CircleReportTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_root_override = override_settings(MEDIA_ROOT=media_root.name)
+        media_root_override.enable()
+        self.addCleanup(media_root_override.disable)
+
+        self.user = User.objects.create_user("test@user.com", "test12345")
+        self.other_user = User.objects.create_user("other@user.com", "test12345")
+        self.circle = Circle.objects.create(name="Test circle")
+        Companion.objects.create(circle=self.circle, user=self.user)
+        Companion.objects.create(circle=self.circle, user=self.other_user)
+
+        for day, activity_type in [
+            (1, Activity.ActivityTypeChoices.SHOPPING),
+            (2, Activity.ActivityTypeChoices.SHOPPING),
+            (3, Activity.ActivityTypeChoices.CALL),
+        ]:
+            activity = Activity.objects.create(
+                circle=self.circle,
+                activity_type=activity_type,
+                activity_date=datetime.date(2022, 11, day),
+                done=day == 1,
+            )
+            activity.participants.add(self.user)
+
+        # Outside the month
+        Activity.objects.create(
+            circle=self.circle, activity_date=datetime.date(2022, 12, 1)
+        ).participants.add(self.other_user)
+
+        self.url = reverse("circle-report", args=[self.circle.pk, 2022, 11])
+
+    def test_report_data(self):
+        """Report figures should cover the month and come from three queries"""
+        with self.assertNumQueries(3):
+            data = get_report_data(self.circle, 2022, 11)
+
+        self.assertEqual(
+            data["activity_types"],
+            [
+                {"activity_type": "CALL", "count": 1, "done_count": 0},
+                {"activity_type": "SHOPPING", "count": 2, "done_count": 1},
+            ],
+        )
+        self.assertEqual(
+            data["participations"],
+            [(self.user.display_name, 3), (self.other_user.display_name, 0)],
+        )
+        self.assertEqual(data["companionship_score"], 4)
+
+    def test_non_companion_access(self):
+        """Users who are not companions should not get reports"""
+        self.client.force_login(User.objects.create_user("x@user.com", "test12345"))
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    def test_invalid_month(self):
+        """Months outside 1 to 12 should not be found"""
+        self.client.force_login(self.user)
+
+        response = self.client.get(
+            reverse("circle-report", args=[self.circle.pk, 2022, 13])
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_report_is_built_in_background(self):
+        """The report should be built by a job, then served from storage"""
+        self.client.force_login(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, HTTPStatus.ACCEPTED)
+        self.assertIn("Refresh", response)
+        self.assertEqual(len(callbacks), 1)
+
+        # Session, user, companion check and circle, but nothing for the report
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+
+    def test_build_is_requested_once(self):
+        """Requests while a report is being built should not start another build"""
+        self.client.force_login(self.user)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.get(self.url)
+            self.client.get(self.url)
+
+        self.assertEqual(len(callbacks), 1)
+
+    def test_failed_build_is_retried(self):
+        """A failed build should not keep later requests from building again"""
+        # Months outside 1 to 12 fail while building
+        with self.assertLogs("core.jobs", "ERROR"):
+            with self.captureOnCommitCallbacks(execute=True):
+                request_report(self.circle, 2022, 13, "en")
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            request_report(self.circle, 2022, 13, "en")
+
+        self.assertEqual(len(callbacks), 1)
+
+    def test_changes_replace_the_report(self):
+        """A change to the circle should build a new report and delete the old"""
+        build_report(self.circle.pk, 2022, 11, "en")
+        Activity.objects.create(
+            circle=self.circle, activity_date=datetime.date(2022, 11, 4)
+        )
+        self.circle.refresh_from_db()
+        build_report(self.circle.pk, 2022, 11, "en")
+
+        _directories, files = default_storage.listdir(
+            f"{REPORTS_DIRECTORY}/{self.circle.pk}"
+        )
+
+        self.assertEqual(
+            [f"{REPORTS_DIRECTORY}/{self.circle.pk}/{name}" for name in files],
+            [get_report_name(self.circle, 2022, 11, "en")],
+        )
+
+
+class CircleListUpcomingActivitiesTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("test@user.com", "test12345")
+        self.today = timezone.localdate()
+        self.circles = [
+            Circle.objects.create(name=f"Circle {index}") for index in range(2)
+        ]
+
+        for circle in self.circles:
+            Companion.objects.create(circle=circle, user=self.user)
+
+        self.activities = [
+            Activity.objects.create(
+                circle=circle, activity_date=self.today + datetime.timedelta(days=day)
+            )
+            for day, circle in enumerate(self.circles, start=1)
+        ]
+
+        for activity in self.activities:
+            activity.participants.add(self.user)
+
+        # Neither past activities nor those the user doesn't participate in
+        Activity.objects.create(
+            circle=self.circles[0], activity_date=self.today - datetime.timedelta(1)
+        ).participants.add(self.user)
+        Activity.objects.create(circle=self.circles[0], activity_date=self.today)
+
+        self.client.force_login(self.user)
+
+    def test_upcoming_activities(self):
+        """The user's upcoming activities in all their circles should be listed"""
+        response = self.client.get(reverse("circle-list"))
+
+        self.assertEqual(response.context["upcoming_activities"], self.activities)
+        self.assertContains(response, "Circle 1", count=2)
+
+    def test_queries(self):
+        """Circles and activities should take a query each, and be cached"""
+        # Session and user, then companions with circles and activities
+        with self.assertNumQueries(2 + 2):
+            self.client.get(reverse("circle-list"))
+
+        with self.assertNumQueries(2 + 1):
+            response = self.client.get(reverse("circle-list"))
+
+        self.assertEqual(response.context["upcoming_activities"], self.activities)
+
+    def test_participant_changes(self):
+        """Participant changes should show up despite the cache"""
+        self.client.get(reverse("circle-list"))
+
+        self.activities[0].participants.remove(self.user)
+        response = self.client.get(reverse("circle-list"))
+
+        self.assertEqual(response.context["upcoming_activities"], self.activities[1:])
+
+    def test_left_circles(self):
+        """Activities of circles the user has left should not be listed"""
+        Companion.objects.filter(circle=self.circles[0]).delete()
+
+        response = self.client.get(reverse("circle-list"))
+
+        self.assertEqual(response.context["upcoming_activities"], self.activities[1:])
+
+
+class CircleAnalyticsTest(TestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user("organizer@user.com", "test12345")
+        self.user = User.objects.create_user("test@user.com", "test12345")
+        self.circle = Circle.objects.create(name="Test circle")
+        Companion.objects.create(
+            circle=self.circle, user=self.organizer, is_organizer=True
+        )
+        Companion.objects.create(circle=self.circle, user=self.user)
+
+        self.week = get_week(timezone.localdate())
+        self.last_week = self.week - datetime.timedelta(weeks=1)
+        self.call = Activity.objects.create(
+            circle=self.circle, activity_type="CALL", activity_date=self.week, done=True
+        )
+        self.call.participants.add(self.user, self.organizer)
+        Activity.objects.create(
+            circle=self.circle, activity_type="SHOPPING", activity_date=self.week
+        ).participants.add(self.user)
+        Activity.objects.create(
+            circle=self.circle, activity_type="CALL", activity_date=self.last_week
+        )
+
+        self.client.force_login(self.organizer)
+
+    def get_rows(self):
+        return set(
+            WeeklyEngagement.objects.values_list(
+                "week", "activity_type", "user", "activity_count", "done_count"
+            )
+        )
+
+    def test_update(self):
+        """Updates should roll up stale weeks by type, in total and by companion"""
+        # Marks of three new activities and two participant changes
+        self.assertEqual(update_engagement(), 5)
+        self.assertEqual(
+            self.get_rows(),
+            {
+                (self.week, "CALL", None, 1, 1),
+                (self.week, "SHOPPING", None, 1, 0),
+                (self.week, "", None, 2, 1),
+                (self.week, "", self.user.pk, 2, 1),
+                (self.week, "", self.organizer.pk, 1, 1),
+                (self.last_week, "CALL", None, 1, 0),
+                (self.last_week, "", None, 1, 0),
+            },
+        )
+        self.assertFalse(StaleEngagementWeek.objects.exists())
+        self.assertEqual(update_engagement(), 0)
+
+    def test_update_queries(self):
+        """An update should take a query per kind of rollup row, however many weeks"""
+        # Savepoint, marks, delete, bounds, three GROUP BY queries, insert,
+        # delete marks and release
+        with self.assertNumQueries(10):
+            update_engagement()
+
+    def test_update_batches(self):
+        """Updates should handle the stale marks in batches, until none are left"""
+        self.assertEqual(update_engagement(batch_size=2), 5)
+        self.assertIn((self.week, "", None, 2, 1), self.get_rows())
+        self.assertIn((self.last_week, "", None, 1, 0), self.get_rows())
+        self.assertFalse(StaleEngagementWeek.objects.exists())
+
+    def test_changes(self):
+        """Moved activities and participant changes should mark weeks stale"""
+        update_engagement()
+
+        call = Activity.objects.get(pk=self.call.pk)
+        call.activity_date = self.last_week
+        call.save()
+        call.participants.remove(self.organizer)
+        update_engagement()
+
+        self.assertEqual(
+            self.get_rows(),
+            {
+                (self.week, "SHOPPING", None, 1, 0),
+                (self.week, "", None, 1, 0),
+                (self.week, "", self.user.pk, 1, 0),
+                (self.last_week, "CALL", None, 2, 1),
+                (self.last_week, "", None, 2, 1),
+                (self.last_week, "", self.user.pk, 1, 1),
+            },
+        )
+
+    def test_streaks(self):
+        """Streaks should count consecutive weeks, and gaps the weeks between"""
+        weeks = [
+            self.week - datetime.timedelta(weeks=weeks) for weeks in [9, 5, 4, 1, 0]
+        ]
+        totals = [
+            {"week": week, "previous_week": previous_week}
+            for previous_week, week in zip([None] + weeks, weeks)
+        ]
+
+        self.assertEqual(get_streaks(totals, self.week), (2, 2, 3))
+        self.assertEqual(get_streaks(totals[:3], self.week), (0, 2, 3))
+
+    def test_view(self):
+        """Organizers should see charts and participation from the rollup"""
+        update_engagement()
+
+        # Session, user, organizer check, circle, stale check and the rollup
+        with self.assertNumQueries(6):
+            response = self.client.get(
+                reverse("circle-analytics", kwargs={"pk": self.circle.pk})
+            )
+
+        engagement = response.context["engagement"]
+
+        self.assertFalse(response.context["is_updating"])
+        self.assertEqual(engagement["activity_count"], 3)
+        self.assertEqual(engagement["current_streak"], 2)
+        self.assertEqual(
+            [
+                (participation["display_name"], participation["rate"])
+                for participation in engagement["participations"]
+            ],
+            [(self.user.display_name, 67), (self.organizer.display_name, 33)],
+        )
+        self.assertEqual(engagement["weeks"][-1]["total"], 2)
+
+    def test_view_updates(self):
+        """Viewing a circle with stale weeks should update them in the background"""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(
+                reverse("circle-analytics", kwargs={"pk": self.circle.pk})
+            )
+
+        self.assertTrue(response.context["is_updating"])
+        self.assertContains(response, "still being added")
+        self.assertFalse(StaleEngagementWeek.objects.exists())
+
+    def test_companions(self):
+        """Companions who aren't organizers should not see analytics"""
+        self.client.force_login(self.user)
+
+        response = self.client.get(
+            reverse("circle-analytics", kwargs={"pk": self.circle.pk})
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+
+class InactivityAlertTest(TestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user("organizer@user.com", "test12345")
+        self.user = User.objects.create_user("test@user.com", "test12345")
+        User.objects.filter(pk=self.organizer.pk).update(display_name="Organizer")
+        User.objects.filter(pk=self.user.pk).update(display_name="Companion")
+        self.today = timezone.localdate()
+        self.long_ago = self.today - datetime.timedelta(days=30)
+        self.circles = [
+            Circle.objects.create(name=f"Circle {index}") for index in range(3)
+        ]
+
+        for circle in self.circles:
+            Companion.objects.create(
+                circle=circle, user=self.organizer, is_organizer=True
+            )
+            Companion.objects.create(circle=circle, user=self.user)
+            Activity.objects.create(
+                circle=circle, activity_date=self.long_ago, done=True
+            ).participants.add(self.organizer, self.user)
+
+        # Circle 1 is active without the user, circle 2 with everyone
+        Activity.objects.create(
+            circle=self.circles[1], activity_date=self.today, done=True
+        ).participants.add(self.organizer)
+        Activity.objects.create(
+            circle=self.circles[2], activity_date=self.today, done=True
+        ).participants.add(self.organizer, self.user)
+
+    def test_alerts(self):
+        """Organizers of quiet circles and of quiet companions should be emailed"""
+        self.assertEqual(send_inactivity_alerts(days=14), 2)
+
+        messages = sorted(mail.outbox, key=lambda message: message.subject)
+
+        self.assertEqual(
+            [message.subject for message in messages],
+            ["Circle 0 has been quiet", "Some companions of Circle 1 have been quiet"],
+        )
+        self.assertEqual(messages[0].to, ["organizer@user.com"])
+        self.assertIn("were marked done in the last 14 days", messages[0].body)
+        self.assertIn("- Companion", messages[1].body)
+        self.assertNotIn("- Organizer", messages[1].body)
+
+    def test_alerted_once(self):
+        """Circles should be alerted again only after the days have passed"""
+        send_inactivity_alerts(days=14)
+
+        self.assertEqual(send_inactivity_alerts(days=14), 0)
+
+        Circle.objects.update(
+            inactivity_alerted_at=timezone.now() - datetime.timedelta(days=15)
+        )
+
+        self.assertEqual(send_inactivity_alerts(days=14), 2)
+
+    def test_circles_without_organizers(self):
+        """Circles without organizers to email should not be counted or stamped"""
+        Companion.objects.filter(circle=self.circles[0]).update(is_organizer=False)
+
+        self.assertEqual(send_inactivity_alerts(days=14), 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+        self.circles[0].refresh_from_db()
+
+        self.assertIsNone(self.circles[0].inactivity_alerted_at)
+
+    def test_new_circles(self):
+        """Circles without activities before the days should not be alerted"""
+        Activity.objects.filter(circle=self.circles[0]).update(activity_date=self.today)
+
+        self.assertEqual(send_inactivity_alerts(days=14), 1)
+
+    def test_queries(self):
+        """Circles should take one query, and each batch a constant number"""
+        # Circles, then per batch companions, organizers and the update
+        with self.assertNumQueries(1 + 2 * 3):
+            send_inactivity_alerts(days=14, batch_size=1)
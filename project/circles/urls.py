@@ -1,9 +1,13 @@
 from django.urls import path
 
 from .views import (
+    CircleAnalyticsView,
+    CircleArchiveView,
     CircleCreateView,
     CircleDetailView,
+    CircleExportView,
     CircleListView,
+    CircleReportView,
     CircleUpdateView,
     CompanionDeleteView,
     JoinRequestUpdateView,
@@ -20,6 +24,22 @@ urlpatterns = [
     path("<slug:pk>/update/", CircleUpdateView.as_view(), name="circle-update"),
     path("<slug:circle_id>/join/", join_as_companion, name="circle-join"),
     path("<slug:pk>/", CircleDetailView.as_view(), name="circle-detail"),
+    path("<slug:pk>/archive/", CircleArchiveView.as_view(), name="circle-archive"),
+    path(
+        "<uuid:pk>/export.<slug:export_format>",
+        CircleExportView.as_view(),
+        name="circle-export",
+    ),
+    path(
+        "<uuid:pk>/report/<int:year>/<int:month>.pdf",
+        CircleReportView.as_view(),
+        name="circle-report",
+    ),
+    path(
+        "<uuid:pk>/analytics/",
+        CircleAnalyticsView.as_view(),
+        name="circle-analytics",
+    ),
     path(
         "<slug:circle_id>/join-request/<slug:join_request_id>",
         JoinRequestUpdateView.as_view(),
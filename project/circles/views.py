@@ -1,17 +1,39 @@
-from activities.forms import ActivityModelForm
+from http import HTTPStatus
+
+from activities.calendars import get_circle_feed_url
+from activities.exports import EXPORT_FORMATS
+from activities.forms import ActivityModelForm, ActivitySeriesModelForm
+from core.metrics import record_cache_lookup
+from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.core.exceptions import PermissionDenied
 from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
-from django.http import Http404, HttpResponseRedirect
+from django.core.files.storage import default_storage
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponseRedirect,
+    StreamingHttpResponse,
+)
 from django.shortcuts import redirect, render
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+from django.utils.decorators import method_decorator
+from django.utils.text import slugify
+from django.utils.translation import get_language
 from django.utils.translation import gettext as _
 from django.views import View
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.template.response import TemplateResponse
 from django.views.generic.base import TemplateView
 from django.views.generic.detail import DetailView
 from django.views.generic.edit import CreateView, DeleteView, UpdateView
 
-from .models import Circle, Companion, JoinRequest
+from .analytics import get_engagement, request_update
+from .models import Circle, Companion, JoinRequest, get_upcoming_participations
+from .reports import get_report_name, request_report
 
 
 class CompanionDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
@@ -91,6 +113,73 @@ class CircleCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
         return not self.request.user.is_care_circle_organizer
 
 
+def get_circle_detail_state(request, pk):
+    """
+    Return the circle's modification time and whether the user organizes it.
+
+    Return None if the user is not a companion of the circle. The result is
+    kept on the request, as both conditional GET validators need it.
+    """
+    if not hasattr(request, "_circle_detail_state"):
+        request._circle_detail_state = (
+            Companion.objects.filter(circle=pk, user=request.user.pk)
+            .values_list("circle__modified_at", "is_organizer")
+            .first()
+        )
+
+    return request._circle_detail_state
+
+
+def circle_detail_etag(request, pk):
+    """
+    Combine the circle version with everything else the page depends on.
+
+    The page is rendered for the user, in their language, with their CSRF
+    token, and shows relative dates. Flash messages are shown only once,
+    so pages with pending messages are always rendered.
+    """
+    if not request.user.is_authenticated or len(messages.get_messages(request)):
+        return None
+
+    state = get_circle_detail_state(request, pk)
+
+    if state is None:
+        return None
+
+    modified_at, is_organizer = state
+
+    value = "|".join(
+        [
+            modified_at.isoformat(),
+            str(request.user.pk),
+            str(is_organizer),
+            get_language(),
+            timezone.localdate().isoformat(),
+            request.META.get("CSRF_COOKIE", ""),
+        ]
+    )
+
+    return salted_hmac("circles.circle_detail_etag", value).hexdigest()
+
+
+def circle_detail_last_modified(request, pk):
+    if circle_detail_etag(request, pk) is None:
+        return None
+
+    modified_at, _is_organizer = get_circle_detail_state(request, pk)
+
+    return modified_at
+
+
+# Browsers must revalidate each time, as the ETag covers changes
+@method_decorator(cache_control(private=True, no_cache=True), name="dispatch")
+@method_decorator(
+    condition(
+        etag_func=circle_detail_etag,
+        last_modified_func=circle_detail_last_modified,
+    ),
+    name="dispatch",
+)
 # First, ensure user is logged in, then make sure they pass test (are a companion)
 class CircleDetailView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
     model = Circle
@@ -107,10 +196,18 @@ class CircleDetailView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
 
         return user_can_access_circle
 
+    def get_activities(self):
+        """Return the activities to list, and their count."""
+        activities = self.object.get_upcoming_activities()
+
+        return activities, len(activities)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        queryset = self.object.activities.all()
+        queryset, count = self.get_activities()
         paginator = Paginator(queryset, 4)
+        # Use the cached count rather than counting again
+        paginator.count = count
         page = self.request.GET.get('page')
 
         """
@@ -123,8 +220,16 @@ class CircleDetailView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
         invitation_url = self.request.build_absolute_uri(invitation_path)
 
         context["invitation_url"] = invitation_url
+        context["calendar_url"] = self.request.build_absolute_uri(
+            get_circle_feed_url(self.object, self.request.user)
+        )
 
-        context["add_activity_form"] = ActivityModelForm
+        # An instance, a form class would be instantiated by every lookup
+        # in the activity cards
+        context["add_activity_form"] = ActivityModelForm(user=self.request.user)
+        context["add_activity_series_form"] = ActivitySeriesModelForm(
+            user=self.request.user
+        )
 
         try:
             activities_page = paginator.page(page)
@@ -139,9 +244,149 @@ class CircleDetailView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
         return context
 
 
+class CircleArchiveView(CircleDetailView):
+    """Past activities of the circle, latest first."""
+
+    template_name = "circles/circle_archive.html"
+
+    def get_activities(self):
+        return self.object.past_activities, self.object.activity_counts["past"]
+
+
+@method_decorator(cache_control(private=True, no_cache=True), name="dispatch")
+class CircleExportView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """Download the circle's activity history, streamed as it is read."""
+
+    def test_func(self):
+        """Only organizers can export the circle's history"""
+        return Companion.objects.filter(
+            circle_id=self.kwargs["pk"],
+            user=self.request.user,
+            is_organizer=True,
+        ).exists()
+
+    def get(self, request, pk, export_format):
+        if export_format not in EXPORT_FORMATS:
+            raise Http404
+
+        circle = Circle.objects.get(pk=pk)
+        content_type, serialize = EXPORT_FORMATS[export_format]
+
+        response = StreamingHttpResponse(
+            serialize(circle), content_type=f"{content_type}; charset=utf-8"
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{slugify(circle.name) or "circle"}'
+            f'-activities.{export_format}"'
+        )
+
+        return response
+
+
+# How often the page waiting for a report checks whether it is ready
+REPORT_REFRESH_SECONDS = 3
+
+
+@method_decorator(cache_control(private=True, no_cache=True), name="dispatch")
+class CircleReportView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """
+    Download a monthly report of the circle as PDF.
+
+    Reports are built in the background, until one is ready for the current
+    version of the circle a page that reloads itself is shown instead.
+    """
+
+    def test_func(self):
+        """Only companions can download the circle's reports"""
+        return Companion.objects.filter(
+            circle_id=self.kwargs["pk"], user=self.request.user
+        ).exists()
+
+    def get(self, request, pk, year, month):
+        if not (1 <= month <= 12 and 1 <= year <= 9999):
+            raise Http404
+
+        circle = Circle.objects.get(pk=pk)
+        language_code = get_language()
+        name = get_report_name(circle, year, month, language_code)
+        is_ready = default_storage.exists(name)
+
+        record_cache_lookup("circle_reports", is_ready)
+
+        if is_ready:
+            return FileResponse(
+                default_storage.open(name),
+                as_attachment=True,
+                filename=f"{slugify(circle.name) or 'circle'}-{year}-{month:02}.pdf",
+                content_type="application/pdf",
+            )
+
+        request_report(circle, year, month, language_code)
+
+        response = TemplateResponse(
+            request,
+            "circles/circle_report_pending.html",
+            {"circle": circle},
+            status=HTTPStatus.ACCEPTED,
+        )
+        # Browsers load the page again after the given seconds
+        response["Refresh"] = str(REPORT_REFRESH_SECONDS)
+
+        return response
+
+
+class CircleAnalyticsView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """
+    Charts of the circle's activities per week, participation and streaks.
+
+    Changes since the last update of the figures are added in the background,
+    the page says so until they are.
+    """
+
+    def test_func(self):
+        """Only organizers can see the circle's analytics"""
+        return Companion.objects.filter(
+            circle_id=self.kwargs["pk"],
+            user=self.request.user,
+            is_organizer=True,
+        ).exists()
+
+    def get(self, request, pk):
+        circle = Circle.objects.get(pk=pk)
+        is_updating = circle.stale_engagement_weeks.exists()
+
+        if is_updating:
+            request_update()
+
+        return TemplateResponse(
+            request,
+            "circles/circle_analytics.html",
+            {
+                "circle": circle,
+                "engagement": get_engagement(circle),
+                "is_updating": is_updating,
+            },
+        )
+
+
 class CircleListView(LoginRequiredMixin, TemplateView):
+    """The user's circles and their upcoming activities across circles."""
+
     template_name = "circles/circle_list.html"
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        user = self.request.user
+        companions = list(user.companions_through.select_related("circle"))
+
+        context["companions"] = companions
+        context["is_organizer"] = any(
+            companion.is_organizer for companion in companions
+        )
+        context["upcoming_activities"] = get_upcoming_participations(user, companions)
+
+        return context
+
 
 # First, ensure user is logged in, then make sure they pass test (are an organizer)
 class CircleUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
@@ -0,0 +1,94 @@
+from django.contrib import admin, messages
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import path, reverse
+from django.utils.html import format_html
+from django.utils.translation import gettext_lazy as _
+
+from .models import RequestProfile
+from .profiling import QUERY_PARAMETER, make_token
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = [
+        "created_at",
+        "method",
+        "path",
+        "url_name",
+        "status_code",
+        "duration",
+        "user",
+        "download_link",
+    ]
+    list_filter = [
+        "url_name",
+    ]
+    readonly_fields = [
+        "created_at",
+        "user",
+        "method",
+        "path",
+        "url_name",
+        "status_code",
+        "duration",
+        "download_link",
+    ]
+
+    def get_queryset(self, request):
+        # Statistics can be large and are only needed for downloads
+        return super().get_queryset(request).defer("stats").select_related("user")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "token/",
+                self.admin_site.admin_view(self.token_view),
+                name="core_requestprofile_token",
+            ),
+            path(
+                "<int:object_id>/download/",
+                self.admin_site.admin_view(self.download_view),
+                name="core_requestprofile_download",
+            ),
+        ] + super().get_urls()
+
+    @admin.display(description=_("Statistics"))
+    def download_link(self, obj):
+        url = reverse("admin:core_requestprofile_download", args=[obj.pk])
+
+        return format_html('<a href="{}">{}</a>', url, obj.filename)
+
+    def token_view(self, request):
+        """Issue a profiling token for the current user."""
+        if not self.has_view_permission(request):
+            return redirect("admin:index")
+
+        self.message_user(
+            request,
+            _("Add ?%(parameter)s=%(token)s to the URL of the request to profile.")
+            % {"parameter": QUERY_PARAMETER, "token": make_token(request.user)},
+            messages.SUCCESS,
+        )
+
+        return redirect("admin:core_requestprofile_changelist")
+
+    def download_view(self, request, object_id):
+        """Download statistics in a format pstats and snakeviz can load."""
+        if not self.has_view_permission(request):
+            return redirect("admin:index")
+
+        profile = get_object_or_404(RequestProfile, pk=object_id)
+
+        response = HttpResponse(
+            bytes(profile.stats), content_type="application/octet-stream"
+        )
+        response["Content-Disposition"] = f'attachment; filename="{profile.filename}"'
+
+        return response
@@ -0,0 +1,41 @@
+"""
+Micro-benchmarks, run with `python manage.py benchmark`.
+
+Apps define benchmarks in a benchmarks.py module, as functions decorated
+with @benchmark. A benchmark takes the number of iterations to run and
+returns a list of (label, seconds) rows. Benchmarks run against a test
+database, like the test suite, so they can create the data they need.
+"""
+import timeit
+
+from django.utils.module_loading import autodiscover_modules
+
+registry = {}
+
+
+def benchmark(func):
+    """Register a benchmark under "<app module>.<function name>"."""
+    app = func.__module__.rpartition(".")[0]
+    registry[f"{app}.{func.__name__}"] = func
+
+    return func
+
+
+def autodiscover():
+    autodiscover_modules("benchmarks")
+
+
+def time_per_call(func, number, repeat=5):
+    """Return the best time per call of func, in seconds, over repeated runs."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def format_duration(seconds):
+    """Format a duration in seconds for a right-aligned column."""
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:10.1f} µs"
+
+    if seconds < 1:
+        return f"{seconds * 1e3:10.1f} ms"
+
+    return f"{seconds:10.2f} s "
@@ -0,0 +1,147 @@
+import time
+
+from accounts.models import User
+from activities.models import (
+    Activity,
+    _get_activity_type_choices,
+    _get_activity_type_labels,
+)
+from circles.models import Circle, Companion
+from crispy_forms.templatetags.crispy_forms_filters import (
+    uni_form_template,
+    uni_formset_template,
+)
+from crispy_forms.utils import default_field_template
+from django.conf import settings
+from django.core.handlers.base import BaseHandler
+from django.core.signals import setting_changed
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, override_settings
+from django.urls import path, set_urlconf
+
+from .benchmarking import benchmark, time_per_call
+from .startup import LOAD_APPLICATION, run_python
+from .warmup import warm_up
+
+
+def empty_view(request):
+    return HttpResponse()
+
+
+# Used as the URLconf of benchmark requests
+urlpatterns = [
+    path("benchmark/", empty_view, name="benchmark"),
+]
+
+
+def load_handler(middleware):
+    with override_settings(MIDDLEWARE=middleware):
+        handler = BaseHandler()
+        handler.load_middleware()
+
+    return handler
+
+
+@benchmark
+def middleware_overhead(number=2000):
+    """
+    Time an anonymous request to an empty view through growing prefixes of
+    MIDDLEWARE, so each row shows the cumulative cost up to that middleware.
+
+    Measures the stack of the active settings profile, so compare
+    DJANGO_ENV=production with DJANGO_ENV=development.
+    """
+    request_factory = RequestFactory()
+    rows = []
+
+    def get_response(handler):
+        request = request_factory.get("/benchmark/")
+        request.urlconf = __name__
+
+        return handler.get_response(request)
+
+    for index in range(len(settings.MIDDLEWARE) + 1):
+        handler = load_handler(settings.MIDDLEWARE[:index])
+        label = settings.MIDDLEWARE[index - 1] if index else "(no middleware)"
+
+        rows.append((label, time_per_call(lambda: get_response(handler), number)))
+
+    # The handler leaves the request's URLconf active for the thread
+    set_urlconf(None)
+
+    return rows
+
+
+def reset_lazy_state():
+    """Discard the state warm_up() builds, as in a newly started worker."""
+    for setting in ["ROOT_URLCONF", "TEMPLATES", "LOCALE_PATHS"]:
+        setting_changed.send(
+            sender=settings._wrapped.__class__,
+            setting=setting,
+            value=getattr(settings, setting),
+            enter=False,
+        )
+
+    for cached_function in [
+        default_field_template,
+        uni_form_template,
+        uni_formset_template,
+        _get_activity_type_choices,
+        _get_activity_type_labels,
+    ]:
+        cached_function.cache_clear()
+
+
+@benchmark
+def first_request(number=20):
+    """
+    Compare the first circle-detail request of a new worker, with and without
+    warm-up, to the steady state. Requests are made in Finnish.
+    """
+    user = User.objects.create_user("benchmark@user.com", "benchmark")
+    circle = Circle.objects.create(name="Benchmark")
+    Companion.objects.create(circle=circle, user=user, is_organizer=True)
+    Activity.objects.bulk_create([Activity(circle=circle) for _ in range(4)])
+
+    client = Client(HTTP_ACCEPT_LANGUAGE="fi")
+    client.force_login(user)
+    url = circle.get_absolute_url()
+
+    def get_circle_detail():
+        client.get(url)
+
+    def time_first_call(func, setup, repeat=5):
+        timings = []
+
+        for _ in range(repeat):
+            setup()
+
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+
+        return min(timings)
+
+    return [
+        ("first request", time_first_call(get_circle_detail, reset_lazy_state)),
+        ("warm-up", time_first_call(warm_up, reset_lazy_state)),
+        (
+            "first request after warm-up",
+            time_first_call(get_circle_detail, lambda: (reset_lazy_state(), warm_up())),
+        ),
+        ("steady state", time_per_call(get_circle_detail, number)),
+    ]
+
+
+@benchmark
+def startup(number=5):
+    """Time process startup, in fresh Python processes."""
+
+    def time_python(*args):
+        return time_per_call(lambda: run_python(args), number=1, repeat=number)
+
+    return [
+        ("python", time_python("-c", "pass")),
+        ("WSGI application load", time_python("-c", LOAD_APPLICATION)),
+        ("manage.py check", time_python("manage.py", "check")),
+    ]
@@ -0,0 +1,32 @@
+from django.apps import apps
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Apps that may only run with DEBUG, as they expose internals or slow requests
+DEBUG_ONLY_APPS = [
+    "debug_toolbar",
+    "django_browser_reload",
+]
+
+
+@register()
+def check_debug_only_apps(app_configs, **kwargs):
+    """
+    Fail when development tools are active without DEBUG.
+
+    System checks run before management commands like migrate and
+    collectstatic, so a misconfigured deploy fails before it goes live.
+    """
+    if settings.DEBUG:
+        return []
+
+    return [
+        Error(
+            f"{app} is active with DEBUG=False.",
+            hint="Use DJANGO_ENV=production, or set DJANGO_DEBUG=True.",
+            id="core.E001",
+        )
+        for app in DEBUG_ONLY_APPS
+        if apps.is_installed(app)
+        or any(path.startswith(f"{app}.") for path in settings.MIDDLEWARE)
+    ]
@@ -0,0 +1,186 @@
+"""
+Compression of dynamic responses.
+
+HTML, JSON and iCalendar responses are compressed with Brotli or gzip,
+depending on the encodings the client accepts. Static files are compressed
+ahead of time by WhiteNoise instead.
+
+Compressed responses are subject to BREACH, which recovers secrets from
+response sizes when attacker-controlled input is reflected next to them.
+Django masks CSRF tokens with a new random value in every response, so they
+cannot be recovered this way. Views that reflect input alongside other
+secrets should use @compression_exempt.
+"""
+import re
+import zlib
+from functools import wraps
+
+import brotli
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+COMPRESSIBLE_CONTENT_TYPES = {
+    "application/json",
+    "text/calendar",
+    "text/html",
+}
+
+accept_encoding_re = re.compile(r"^\s*([^\s;]+)\s*(?:;\s*q=([0-9.]+))?\s*$")
+
+
+class BrotliCompressor:
+    encoding = "br"
+
+    def __init__(self):
+        self.compressor = brotli.Compressor(
+            mode=brotli.MODE_TEXT, quality=settings.COMPRESSION_BROTLI_QUALITY
+        )
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+class GzipCompressor:
+    encoding = "gzip"
+
+    def __init__(self):
+        # A window size of 16 + 15 writes a gzip header and trailer
+        self.compressor = zlib.compressobj(
+            settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+        )
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+# In order of preference
+COMPRESSORS = [
+    BrotliCompressor,
+    GzipCompressor,
+]
+
+
+def get_compressor_class(accept_encoding):
+    """Return the preferred compressor the client accepts, or None."""
+    qualities = {}
+
+    for coding in accept_encoding.split(","):
+        match = accept_encoding_re.match(coding)
+
+        if match:
+            name, quality = match.groups()
+
+            try:
+                qualities[name.lower()] = float(quality or 1)
+            except ValueError:
+                pass
+
+    for compressor_class in COMPRESSORS:
+        quality = qualities.get(compressor_class.encoding, qualities.get("*", 0))
+
+        if quality > 0:
+            return compressor_class
+
+    return None
+
+
+def compress_stream(chunks, compressor):
+    """Compress chunks, flushing after each so that streaming isn't held up."""
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush()
+
+        if data:
+            yield data
+
+    yield compressor.finish()
+
+
+def compression_exempt(view_func):
+    """Mark a view's responses to be sent uncompressed."""
+
+    @wraps(view_func)
+    def wrapped_view(*args, **kwargs):
+        response = view_func(*args, **kwargs)
+        response.compression_exempt = True
+
+        return response
+
+    return wrapped_view
+
+
+class CompressionMiddleware:
+    """
+    Compress HTML, JSON and iCalendar responses with Brotli or gzip.
+
+    Must come before middleware that reads or changes response content.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if not self.should_compress(response):
+            return response
+
+        patch_vary_headers(response, ["Accept-Encoding"])
+
+        compressor_class = get_compressor_class(
+            request.headers.get("Accept-Encoding", "")
+        )
+
+        if compressor_class is None:
+            return response
+
+        compressor = compressor_class()
+
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, compressor
+            )
+            del response.headers["Content-Length"]
+        else:
+            content = compressor.compress(response.content) + compressor.finish()
+
+            if len(content) >= len(response.content):
+                return response
+
+            response.content = content
+            response.headers["Content-Length"] = str(len(content))
+
+        # The content is no longer byte-for-byte the one the ETag was made for
+        etag = response.headers.get("ETag")
+
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+
+        response.headers["Content-Encoding"] = compressor.encoding
+
+        return response
+
+    def should_compress(self, response):
+        content_type = response.headers.get("Content-Type", "")
+
+        return (
+            content_type.partition(";")[0].strip() in COMPRESSIBLE_CONTENT_TYPES
+            and not response.has_header("Content-Encoding")
+            and not getattr(response, "compression_exempt", False)
+            and "no-transform" not in response.headers.get("Cache-Control", "")
+            and (
+                response.streaming
+                or len(response.content) >= settings.COMPRESSION_MIN_SIZE
+            )
+        )
@@ -0,0 +1,101 @@
+"""
+Subset of Bootstrap Icons used by the project.
+
+Instead of the full icon font, the project ships a generated stylesheet with
+only the icons it uses, each one an SVG data URI applied as a CSS mask so it
+takes the text color like the font glyphs did. Regenerate it with the
+``subset_icons`` management command after using a new ``bi-*`` class.
+"""
+import functools
+import re
+from pathlib import Path
+from urllib.parse import quote, unquote
+from xml.etree import ElementTree
+
+from activities.models import Activity
+from django.apps import apps
+
+from .warmup import get_project_templates
+
+SVG_NAMESPACE = "http://www.w3.org/2000/svg"
+
+ICON_CLASS_RE = re.compile(r"\bbi-([a-z0-9]+(?:-[a-z0-9]+)*)")
+
+ICON_RULE_RE = re.compile(
+    r'^\.bi-([a-z0-9-]+) \{ --bi: url\("data:image/svg\+xml,([^"]*)"\); \}$',
+    re.MULTILINE,
+)
+
+CSS_HEADER = """\
+/*!
+ * Bootstrap Icons subset (https://icons.getbootstrap.com/)
+ * Copyright 2019-2021 The Bootstrap Authors
+ * Licensed under MIT (https://github.com/twbs/icons/blob/main/LICENSE.md)
+ *
+ * Generated by `python manage.py subset_icons`, do not edit.
+ */
+.bi::before,
+[class^="bi-"]::before,
+[class*=" bi-"]::before {
+  display: inline-block;
+  width: 1em;
+  height: 1em;
+  vertical-align: -.125em;
+  content: "";
+  background-color: currentColor;
+  -webkit-mask: var(--bi) no-repeat center / contain;
+  mask: var(--bi) no-repeat center / contain;
+}
+"""
+
+
+def get_icons_css_path():
+    return Path(apps.get_app_config("core").path) / "static/bootstrap-icons/icons.css"
+
+
+def get_used_icon_names():
+    """Return the sorted names of the icons used by templates and activity types."""
+    sources = [path.read_text() for path in get_project_templates().values()]
+    sources.extend(icon.value for icon in Activity.ActivityTypeIcons)
+
+    return sorted(
+        {name for source in sources for name in ICON_CLASS_RE.findall(source)}
+    )
+
+
+def get_subset_icon_names(css):
+    """Return the names of the icons defined in a generated stylesheet."""
+    return set(re.findall(r"^\.bi-([a-z0-9-]+) \{", css, re.MULTILINE))
+
+
+@functools.lru_cache(maxsize=None)
+def get_icon_svgs():
+    """Return the SVG documents of the subset's icons by name, such as for PDFs."""
+    css = get_icons_css_path().read_text()
+
+    return {name: unquote(data) for name, data in ICON_RULE_RE.findall(css)}
+
+
+def build_icons_css(sprite, names):
+    """
+    Return a stylesheet with the named icons from a Bootstrap Icons sprite.
+
+    Raises KeyError for names that are not in the sprite.
+    """
+    ElementTree.register_namespace("", SVG_NAMESPACE)
+    symbols = {
+        symbol.get("id"): symbol
+        for symbol in ElementTree.fromstring(sprite).iter(f"{{{SVG_NAMESPACE}}}symbol")
+    }
+    rules = [CSS_HEADER]
+
+    for name in names:
+        symbol = symbols[name]
+        svg = ElementTree.Element(
+            f"{{{SVG_NAMESPACE}}}svg", viewBox=symbol.get("viewBox")
+        )
+        svg.extend(symbol)
+        data = quote(ElementTree.tostring(svg, encoding="unicode"), safe=" /:=.,-")
+        rules.append(f'.bi-{name} {{ --bi: url("data:image/svg+xml,{data}"); }}\n')
+
+    return "".join(rules)
@@ -0,0 +1,174 @@
+"""
+Sampled SQL query instrumentation.
+
+For a sample of requests, record the number of queries, the total database
+time and the slowest statements, tagged with the URL name of the view. When
+a view goes over its query budget, log a warning listing the slowest
+statements along with the project code that issued them.
+"""
+import heapq
+import logging
+import random
+import sys
+import time
+from collections import namedtuple
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Number of slowest statements kept per request
+SLOWEST_QUERY_COUNT = 3
+
+SlowQuery = namedtuple("SlowQuery", ["duration", "order", "sql", "frame"])
+
+
+def get_url_name(request):
+    """Return the URL name of the view that handled the request."""
+    resolver_match = request.resolver_match
+
+    if resolver_match is None or resolver_match.url_name is None:
+        return "<unresolved>"
+
+    return resolver_match.url_name
+
+
+def get_calling_frame():
+    """Return a "path:line in function" string for the innermost project frame."""
+    project_dir = str(settings.BASE_DIR)
+    frame = sys._getframe(1)
+
+    while frame is not None:
+        filename = frame.f_code.co_filename
+
+        if filename.startswith(project_dir) and filename != __file__:
+            path = Path(filename).relative_to(project_dir)
+
+            return f"{path}:{frame.f_lineno} in {frame.f_code.co_name}"
+
+        frame = frame.f_back
+
+    return None
+
+
+class QueryTimer:
+    """Database execute wrapper that counts queries and their total duration."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+
+            self.count += 1
+            self.duration += duration
+            self.record(duration, sql)
+
+    def record(self, duration, sql):
+        """Hook for subclasses to inspect each statement."""
+
+
+class QueryRecorder(QueryTimer):
+    """Query timer that also keeps the slowest statements."""
+
+    def __init__(self):
+        super().__init__()
+
+        self._slowest = []
+
+    def record(self, duration, sql):
+        """
+        Keep the slowest statements in a min-heap.
+
+        Walking the stack is comparatively expensive,
+        so it only happens for statements that make the cut.
+        """
+        if len(self._slowest) < SLOWEST_QUERY_COUNT:
+            query = SlowQuery(duration, self.count, sql, get_calling_frame())
+            heapq.heappush(self._slowest, query)
+        elif duration > self._slowest[0].duration:
+            query = SlowQuery(duration, self.count, sql, get_calling_frame())
+            heapq.heapreplace(self._slowest, query)
+
+    @property
+    def slowest(self):
+        """Return the slowest statements, slowest first."""
+        return sorted(self._slowest, reverse=True)
+
+
+@contextmanager
+def record_queries(wrapper):
+    """Install an execute wrapper on every database connection."""
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(wrapper))
+
+        yield wrapper
+
+
+def get_query_budget(url_name):
+    """Return the query budget for a URL name, falling back to the default."""
+    return {
+        **settings.QUERY_BUDGET_DEFAULT,
+        **settings.QUERY_BUDGETS.get(url_name, {}),
+    }
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Record queries for a sample of requests and log those over budget.
+
+    Unsampled requests run without any database wrapper.
+    Queries made while a streaming response is consumed are not recorded.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.QUERY_INSTRUMENTATION_SAMPLE_RATE:
+            return self.get_response(request)
+
+        with record_queries(QueryRecorder()) as recorder:
+            response = self.get_response(request)
+
+        self.check_budget(get_url_name(request), recorder)
+
+        return response
+
+    def check_budget(self, url_name, recorder):
+        budget = get_query_budget(url_name)
+
+        over_budget = (
+            recorder.count > budget["count"] or recorder.duration > budget["time"]
+        )
+
+        if not over_budget:
+            return
+
+        statements = "\n".join(
+            f"  {query.duration * 1000:.1f} ms at {query.frame}: {query.sql}"
+            for query in recorder.slowest
+        )
+
+        logger.warning(
+            "%s exceeded its query budget with %d queries in %.1f ms\n%s",
+            url_name,
+            recorder.count,
+            recorder.duration * 1000,
+            statements,
+            extra={
+                "url_name": url_name,
+                "query_count": recorder.count,
+                "query_time": recorder.duration,
+            },
+        )
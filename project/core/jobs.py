@@ -0,0 +1,69 @@
+"""
+Background jobs.
+
+Jobs are functions that run on a small pool of threads in the web process,
+for work too slow for the request path, such as building reports. A job is
+submitted once the current transaction commits, so it sees the data the
+request wrote. The job_queue_depth gauge counts jobs waiting for a thread.
+
+Jobs don't survive a restart of the process, so they should be safe to
+submit again, such as by the next request that needs the result. With
+JOB_WORKERS set to 0, as in tests, jobs run in the thread that submits them.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .metrics import JOB_QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the thread pool, started on first use in each process."""
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.JOB_WORKERS, thread_name_prefix="job"
+            )
+
+    return _executor
+
+
+def run_job(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception("Job %s failed", func.__qualname__)
+
+
+def run_queued_job(func, args, kwargs):
+    JOB_QUEUE_DEPTH.dec()
+
+    try:
+        run_job(func, args, kwargs)
+    finally:
+        # Each thread has its own connections, which would otherwise stay open
+        connections.close_all()
+
+
+def submit(func, *args, **kwargs):
+    """Run func(*args, **kwargs) in the background after the transaction commits."""
+
+    def submit_job():
+        if not settings.JOB_WORKERS:
+            run_job(func, args, kwargs)
+            return
+
+        JOB_QUEUE_DEPTH.inc()
+        get_executor().submit(run_queued_job, func, args, kwargs)
+
+    transaction.on_commit(submit_job)
@@ -0,0 +1,135 @@
+"""
+Structured, non-blocking logging.
+
+Log records are put on an in-memory queue by the request thread and
+formatted as JSON lines and written out by a listener thread, so that
+neither formatting (including tracebacks) nor I/O happens on the request path.
+"""
+import json
+import logging
+import queue
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from django.utils.crypto import salted_hmac
+
+from .instrumentation import QueryTimer, get_url_name, record_queries
+
+request_logger = logging.getLogger("core.requests")
+
+# Attributes every log record has, as opposed to those passed in "extra"
+RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as JSON objects, including any "extra" attributes."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+
+        entry.update(
+            (key, value)
+            for key, value in vars(record).items()
+            if key not in RECORD_ATTRIBUTES
+        )
+
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default=str)
+
+
+class QueueStreamHandler(QueueHandler):
+    """
+    Write records to a stream from a listener thread.
+
+    The formatter configured for this handler is used by the listener thread.
+    """
+
+    def __init__(self, stream=None):
+        self.target = logging.StreamHandler(stream)
+
+        super().__init__(queue.SimpleQueue())
+
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+
+    def setFormatter(self, fmt):
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        """
+        Merge the message with its arguments, but defer all other formatting.
+
+        Arguments may change after logging, so they are merged immediately.
+        Records never leave the process, so exception info can stay as is.
+        """
+        message = record.getMessage()
+
+        record = logging.makeLogRecord(vars(record))
+        record.msg = message
+        record.args = None
+
+        return record
+
+    def close(self):
+        # Write out queued records before the stream closes
+        self.listener.stop()
+        self.target.close()
+
+        super().close()
+
+
+def get_user_id_hash(request):
+    """
+    Return a pseudonymous hash of the user's ID, or None.
+
+    Only users that were already loaded during the request are considered,
+    so that logging never causes a database query.
+    """
+    user = getattr(request, "_cached_user", None)
+
+    if user is None or not user.is_authenticated:
+        return None
+
+    return salted_hmac("core.logs.user_id", str(user.pk)).hexdigest()[:16]
+
+
+class RequestLoggingMiddleware:
+    """Log one structured record per request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+
+        with record_queries(QueryTimer()) as timer:
+            response = self.get_response(request)
+
+        latency = time.perf_counter() - start
+        url_name = get_url_name(request)
+
+        request_logger.info(
+            "%s %s %s in %.1f ms",
+            request.method,
+            url_name,
+            response.status_code,
+            latency * 1000,
+            extra={
+                "method": request.method,
+                "url_name": url_name,
+                "status": response.status_code,
+                "user_id_hash": get_user_id_hash(request),
+                "latency": latency,
+                "query_count": timer.count,
+            },
+        )
+
+        return response
@@ -0,0 +1,74 @@
+import logging
+
+from core.benchmarking import autodiscover, format_duration, registry
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+
+class Command(BaseCommand):
+    help = "Run micro-benchmarks from the benchmarks.py modules of installed apps."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "names",
+            nargs="*",
+            help="Benchmarks to run, such as core.middleware_overhead. "
+            "Defaults to all.",
+        )
+        parser.add_argument(
+            "-n",
+            "--number",
+            type=int,
+            help="Iterations per measurement, overriding each benchmark's default.",
+        )
+        parser.add_argument(
+            "--list",
+            action="store_true",
+            dest="list_benchmarks",
+            help="List the available benchmarks.",
+        )
+
+    def handle(self, *args, names, number, list_benchmarks, **options):
+        autodiscover()
+
+        if list_benchmarks:
+            for name in sorted(registry):
+                self.stdout.write(name)
+            return
+
+        unknown = set(names) - set(registry)
+
+        if unknown:
+            raise CommandError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+        kwargs = {} if number is None else {"number": number}
+
+        # Log records are still created, but not written out
+        core_logger = logging.getLogger("core")
+        core_logger.propagate = False
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+
+        try:
+            for name in names or sorted(registry):
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+
+                # Each benchmark starts from an empty database
+                with transaction.atomic():
+                    rows = registry[name](**kwargs)
+                    transaction.set_rollback(True)
+
+                for label, seconds in rows:
+                    self.stdout.write(f"{format_duration(seconds)}  {label}")
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+            core_logger.propagate = True
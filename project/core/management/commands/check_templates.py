@@ -0,0 +1,45 @@
+import time
+
+from core.benchmarking import format_duration
+from core.warmup import get_project_templates
+from django.core.management.base import BaseCommand, CommandError
+from django.template import Engine, Template, TemplateSyntaxError
+from django.template.base import Origin
+
+
+class Command(BaseCommand):
+    help = (
+        "Compile every project template, reporting compile times and failing "
+        "on syntax errors."
+    )
+
+    def handle(self, *args, verbosity, **options):
+        engine = Engine.get_default()
+        timings = []
+        errors = []
+
+        for template_name, path in get_project_templates().items():
+            origin = Origin(str(path), template_name)
+            source = path.read_text(encoding=engine.file_charset)
+            start = time.perf_counter()
+
+            try:
+                Template(source, origin, template_name, engine)
+            except TemplateSyntaxError as error:
+                errors.append(f"{template_name}: {error}")
+            else:
+                timings.append((time.perf_counter() - start, template_name))
+
+        if verbosity >= 1:
+            for seconds, template_name in sorted(timings, reverse=True):
+                self.stdout.write(f"{format_duration(seconds)}  {template_name}")
+
+            self.stdout.write(
+                f"{format_duration(sum(seconds for seconds, _ in timings))}  "
+                f"total for {len(timings)} templates"
+            )
+
+        if errors:
+            raise CommandError(
+                "Templates with syntax errors:\n" + "\n".join(sorted(errors))
+            )
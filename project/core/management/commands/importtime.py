@@ -0,0 +1,67 @@
+from collections import Counter
+
+from core.benchmarking import format_duration
+from core.startup import DEFERRED_MODULES, LOAD_APPLICATION, get_import_times
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Report import time by top-level package when loading the WSGI "
+        "application, or when running a management command."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--command",
+            help='Management command to profile instead, such as "check".',
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=20,
+            help="Number of packages and modules to list.",
+        )
+
+    def handle(self, *args, command, limit, **options):
+        if command:
+            import_times = get_import_times(["manage.py", *command.split()])
+        else:
+            import_times = get_import_times(["-c", LOAD_APPLICATION])
+
+        app_packages = {
+            app_config.name.partition(".")[0] for app_config in apps.get_app_configs()
+        }
+        package_times = Counter()
+
+        for import_time in import_times:
+            package_times[import_time.module.partition(".")[0]] += import_time.own
+
+        total = sum(package_times.values())
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Packages, by own import time"))
+
+        for package, seconds in package_times.most_common(limit):
+            label = f"{package} (app)" if package in app_packages else package
+            self.stdout.write(f"{format_duration(seconds)}  {label}")
+
+        self.stdout.write(f"{format_duration(total)}  total")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Modules, by cumulative time"))
+
+        for import_time in sorted(
+            import_times, key=lambda import_time: import_time.cumulative, reverse=True
+        )[:limit]:
+            self.stdout.write(
+                f"{format_duration(import_time.cumulative)}  {import_time.module}"
+            )
+
+        deferred = sorted(
+            package for package in package_times if package in DEFERRED_MODULES
+        )
+
+        if deferred:
+            self.stderr.write(
+                f"Imported modules that should be deferred: {', '.join(deferred)}"
+            )
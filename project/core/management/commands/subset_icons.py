@@ -0,0 +1,28 @@
+from core.icons import build_icons_css, get_icons_css_path, get_used_icon_names
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the stylesheet with the Bootstrap Icons used by the project, "
+        "taken from the bootstrap-icons.svg sprite of a Bootstrap Icons release."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("sprite", help="Path to bootstrap-icons.svg.")
+
+    def handle(self, *args, sprite, **options):
+        names = get_used_icon_names()
+
+        try:
+            with open(sprite, encoding="utf-8") as file:
+                css = build_icons_css(file.read(), names)
+        except OSError as error:
+            raise CommandError(error)
+        except KeyError as error:
+            raise CommandError(f"Icon {error} is not in {sprite}")
+
+        path = get_icons_css_path()
+        path.write_text(css)
+
+        self.stdout.write(f"Wrote {len(names)} icons to {path}")
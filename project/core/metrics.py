@@ -0,0 +1,86 @@
+"""
+Prometheus metrics for requests, database queries and template rendering.
+
+When PROMETHEUS_MULTIPROC_DIR is set, as it is under gunicorn, each worker
+process writes its samples to files in that directory and the metrics view
+aggregates them on scrape.
+"""
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from .instrumentation import QueryTimer, get_url_name, record_queries
+
+REQUEST_LATENCY = Histogram(
+    "django_request_latency_seconds",
+    "Request latency by URL name and status code.",
+    ["url_name", "status"],
+)
+
+DB_QUERY_TIME = Histogram(
+    "django_db_query_seconds",
+    "Total database query time per request by URL name.",
+    ["url_name"],
+)
+
+TEMPLATE_RENDER_TIME = Histogram(
+    "django_template_render_seconds",
+    "Template response render time by URL name.",
+    ["url_name"],
+)
+
+CACHE_LOOKUPS = Counter(
+    "django_cache_lookups",
+    "Cache lookups by cache name and result, for computing hit ratios.",
+    ["cache", "result"],
+)
+
+JOB_QUEUE_DEPTH = Gauge(
+    "job_queue_depth",
+    "Number of background jobs waiting to run.",
+    multiprocess_mode="max",
+)
+
+
+def record_cache_lookup(cache_name, hit):
+    """Count a cache lookup as a hit or a miss."""
+    CACHE_LOOKUPS.labels(cache=cache_name, result="hit" if hit else "miss").inc()
+
+
+class MetricsMiddleware:
+    """
+    Observe request latency, database time and template render time.
+
+    Should come first in MIDDLEWARE so latency covers the other middleware.
+    Render time is only observed for TemplateResponse-based views.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+
+        with record_queries(QueryTimer()) as timer:
+            response = self.get_response(request)
+
+        url_name = get_url_name(request)
+
+        REQUEST_LATENCY.labels(url_name, response.status_code).observe(
+            time.perf_counter() - start
+        )
+        DB_QUERY_TIME.labels(url_name).observe(timer.duration)
+
+        return response
+
+    def process_template_response(self, request, response):
+        start = time.perf_counter()
+
+        def observe_render_time(response):
+            TEMPLATE_RENDER_TIME.labels(get_url_name(request)).observe(
+                time.perf_counter() - start
+            )
+
+        response.add_post_render_callback(observe_render_time)
+
+        return response
@@ -0,0 +1,55 @@
+# Generated by Django 4.1.3 on 2026-10-19 01:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RequestProfile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("method", models.CharField(max_length=10)),
+                ("path", models.CharField(max_length=2000)),
+                ("url_name", models.CharField(max_length=100)),
+                ("status_code", models.PositiveSmallIntegerField()),
+                (
+                    "duration",
+                    models.FloatField(help_text="Request duration in seconds"),
+                ),
+                ("stats", models.BinaryField()),
+                (
+                    "user",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "request profile",
+                "verbose_name_plural": "request profiles",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class RequestProfile(models.Model):
+    """cProfile statistics for a single request, requested by a staff user."""
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    user = models.ForeignKey(
+        to=settings.AUTH_USER_MODEL,
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+    )
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2000)
+    url_name = models.CharField(max_length=100)
+    status_code = models.PositiveSmallIntegerField()
+    duration = models.FloatField(help_text=_("Request duration in seconds"))
+    # Marshalled pstats data, as written by pstats.Stats.dump_stats()
+    stats = models.BinaryField(editable=False)
+
+    class Meta:
+        verbose_name = _("request profile")
+        verbose_name_plural = _("request profiles")
+        ordering = [
+            "-created_at",
+        ]
+
+    def __str__(self):
+        return f"{self.method} {self.path}"
+
+    @property
+    def filename(self):
+        return f"{self.url_name}-{self.pk}.prof"
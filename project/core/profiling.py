@@ -0,0 +1,81 @@
+"""
+On-demand profiling of single requests.
+
+A staff user gets a signed token from the request profiles admin and adds
+it to a request, either as the ``_profile`` query parameter or in the
+``X-Profile-Token`` header. That request runs under cProfile and the result
+is stored as a RequestProfile, downloadable from the admin as a ``.prof``
+file. Requests without a token only pay for the presence check.
+"""
+import marshal
+import time
+
+from django.conf import settings
+from django.core import signing
+
+from .instrumentation import get_url_name
+from .models import RequestProfile
+
+QUERY_PARAMETER = "_profile"
+HEADER = "X-Profile-Token"
+
+signer = signing.TimestampSigner(salt="core.profiling")
+
+
+def make_token(user):
+    """Return a profiling token for the user."""
+    return signer.sign(str(user.pk))
+
+
+def user_can_profile(request, token):
+    """Check that the token is valid and belongs to the requesting staff user."""
+    try:
+        user_id = signer.unsign(token, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+
+    user = request.user
+
+    return user.is_staff and str(user.pk) == user_id
+
+
+class RequestProfilingMiddleware:
+    """Must come after AuthenticationMiddleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = request.GET.get(QUERY_PARAMETER) or request.headers.get(HEADER)
+
+        if not token or not user_can_profile(request, token):
+            return self.get_response(request)
+
+        # Only imported when needed, most processes never profile
+        import cProfile
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+
+        profiler.enable()
+
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+
+        duration = time.perf_counter() - start
+
+        profiler.create_stats()
+
+        RequestProfile.objects.create(
+            user=request.user,
+            method=request.method,
+            path=request.get_full_path()[:2000],
+            url_name=get_url_name(request),
+            status_code=response.status_code,
+            duration=duration,
+            stats=marshal.dumps(profiler.stats),
+        )
+
+        return response
@@ -0,0 +1,85 @@
+"""
+Route reads to an optional read replica.
+
+Reads made while handling a safe-method request (GET, HEAD, OPTIONS) go to
+the replica. Writes, and any read made after a write in the same request,
+go to the primary. Once a request has written, the user's session is pinned
+to the primary for ``REPLICA_STICKINESS_SECONDS`` so that they see their own
+changes despite replication lag.
+"""
+import time
+
+from asgiref.local import Local
+from django.conf import settings
+
+PRIMARY_DATABASE = "default"
+REPLICA_DATABASE = "replica"
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+SESSION_KEY = "_replica_pinned_until"
+
+# Per-request routing state, isolated between threads and async tasks
+_state = Local()
+
+
+def reads_use_replica():
+    """Return whether reads in the current context should go to the replica."""
+    return getattr(_state, "use_replica", False) and not getattr(
+        _state, "has_written", False
+    )
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if reads_use_replica():
+            return REPLICA_DATABASE
+
+        return PRIMARY_DATABASE
+
+    def db_for_write(self, model, **hints):
+        _state.has_written = True
+
+        return PRIMARY_DATABASE
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Both databases hold the same data, so any relation is allowed."""
+        databases = {PRIMARY_DATABASE, REPLICA_DATABASE}
+
+        return obj1._state.db in databases and obj2._state.db in databases
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """The replica receives schema changes through replication."""
+        return db == PRIMARY_DATABASE
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Enable replica reads for safe-method requests from unpinned sessions.
+
+    Must come after SessionMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # The session itself is always read from the primary
+        pinned_until = request.session.get(SESSION_KEY, 0)
+
+        _state.has_written = False
+        _state.use_replica = (
+            request.method in SAFE_METHODS and pinned_until < time.time()
+        )
+
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.use_replica = False
+
+        if _state.has_written:
+            request.session[SESSION_KEY] = (
+                time.time() + settings.REPLICA_STICKINESS_SECONDS
+            )
+
+        return response
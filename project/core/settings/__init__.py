@@ -0,0 +1,25 @@
+"""
+Settings profiles, selected with the DJANGO_ENV environment variable.
+
+- "production", the default, contains only what the deployed site needs
+- "development" adds the debug toolbar, browser reload and rich logging
+- "test" is always used by the test runner
+"""
+import sys
+
+import environ
+from django.core.exceptions import ImproperlyConfigured
+
+if sys.argv[1:2] == ["test"]:
+    DJANGO_ENV = "test"
+else:
+    DJANGO_ENV = environ.Env().str("DJANGO_ENV", "production")
+
+if DJANGO_ENV == "production":
+    from .production import *  # noqa: F401, F403
+elif DJANGO_ENV == "development":
+    from .development import *  # noqa: F401, F403
+elif DJANGO_ENV == "test":
+    from .test import *  # noqa: F401, F403
+else:
+    raise ImproperlyConfigured(f"Unknown DJANGO_ENV {DJANGO_ENV!r}")
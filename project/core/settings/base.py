@@ -1,5 +1,5 @@
 """
-Django settings for core project.
+Django settings shared by all environment profiles.
 
 Generated by 'django-admin startproject' using Django 4.0.
 
@@ -18,7 +18,7 @@ from django.utils.translation import gettext_lazy as _
 env = environ.Env()
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
 
 # Quick-start development settings - unsuitable for production
@@ -62,16 +62,14 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
-    "django_browser_reload",
     "crispy_forms",
     "crispy_bootstrap5",
     "easy_thumbnails",
-    "debug_toolbar",
-    "django_linear_migrations",
     "accounts",
     "activities",
     "caregivers",
     "circles",
+    "core",
 ]
 
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
@@ -79,8 +77,12 @@ CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
 MIDDLEWARE = [
+    "core.metrics.MetricsMiddleware",
+    "core.logs.RequestLoggingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "core.compression.CompressionMiddleware",
+    "core.instrumentation.QueryInstrumentationMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -88,8 +90,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
-    "django_browser_reload.middleware.BrowserReloadMiddleware",
+    "core.profiling.RequestProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "core.urls"
@@ -128,6 +129,55 @@ else:
         "NAME": BASE_DIR / "db.sqlite3",
     }
 
+# Optional read replica for safe-method requests
+if "REPLICA_DATABASE_URL" in env:
+    DATABASES["replica"] = env.db("REPLICA_DATABASE_URL")
+    # Tests don't create a replica database, the primary stands in for it
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+
+    DATABASE_ROUTERS = ["core.routers.PrimaryReplicaRouter"]
+
+    # Seconds a user's reads stay on the primary after they write
+    REPLICA_STICKINESS_SECONDS = env.int("REPLICA_STICKINESS_SECONDS", 10)
+
+    # Routing reads the session, so it runs right after SessionMiddleware
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("django.contrib.sessions.middleware.SessionMiddleware") + 1,
+        "core.routers.ReplicaRoutingMiddleware",
+    )
+
+# SQL query instrumentation
+# Fraction of requests whose queries are recorded, from 0.0 to 1.0
+QUERY_INSTRUMENTATION_SAMPLE_RATE = env.float("QUERY_INSTRUMENTATION_SAMPLE_RATE", 0.0)
+
+# Query count and total database seconds a view may use before it is logged
+QUERY_BUDGET_DEFAULT = {"count": 50, "time": 0.25}
+
+# Per-view budgets, keyed by URL name
+QUERY_BUDGETS = {
+    "circle-detail": {"count": 100, "time": 0.5},
+}
+
+# On-demand request profiling
+# Seconds a staff user's profiling token stays valid
+PROFILING_TOKEN_MAX_AGE = 600
+
+# Background jobs, see core/jobs.py
+# Threads per process that run jobs, 0 runs them in the submitting thread
+JOB_WORKERS = env.int("JOB_WORKERS", 2)
+
+# Compression of dynamic HTML, JSON and iCalendar responses
+# Smaller responses are sent uncompressed
+COMPRESSION_MIN_SIZE = env.int("COMPRESSION_MIN_SIZE", 500)
+
+# Brotli quality from 0 to 11 and gzip level from 1 to 9, trading speed for size
+COMPRESSION_BROTLI_QUALITY = env.int("COMPRESSION_BROTLI_QUALITY", 5)
+COMPRESSION_GZIP_LEVEL = env.int("COMPRESSION_GZIP_LEVEL", 6)
+
+# Prometheus metrics
+# When set, scrapers must send an "Authorization: Bearer <token>" header
+METRICS_BEARER_TOKEN = env.str("METRICS_BEARER_TOKEN", default="")
+
 
 # Custom user model
 AUTH_USER_MODEL = "accounts.User"
@@ -195,36 +245,23 @@ THUMBNAIL_ALIASES = {
     },
 }
 
-# Debug Toolbar panel
-DEBUG_TOOLBAR_PANELS = [
-    "debug_toolbar.panels.history.HistoryPanel",
-    "debug_toolbar.panels.versions.VersionsPanel",
-    "debug_toolbar.panels.timer.TimerPanel",
-    "debug_toolbar.panels.settings.SettingsPanel",
-    "debug_toolbar.panels.headers.HeadersPanel",
-    "debug_toolbar.panels.request.RequestPanel",
-    "debug_toolbar.panels.sql.SQLPanel",
-    "debug_toolbar.panels.staticfiles.StaticFilesPanel",
-    "debug_toolbar.panels.templates.TemplatesPanel",
-    "debug_toolbar.panels.cache.CachePanel",
-    "debug_toolbar.panels.signals.SignalsPanel",
-    "debug_toolbar.panels.logging.LoggingPanel",
-    "debug_toolbar.panels.redirects.RedirectsPanel",
-    "debug_toolbar.panels.profiling.ProfilingPanel",
-]
-
-# Rich terminal output configuration
+# Logging
+# JSON lines, formatted and written off the request thread
 LOGGING = {
     "version": 1,
+    "disable_existing_loggers": False,
     "formatters": {
-        "rich": {"datefmt": "[%X]"},
+        "json": {"()": "core.logs.JSONFormatter"},
+    },
+    "handlers": {
+        "json": {
+            "class": "core.logs.QueueStreamHandler",
+            "formatter": "json",
+            "stream": "ext://sys.stdout",
+        },
     },
-    "console": {
-        "class": "rich.logging.RichHandler",
-        "filters": ["require_debug_true"],
-        "formatter": "rich",
-        "level": "DEBUG",
-        "rich_tracebacks": True,
-        "tracebacks_show_locals": True,
+    "root": {
+        "handlers": ["json"],
+        "level": env.str("DJANGO_LOG_LEVEL", "INFO"),
     },
 }
@@ -0,0 +1,65 @@
+"""Development profile, with debugging tools that production must not load."""
+from .base import *  # noqa: F401, F403
+from .base import INSTALLED_APPS, MIDDLEWARE, env
+
+DEBUG = env.bool("DJANGO_DEBUG", True)
+
+# Listed first, so that django-linear-migrations' makemigrations command
+# takes precedence over the one in core
+INSTALLED_APPS = [
+    "django_browser_reload",
+    "debug_toolbar",
+    "django_linear_migrations",
+    *INSTALLED_APPS,
+]
+
+_index = MIDDLEWARE.index("django.middleware.clickjacking.XFrameOptionsMiddleware") + 1
+
+MIDDLEWARE = [
+    *MIDDLEWARE[:_index],
+    "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "django_browser_reload.middleware.BrowserReloadMiddleware",
+    *MIDDLEWARE[_index:],
+]
+
+# Debug Toolbar panel
+DEBUG_TOOLBAR_PANELS = [
+    "debug_toolbar.panels.history.HistoryPanel",
+    "debug_toolbar.panels.versions.VersionsPanel",
+    "debug_toolbar.panels.timer.TimerPanel",
+    "debug_toolbar.panels.settings.SettingsPanel",
+    "debug_toolbar.panels.headers.HeadersPanel",
+    "debug_toolbar.panels.request.RequestPanel",
+    "debug_toolbar.panels.sql.SQLPanel",
+    "debug_toolbar.panels.staticfiles.StaticFilesPanel",
+    "debug_toolbar.panels.templates.TemplatesPanel",
+    "debug_toolbar.panels.cache.CachePanel",
+    "debug_toolbar.panels.signals.SignalsPanel",
+    "debug_toolbar.panels.logging.LoggingPanel",
+    "debug_toolbar.panels.redirects.RedirectsPanel",
+    "debug_toolbar.panels.profiling.ProfilingPanel",
+]
+
+# Logging
+if DEBUG:
+    # Rich terminal output for development
+    LOGGING = {
+        "version": 1,
+        "disable_existing_loggers": False,
+        "formatters": {
+            "rich": {"datefmt": "[%X]"},
+        },
+        "handlers": {
+            "console": {
+                "class": "rich.logging.RichHandler",
+                "formatter": "rich",
+                "level": "DEBUG",
+                "rich_tracebacks": True,
+                "tracebacks_show_locals": True,
+            },
+        },
+        "root": {
+            "handlers": ["console"],
+            "level": "INFO",
+        },
+    }
@@ -0,0 +1,24 @@
+"""Production profile."""
+from .base import *  # noqa: F401, F403
+from .base import TEMPLATES
+
+# Always cache compiled templates, whatever DEBUG is set to. Gunicorn workers
+# compile all project templates on startup, see core/warmup.py.
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        "APP_DIRS": False,
+        "OPTIONS": {
+            **TEMPLATES[0]["OPTIONS"],
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                ),
+            ],
+        },
+    },
+]
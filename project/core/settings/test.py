@@ -0,0 +1,15 @@
+"""Test profile, used by `python manage.py test`."""
+from .base import *  # noqa: F401, F403
+from .base import INSTALLED_APPS
+
+# Checks that every app has an up to date max_migration.txt
+INSTALLED_APPS = ["django_linear_migrations", *INSTALLED_APPS]
+
+# Leave log output to the test runner
+LOGGING = {}
+
+# Tests don't run collectstatic, so there is no manifest of hashed names
+STATICFILES_STORAGE = "django.contrib.staticfiles.storage.StaticFilesStorage"
+
+# Run background jobs when their transaction commits, in the test's thread
+JOB_WORKERS = 0
@@ -0,0 +1,71 @@
+"""
+Startup cost measurements.
+
+Imports are cached per process, so startup is measured in fresh Python
+subprocesses that load the WSGI application the way a gunicorn worker does.
+"""
+import os
+import subprocess
+import sys
+from collections import namedtuple
+
+from django.conf import settings
+
+# Heavy modules that must only be imported where they are used, not on startup
+DEFERRED_MODULES = [
+    "reportlab",
+    "rich",
+    "svglib",
+]
+
+# Loads the WSGI application and URLconf, as a gunicorn worker does
+LOAD_APPLICATION = (
+    "from core.wsgi import application; "
+    "from django.urls import get_resolver; "
+    "get_resolver().url_patterns"
+)
+
+ImportTime = namedtuple("ImportTime", ["own", "cumulative", "depth", "module"])
+
+
+def run_python(args, importtime=False):
+    """Run Python with the given arguments in the project directory."""
+    options = ["-X", "importtime"] if importtime else []
+
+    return subprocess.run(
+        [sys.executable, *options, *args],
+        cwd=settings.BASE_DIR,
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": "core.settings"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def get_import_times(args):
+    """Return the "-X importtime" output of running Python with the arguments."""
+    stderr = run_python(args, importtime=True).stderr
+    import_times = []
+
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or line.endswith("imported package"):
+            continue
+
+        own, cumulative, name = line.removeprefix("import time:").split("|")
+        module = name.strip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+
+        import_times.append(
+            ImportTime(int(own) / 1e6, int(cumulative) / 1e6, depth, module)
+        )
+
+    return import_times
+
+
+def get_loaded_modules(code=LOAD_APPLICATION):
+    """Return the names of the modules loaded by running the code."""
+    stdout = run_python(
+        ["-c", f"import sys; {code}; print(*sys.modules, sep='\\n')"]
+    ).stdout
+
+    return set(stdout.split())
@@ -0,0 +1,588 @@
+import copy
+import gzip
+import io
+import json
+import logging
+import marshal
+import tempfile
+import time
+from http import HTTPStatus
+from pathlib import Path
+
+import brotli
+from accounts.models import User
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    modify_settings,
+    override_settings,
+)
+from django.urls import NoReverseMatch, reverse
+
+from .benchmarks import middleware_overhead
+from .checks import check_debug_only_apps
+from .compression import CompressionMiddleware, compression_exempt
+from .icons import (
+    build_icons_css,
+    get_icons_css_path,
+    get_subset_icon_names,
+    get_used_icon_names,
+)
+from .instrumentation import QueryRecorder
+from .logs import JSONFormatter, QueueStreamHandler
+from .models import RequestProfile
+from .profiling import make_token
+from .routers import (
+    PRIMARY_DATABASE,
+    REPLICA_DATABASE,
+    SESSION_KEY,
+    PrimaryReplicaRouter,
+    ReplicaRoutingMiddleware,
+)
+from .startup import DEFERRED_MODULES, get_loaded_modules
+from .warmup import warm_up, warm_up_templates
+
+
+@override_settings(REPLICA_STICKINESS_SECONDS=10)
+class PrimaryReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.request_factory = RequestFactory()
+
+    def get_request(self, method="get", pinned_until=None):
+        request = getattr(self.request_factory, method)("/")
+        request.session = SessionStore()
+
+        if pinned_until is not None:
+            request.session[SESSION_KEY] = pinned_until
+
+        return request
+
+    def route_read(self, request, write_first=False):
+        """Run the middleware and return the database chosen for a read."""
+        databases = []
+
+        def view(request):
+            if write_first:
+                self.router.db_for_write(User)
+
+            databases.append(self.router.db_for_read(User))
+
+            return HttpResponse()
+
+        ReplicaRoutingMiddleware(view)(request)
+
+        return databases[0]
+
+    def test_read_outside_request(self):
+        """Reads outside of a request should use the primary"""
+        self.assertEqual(self.router.db_for_read(User), PRIMARY_DATABASE)
+
+    def test_safe_method_read(self):
+        """GET requests should read from the replica"""
+        request = self.get_request()
+
+        self.assertEqual(self.route_read(request), REPLICA_DATABASE)
+        self.assertNotIn(SESSION_KEY, request.session)
+
+    def test_unsafe_method_read(self):
+        """POST requests should read from the primary"""
+        request = self.get_request("post")
+
+        self.assertEqual(self.route_read(request), PRIMARY_DATABASE)
+
+    def test_read_after_write(self):
+        """Reads after a write should use the primary and pin the session"""
+        request = self.get_request()
+
+        self.assertEqual(self.route_read(request, write_first=True), PRIMARY_DATABASE)
+        self.assertGreater(request.session[SESSION_KEY], time.time())
+
+    def test_pinned_session_read(self):
+        """Recently written sessions should read from the primary"""
+        request = self.get_request(pinned_until=time.time() + 10)
+
+        self.assertEqual(self.route_read(request), PRIMARY_DATABASE)
+
+    def test_expired_pin_read(self):
+        """Sessions whose pin has expired should read from the replica again"""
+        request = self.get_request(pinned_until=time.time() - 1)
+
+        self.assertEqual(self.route_read(request), REPLICA_DATABASE)
+
+    def test_migrations_only_on_primary(self):
+        self.assertTrue(self.router.allow_migrate(PRIMARY_DATABASE, "circles"))
+        self.assertFalse(self.router.allow_migrate(REPLICA_DATABASE, "circles"))
+
+
+class QueryRecorderTest(TestCase):
+    def test_records_queries(self):
+        """Recorder should count queries and keep the slowest with their caller"""
+        recorder = QueryRecorder()
+
+        with connection.execute_wrapper(recorder):
+            User.objects.count()
+            User.objects.exists()
+
+        self.assertEqual(recorder.count, 2)
+        self.assertEqual(len(recorder.slowest), 2)
+        self.assertIn("core/tests.py", recorder.slowest[0].frame)
+
+
+class QueryInstrumentationMiddlewareTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("test@user.com", "test12345")
+        self.client.force_login(self.user)
+
+    @override_settings(
+        QUERY_INSTRUMENTATION_SAMPLE_RATE=1.0,
+        QUERY_BUDGETS={"circle-list": {"count": 0}},
+    )
+    def test_over_budget_is_logged(self):
+        """Sampled requests over their query budget should be logged"""
+        with self.assertLogs("core.instrumentation", "WARNING") as logs:
+            self.client.get(reverse("circle-list"))
+
+        self.assertIn("circle-list exceeded its query budget", logs.output[0])
+
+    @override_settings(
+        QUERY_INSTRUMENTATION_SAMPLE_RATE=0.0,
+        QUERY_BUDGETS={"circle-list": {"count": 0}},
+    )
+    def test_unsampled_request_is_not_recorded(self):
+        """Requests outside the sample should not be instrumented"""
+        with self.assertRaises(AssertionError):
+            with self.assertLogs("core.instrumentation", "WARNING"):
+                self.client.get(reverse("circle-list"))
+
+
+@override_settings(METRICS_BEARER_TOKEN="secret")
+class MetricsViewTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("test@user.com", "test12345")
+        self.client.force_login(self.user)
+
+    def get_metrics(self):
+        return self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret")
+
+    def test_request_metrics(self):
+        """Metrics should include latency for requests by URL name and status"""
+        self.client.get(reverse("circle-list"))
+
+        response = self.get_metrics()
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(
+            response,
+            'django_request_latency_seconds_count{status="200",url_name="circle-list"}',
+        )
+        self.assertContains(
+            response, 'django_template_render_seconds_count{url_name="circle-list"}'
+        )
+
+    def test_scrape_does_not_query_database(self):
+        """Scraping metrics should not touch the database"""
+        self.client.logout()
+
+        with self.assertNumQueries(0):
+            response = self.get_metrics()
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_bearer_token(self):
+        """Scrapers should authenticate with the bearer token"""
+        response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+        response = self.client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer wrong"
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    @override_settings(METRICS_BEARER_TOKEN="")
+    def test_without_token(self):
+        """Metrics should only be public without a token when debugging"""
+        self.assertEqual(
+            self.client.get(reverse("metrics")).status_code, HTTPStatus.FORBIDDEN
+        )
+
+        with self.settings(DEBUG=True):
+            response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+class QueueStreamHandlerTest(SimpleTestCase):
+    def test_writes_json_lines(self):
+        """Records should be written as JSON lines, including extras and tracebacks"""
+        stream = io.StringIO()
+        handler = QueueStreamHandler(stream)
+        handler.setFormatter(JSONFormatter())
+
+        logger = logging.getLogger("core.tests.json")
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+        # Keep the traceback out of the test output
+        self.addCleanup(setattr, logger, "propagate", logger.propagate)
+        logger.propagate = False
+
+        try:
+            raise ValueError("broken")
+        except ValueError:
+            logger.exception(
+                "Failed %s", "request", extra={"url_name": "circle-detail"}
+            )
+
+        # Closing flushes the queue
+        handler.close()
+
+        entry = json.loads(stream.getvalue())
+
+        self.assertEqual(entry["message"], "Failed request")
+        self.assertEqual(entry["url_name"], "circle-detail")
+        self.assertIn("ValueError: broken", entry["exception"])
+
+
+class RequestLoggingMiddlewareTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("test@user.com", "test12345")
+        self.client.force_login(self.user)
+
+    def test_request_is_logged(self):
+        """Each request should be logged with its URL name, user and query count"""
+        with self.assertLogs("core.requests", "INFO") as logs:
+            self.client.get(reverse("circle-list"))
+
+        record = logs.records[0]
+
+        self.assertEqual(record.url_name, "circle-list")
+        self.assertEqual(record.status, HTTPStatus.OK)
+        self.assertGreater(record.query_count, 0)
+        self.assertIsNotNone(record.user_id_hash)
+        self.assertNotEqual(record.user_id_hash, str(self.user.id))
+
+
+class RequestProfilingMiddlewareTest(TestCase):
+    def setUp(self):
+        self.staff_user = User.objects.create_superuser("staff@user.com", "test12345")
+        self.user = User.objects.create_user("test@user.com", "test12345")
+
+    def test_staff_user_with_token_is_profiled(self):
+        """A request with a staff user's token should store a profile"""
+        self.client.force_login(self.staff_user)
+
+        response = self.client.get(
+            reverse("circle-list"), {"_profile": make_token(self.staff_user)}
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+        profile = RequestProfile.objects.get()
+
+        self.assertEqual(profile.url_name, "circle-list")
+        self.assertEqual(profile.user, self.staff_user)
+        self.assertIsInstance(marshal.loads(profile.stats), dict)
+
+    def test_token_header_is_accepted(self):
+        """The token may also be sent in the X-Profile-Token header"""
+        self.client.force_login(self.staff_user)
+
+        self.client.get(
+            reverse("circle-list"),
+            HTTP_X_PROFILE_TOKEN=make_token(self.staff_user),
+        )
+
+        self.assertEqual(RequestProfile.objects.count(), 1)
+
+    def test_requests_without_valid_token_are_not_profiled(self):
+        """Missing, tampered, foreign and non-staff tokens should be ignored"""
+        self.client.force_login(self.staff_user)
+
+        self.client.get(reverse("circle-list"))
+        self.client.get(reverse("circle-list"), {"_profile": "tampered:token"})
+        self.client.get(reverse("circle-list"), {"_profile": make_token(self.user)})
+
+        self.client.force_login(self.user)
+
+        self.client.get(reverse("circle-list"), {"_profile": make_token(self.user)})
+
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_profile_download(self):
+        """Staff should be able to download stored statistics"""
+        self.client.force_login(self.staff_user)
+
+        profile = RequestProfile.objects.create(
+            method="GET",
+            path="/",
+            url_name="home",
+            status_code=HTTPStatus.OK,
+            duration=0.1,
+            stats=marshal.dumps({}),
+        )
+
+        response = self.client.get(
+            reverse("admin:core_requestprofile_download", args=[profile.pk])
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn("home-", response["Content-Disposition"])
+        self.assertEqual(marshal.loads(response.content), {})
+
+    def test_token_requires_permission(self):
+        """Staff without permissions on profiles should not get tokens"""
+        self.client.force_login(self.staff_user)
+
+        response = self.client.get(reverse("admin:core_requestprofile_token"))
+
+        self.assertRedirects(response, reverse("admin:core_requestprofile_changelist"))
+
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+
+        response = self.client.get(
+            reverse("admin:core_requestprofile_token"), follow=True
+        )
+
+        self.assertRedirects(response, reverse("admin:index"))
+        self.assertNotContains(response, "_profile=")
+
+
+class DebugOnlyAppsCheckTest(SimpleTestCase):
+    def test_test_profile_has_no_debug_only_apps(self):
+        """The test profile, like production, should not load development tools"""
+        self.assertEqual(check_debug_only_apps(None), [])
+
+        with self.assertRaises(NoReverseMatch):
+            reverse("djdt:render_panel")
+
+    @override_settings(DEBUG=False)
+    @modify_settings(INSTALLED_APPS={"append": "debug_toolbar"})
+    def test_debug_only_app_without_debug(self):
+        """Development tools should be an error when DEBUG is off"""
+        errors = check_debug_only_apps(None)
+
+        self.assertEqual([error.id for error in errors], ["core.E001"])
+
+    @override_settings(DEBUG=True)
+    @modify_settings(INSTALLED_APPS={"append": "debug_toolbar"})
+    def test_debug_only_app_with_debug(self):
+        """Development tools should be allowed with DEBUG"""
+        self.assertEqual(check_debug_only_apps(None), [])
+
+
+class MiddlewareOverheadBenchmarkTest(SimpleTestCase):
+    def test_benchmark_runs(self):
+        """The benchmark should time every prefix of the middleware stack"""
+        rows = middleware_overhead(number=1)
+
+        self.assertEqual(len(rows), len(settings.MIDDLEWARE) + 1)
+
+
+class WarmUpTest(SimpleTestCase):
+    def test_templates_are_loaded_with_includes(self):
+        """Warm-up should follow extends and includes, and load crispy templates"""
+        loaded = warm_up_templates()
+
+        self.assertIn("circles/circle_detail.html", loaded)
+        self.assertIn("circles/circle_activity.html", loaded)
+        self.assertIn("base.html", loaded)
+        self.assertIn("navigation.html", loaded)
+        self.assertIn("bootstrap5/field.html", loaded)
+
+    def test_warm_up(self):
+        """Warm-up should log how long it took"""
+        with self.assertLogs("core.warmup", "INFO"):
+            warm_up()
+
+
+class CheckTemplatesCommandTest(SimpleTestCase):
+    def test_templates_are_reported(self):
+        """Every project template should be compiled and timed"""
+        stdout = io.StringIO()
+
+        call_command("check_templates", stdout=stdout)
+
+        self.assertIn("circles/circle_activity.html", stdout.getvalue())
+        self.assertNotIn("admin/base.html", stdout.getvalue())
+
+    def test_syntax_error(self):
+        """A template syntax error should fail the command"""
+        with tempfile.TemporaryDirectory() as directory:
+            Path(directory, "broken.html").write_text("{% if %}")
+
+            templates = copy.deepcopy(settings.TEMPLATES)
+            templates[0]["DIRS"].append(directory)
+
+            with override_settings(TEMPLATES=templates):
+                with self.assertRaisesMessage(CommandError, "broken.html"):
+                    call_command("check_templates", verbosity=0)
+
+
+class StartupTest(SimpleTestCase):
+    def test_heavy_modules_are_deferred(self):
+        """Loading the WSGI application should not import heavy modules"""
+        loaded_packages = {module.partition(".")[0] for module in get_loaded_modules()}
+
+        self.assertIn("core", loaded_packages)
+        self.assertTrue(loaded_packages.isdisjoint(DEFERRED_MODULES))
+
+
+@override_settings(
+    COMPRESSION_MIN_SIZE=200, COMPRESSION_BROTLI_QUALITY=5, COMPRESSION_GZIP_LEVEL=6
+)
+class CompressionMiddlewareTest(SimpleTestCase):
+    content = b"<p>Companionship</p>" * 100
+
+    def setUp(self):
+        self.request_factory = RequestFactory()
+
+    def get_response(self, response, accept_encoding="gzip, deflate, br"):
+        request = self.request_factory.get("/", HTTP_ACCEPT_ENCODING=accept_encoding)
+
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_brotli_is_preferred(self):
+        """Brotli should be used when accepted"""
+        response = self.get_response(HttpResponse(self.content))
+
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(response["Content-Length"], str(len(response.content)))
+        self.assertEqual(brotli.decompress(response.content), self.content)
+
+    def test_gzip(self):
+        """Gzip should be used when Brotli is not accepted"""
+        response = self.get_response(
+            HttpResponse(self.content), accept_encoding="gzip, br;q=0"
+        )
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), self.content)
+
+    def test_json(self):
+        """JSON responses should be compressed"""
+        response = self.get_response(JsonResponse({"note": "x" * 500}))
+
+        self.assertEqual(response["Content-Encoding"], "br")
+
+    def test_uncompressed_responses(self):
+        """Small, exempt, non-text or unaccepted responses should not be compressed"""
+        responses = [
+            (b"<p>Small</p>", self.get_response(HttpResponse(b"<p>Small</p>"))),
+            (
+                self.content,
+                self.get_response(HttpResponse(self.content, content_type="image/png")),
+            ),
+            (
+                self.content,
+                self.get_response(HttpResponse(self.content), accept_encoding=""),
+            ),
+            (
+                self.content,
+                self.get_response(
+                    compression_exempt(lambda: HttpResponse(self.content))()
+                ),
+            ),
+        ]
+
+        for content, response in responses:
+            self.assertFalse(response.has_header("Content-Encoding"))
+            self.assertEqual(response.content, content)
+
+    def test_streaming_response(self):
+        """Streaming responses should be compressed as they are streamed"""
+        chunks = [b"<p>First</p>" * 50, b"<p>Second</p>" * 50]
+        response = self.get_response(StreamingHttpResponse(iter(chunks)))
+
+        compressed_chunks = list(response.streaming_content)
+        decompressor = brotli.Decompressor()
+
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertFalse(response.has_header("Content-Length"))
+        # Each chunk can be decompressed as soon as it arrives
+        self.assertEqual(decompressor.process(compressed_chunks[0]), chunks[0])
+        self.assertEqual(
+            b"".join(map(decompressor.process, compressed_chunks[1:])), chunks[1]
+        )
+
+    def test_etag_is_weakened(self):
+        """Strong ETags should be made weak for compressed content"""
+        response = HttpResponse(self.content)
+        response["ETag"] = '"abc"'
+
+        self.assertEqual(self.get_response(response)["ETag"], 'W/"abc"')
+
+
+class CompressionBreachTest(TestCase):
+    def test_csrf_tokens_are_masked(self):
+        """CSRF tokens should differ in every compressed response"""
+        self.client.force_login(User.objects.create_user("test@user.com", "pw"))
+
+        tokens = []
+
+        for _ in range(2):
+            response = self.client.get(
+                reverse("circle-create"), HTTP_ACCEPT_ENCODING="br"
+            )
+
+            self.assertEqual(response["Content-Encoding"], "br")
+
+            tokens.append(response.context["csrf_token"])
+
+        self.assertNotEqual(str(tokens[0]), str(tokens[1]))
+
+
+class IconsTest(SimpleTestCase):
+    sprite = (
+        '<svg xmlns="http://www.w3.org/2000/svg">'
+        '<symbol class="bi bi-check" viewBox="0 0 16 16" id="check">'
+        '<path d="M10.97 4.97a.75.75 0 0 1 1.07 1.05z"/></symbol>'
+        '<symbol class="bi bi-x" viewBox="0 0 16 16" id="x"><path d="M4 4z"/></symbol>'
+        "</svg>"
+    )
+
+    def test_used_icons_are_in_subset(self):
+        """Every icon used by the project should be in the generated stylesheet"""
+        subset = get_subset_icon_names(get_icons_css_path().read_text())
+
+        self.assertIn("calendar-event", get_used_icon_names())
+        self.assertLessEqual(set(get_used_icon_names()), subset)
+
+    def test_build_icons_css(self):
+        """Only the named icons should be included, as SVG data URIs"""
+        css = build_icons_css(self.sprite, ["check"])
+
+        self.assertEqual(get_subset_icon_names(css), {"check"})
+        self.assertIn(
+            "data:image/svg+xml,%3Csvg xmlns=%22http://www.w3.org/2000/svg%22 "
+            "viewBox=%220 0 16 16%22%3E%3Cpath d=%22M10.97 4.97a.75.75",
+            css,
+        )
+
+    def test_missing_icon(self):
+        """Asking for an icon that is not in the sprite should fail"""
+        with self.assertRaises(KeyError):
+            build_icons_css(self.sprite, ["check", "missing"])
+
+
+class StaticAssetsTest(SimpleTestCase):
+    def test_assets_are_self_hosted(self):
+        """Pages should load Bootstrap and its icons from our static files"""
+        response = self.client.get(reverse("home"))
+
+        self.assertNotContains(response, "cdn.jsdelivr.net")
+        self.assertContains(response, f"{settings.STATIC_URL}bootstrap-icons/icons.css")
+        self.assertContains(
+            response,
+            f'<script src="{settings.STATIC_URL}bootstrap/js/bootstrap.min.js" defer>',
+        )
@@ -13,16 +13,18 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.apps import apps
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 from django.views.generic.base import TemplateView
 
+from .views import metrics
+
 media_urlpatterns = static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
 urlpatterns = [
-    path("__debug__/", include("debug_toolbar.urls")),
     path("", TemplateView.as_view(template_name="home.html"), name="home"),
     path("admin/", admin.site.urls),
     path("accounts/", include("accounts.urls")),
@@ -30,10 +32,17 @@ urlpatterns = [
     path("caregivers/", include("caregivers.urls")),
     path("i18n/", include("django.conf.urls.i18n")),
     path("circles/", include("circles.urls")),
-    path("__reload__/", include("django_browser_reload.urls")),
+    path("metrics", metrics, name="metrics"),
 ] + media_urlpatterns
 
+# Development tools, see core/settings/development.py
+if apps.is_installed("debug_toolbar"):
+    urlpatterns.append(path("__debug__/", include("debug_toolbar.urls")))
+
+if apps.is_installed("django_browser_reload"):
+    urlpatterns.append(path("__reload__/", include("django_browser_reload.urls")))
+
 handler404 = "error_handling.views.handler404"
 handler500 = "error_handling.views.handler500"
 handler403 = "error_handling.views.handler403"
-handler400 = "error_handling.views.handler400"
\ No newline at end of file
+handler400 = "error_handling.views.handler400"
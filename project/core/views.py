@@ -0,0 +1,40 @@
+import hmac
+import os
+
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    generate_latest,
+    multiprocess,
+)
+
+
+# Scrapes must not open a database connection for ATOMIC_REQUESTS
+@transaction.non_atomic_requests
+def metrics(request):
+    """
+    Expose Prometheus metrics, aggregated across worker processes.
+
+    Scrapers authenticate with METRICS_BEARER_TOKEN, which only DEBUG may
+    leave unset.
+    """
+    token = settings.METRICS_BEARER_TOKEN
+    authorization = request.headers.get("Authorization", "")
+
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponseForbidden()
+    elif not hmac.compare_digest(authorization, f"Bearer {token}"):
+        return HttpResponseForbidden()
+
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
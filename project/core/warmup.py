@@ -0,0 +1,130 @@
+"""
+Worker warm-up.
+
+Much of Django's per-process state is built lazily, so without warm-up the
+first requests a new worker serves pay for populating URL resolvers, compiling
+templates and loading translation catalogs. gunicorn.conf.py runs warm_up()
+in each worker after it has loaded the application.
+"""
+import logging
+import time
+from pathlib import Path
+
+from activities.models import get_activity_type_choices, get_activity_type_labels
+from crispy_forms.templatetags.crispy_forms_filters import (
+    uni_form_template,
+    uni_formset_template,
+)
+from crispy_forms.utils import default_field_template
+from django.conf import settings
+from django.template import Engine, TemplateSyntaxError
+from django.template.loader import get_template
+from django.template.loader_tags import ExtendsNode, IncludeNode
+from django.template.utils import get_app_template_dirs
+from django.urls import get_resolver
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+
+def get_project_templates():
+    """
+    Return a {template name: path} dict of the project's templates.
+
+    These are the templates in the DIRS of the template engine and in the
+    template directories of project apps, but not of third-party apps.
+    """
+    engine = Engine.get_default()
+    app_dirs = [
+        directory
+        for directory in get_app_template_dirs("templates")
+        if directory.is_relative_to(settings.BASE_DIR)
+    ]
+    templates = {}
+
+    for directory in [*map(Path, engine.dirs), *app_dirs]:
+        for path in sorted(directory.rglob("*")):
+            if path.is_file():
+                # Earlier directories take precedence, as with the loaders
+                templates.setdefault(path.relative_to(directory).as_posix(), path)
+
+    return templates
+
+
+def load_template_tree(template_name, loaded):
+    """Load a template, along with the templates it extends and includes."""
+    if template_name in loaded:
+        return
+
+    loaded.add(template_name)
+
+    template = get_template(template_name).template
+
+    for node in template.nodelist.get_nodes_by_type((ExtendsNode, IncludeNode)):
+        if isinstance(node, ExtendsNode):
+            name = node.parent_name.var
+        else:
+            name = node.template.var
+
+        # Names that come from variables are only known when rendering
+        if isinstance(name, str):
+            load_template_tree(name, loaded)
+
+
+def warm_up_urls():
+    """Populate the URL resolver, which happens separately for each language."""
+    resolver = get_resolver()
+
+    for language_code, _name in settings.LANGUAGES:
+        with translation.override(language_code):
+            resolver.reverse_dict
+
+
+def warm_up_translations():
+    """
+    Load the translation catalog of each language, and build the translated
+    activity type choices.
+    """
+    for language_code, _name in settings.LANGUAGES:
+        with translation.override(language_code):
+            get_activity_type_choices()
+            get_activity_type_labels()
+
+
+def warm_up_templates():
+    """
+    Compile the project's templates and those of the crispy-forms pack.
+
+    Compiled templates are kept by the cached template loader. Syntax errors
+    are logged rather than raised, check_templates catches them before deploy.
+    """
+    loaded = set()
+
+    for template_name in get_project_templates():
+        try:
+            load_template_tree(template_name, loaded)
+        except TemplateSyntaxError:
+            logger.exception("Could not compile %s", template_name)
+
+    for crispy_template in [
+        default_field_template(),
+        uni_form_template(),
+        uni_formset_template(),
+    ]:
+        load_template_tree(crispy_template.template.name, loaded)
+
+    return loaded
+
+
+def warm_up():
+    start = time.perf_counter()
+
+    warm_up_translations()
+    warm_up_urls()
+    templates = warm_up_templates()
+
+    logger.info(
+        "Warmed up %d templates in %.1f ms",
+        len(templates),
+        (time.perf_counter() - start) * 1000,
+    )